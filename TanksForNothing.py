@@ -2,16 +2,19 @@ import pygame
 import math
 import random
 import sys
+import bisect
+import csv
+import gc
+import heapq
 import json
 import os
-
-# Initialize Pygame
-pygame.init()
-
-# Get screen dimensions for fullscreen
-info = pygame.display.Info()
-SCREEN_WIDTH = info.current_w
-SCREEN_HEIGHT = info.current_h
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict, deque
 
 # Colors
 SAND_COLOR = (194, 178, 128)  # Desert sand
@@ -55,6 +58,7 @@ GAME_VARS = {
     'starting_enemies': 1,  # Start with 1 for single player
     'enemies_per_wave': 1,  # How many enemies to add each wave
     'spawn_distance': 100,  # How far off-screen enemies spawn
+    'spawn_clearance_from_players': 250,  # Enemies don't enter the arena this close to a player
     'health_bar_width': 70,
     'health_bar_height': 8,
     'enemy_spawn_delay': 3000,  # 3 seconds between enemy spawns in milliseconds
@@ -85,6 +89,8 @@ EFFECT_VARS = {
     'track_spacing': 12,  # Distance between track points (increased for segmented look)
     'track_width': 20,  # Width of the tank tracks
     'track_fade_steps': 30,  # Number of fade steps for tracks
+    'flipbook_fps': 60,  # Frames per second of effect duration pre-rendered into flipbooks
+    'flipbook_cache_bytes': 8 * 1024 * 1024,  # Least recently used flipbooks are dropped past this
 }
 
 LEVELING_VARS = {
@@ -110,89 +116,699 @@ POWERUP_VARS = {
     'spawn_frequency': 8000,  # Time between powerup spawns in milliseconds (8 seconds)
     'max_powerups': 3,  # Maximum powerups on screen at once
     'min_distance_from_tanks': 100,  # Minimum distance from players and enemies when spawning
+    'obstacle_clearance': 40,  # Minimum gap between a powerup's centre and an obstacle's edge
+    'edge_margin': 100,  # Keep powerups this far inside the arena
 }
 
-class Particle:
-    def __init__(self, x, y, color, speed, angle, life):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.speed = speed
-        self.angle = angle
-        self.life = life
-        self.max_life = life
-        self.size = random.randint(2, 6)
-    
-    def update(self):
-        self.x += math.cos(self.angle) * self.speed
-        self.y += math.sin(self.angle) * self.speed
-        self.life -= 1
-        self.speed *= 0.98  # Slow down over time
-        return self.life <= 0
-    
-    def draw(self, screen):
-        if self.life > 0:
-            alpha = self.life / self.max_life
-            size = int(self.size * alpha)
-            if size > 0:
-                pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), size)
+REPLAY_VARS = {
+    'record_sessions': False,  # Record seed + inputs of every game for the replay harness
+    'directory': 'replays',  # Where recorded sessions are written
+}
 
-class Effect:
-    def __init__(self, x, y, effect_type):
-        self.x = x
-        self.y = y
-        self.effect_type = effect_type  # 'explosion' or 'hit'
-        self.start_time = pygame.time.get_ticks()
-        self.particles = []
-        
-        if effect_type == 'explosion':
-            self.duration = EFFECT_VARS['explosion_duration']
-            # Create explosion particles
-            for _ in range(EFFECT_VARS['particle_count'] * 2):
-                angle = random.uniform(0, 2 * math.pi)
-                speed = random.uniform(1, EFFECT_VARS['particle_speed'] * 2)
-                color = random.choice([RED, ORANGE, YELLOW])
-                life = random.randint(20, 40)
-                self.particles.append(Particle(x, y, color, speed, angle, life))
-        else:  # hit effect
-            self.duration = EFFECT_VARS['hit_effect_duration']
-            # Create hit particles
-            for _ in range(EFFECT_VARS['particle_count']):
-                angle = random.uniform(0, 2 * math.pi)
-                speed = random.uniform(0.5, EFFECT_VARS['particle_speed'])
-                color = random.choice([WHITE, YELLOW, ORANGE])
-                life = random.randint(10, 20)
-                self.particles.append(Particle(x, y, color, speed, angle, life))
-    
-    def update(self):
-        # Update particles
-        self.particles = [p for p in self.particles if not p.update()]
-        
-        # Check if effect is done
-        elapsed = pygame.time.get_ticks() - self.start_time
-        return elapsed >= self.duration and len(self.particles) == 0
-    
-    def draw(self, screen):
-        elapsed = pygame.time.get_ticks() - self.start_time
-        
-        if self.effect_type == 'explosion':
-            # Draw expanding explosion circle
-            if elapsed < self.duration:
-                progress = elapsed / self.duration
-                size = int(EFFECT_VARS['explosion_max_size'] * progress)
-                alpha = 1.0 - progress
-                
-                # Draw multiple circles for explosion effect
-                for i, color in enumerate([YELLOW, ORANGE, RED]):
-                    circle_size = max(1, int(size * (1 - i * 0.2)))
-                    if circle_size > 0:
-                        pygame.draw.circle(screen, color, (int(self.x), int(self.y)), circle_size)
-                        if i == 0:  # Outer ring
-                            pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), circle_size, 2)
-        
-        # Draw particles
-        for particle in self.particles:
-            particle.draw(screen)
+ARENA_VARS = {
+    'size': None,  # (width, height) of the playfield; None matches the display, --arena WxH overrides
+    'chunk_size': 512,  # Sand and obstacles are pre-rendered into square chunks this big
+    'max_cached_chunks': 32,  # LRU limit, raised automatically to hold two screenfuls of chunks
+    'cull_margin': 100,  # Tanks, missiles and powerups this far outside the view are still drawn
+    'effect_cull_margin': 200,  # Explosion particles drift further from the effect's origin
+    'free_space_cell': 20,  # Grid cell size of the free-space index used to place powerups and enemies
+    'coop_leash_margin': 80,  # Co-op players can't spread wider or taller than the view minus this
+}
+
+PROFILER_VARS = {
+    'history_frames': 300,  # Frames kept for rolling averages and p99
+    'overlay_refresh_frames': 15,  # Rebuild the overlay text every N frames
+    'csv_directory': 'profiles',  # Where per-frame CSV recordings are written
+    'sampling_interval_ms': 5,  # How often the sampling profiler captures the main thread's stack
+    'memory_report': False,  # Start with the per-wave memory report enabled (F6 toggles it)
+    'memory_report_lines': 15,  # Allocation sites listed per wave in the memory report
+}
+
+DISPLAY_VARS = {
+    'render_size': None,  # (width, height) the game is drawn at, e.g. (1920, 1080); None uses render_scale
+    'render_scale': 1.0,  # Fraction of the display size drawn at when render_size is None
+    'filter': 'smooth',  # How frames are scaled up to the display: 'smooth' or 'nearest'
+    'windowed': False,  # Run in a window instead of fullscreen, for development; --windowed overrides
+    'window_size': (1280, 720),
+}
+
+PACING_VARS = {
+    # 'sleep' (coarse pygame sleep), 'busy' (sleeps, then spins up to the deadline),
+    # 'vsync' (present on the display refresh) or 'uncapped'; --pacing MODE overrides
+    'mode': 'busy',
+    'target_fps': 60,  # Presented frames per second; --fps N overrides
+    'simulation_hz': 60,  # Game updates per second, whatever the frame rate; movement is tuned per update
+    'max_catch_up_updates': 5,  # After a stall, run at most this many updates in one frame
+    'spin_ms': 2,  # Busy mode spins instead of sleeping for this long before each deadline
+    'jitter_window': 600,  # Frame-to-frame intervals kept for the jitter statistics
+    'vsync_check_frames': 120,  # Frames after which vsync pacing is checked against the target rate
+}
+
+QUALITY_VARS = {
+    'adaptive': True,  # Step visual detail down and up to stay within the frame budget
+    'start_level': None,  # Index into QUALITY_LEVELS to start at; None starts at the highest
+    'window_frames': 90,  # Gameplay frames whose work time is judged together
+    'downgrade_ratio': 0.9,  # Step down when the window's p90 work time exceeds this share of the budget
+    'upgrade_ratio': 0.6,  # Step up when it is below this share
+    'downgrade_cooldown_frames': 60,  # Frames after any change before detail drops again
+    'upgrade_cooldown_frames': 600,  # ... and before it rises again, so it doesn't flip back and forth
+}
+
+# Lowest detail first; the last level is the game's full detail
+QUALITY_LEVELS = (
+    {'name': 'low', 'trail_detail': 0, 'enemy_trails': False, 'particle_fraction': 0.25,
+     'explosion_rings': 1, 'smooth_blur': False, 'hud_debug': False},
+    {'name': 'medium', 'trail_detail': 1, 'enemy_trails': False, 'particle_fraction': 0.5,
+     'explosion_rings': 2, 'smooth_blur': False, 'hud_debug': False},
+    {'name': 'high', 'trail_detail': 1, 'enemy_trails': True, 'particle_fraction': 0.75,
+     'explosion_rings': 3, 'smooth_blur': True, 'hud_debug': False},
+    {'name': 'full', 'trail_detail': 2, 'enemy_trails': True, 'particle_fraction': 1.0,
+     'explosion_rings': 3, 'smooth_blur': True, 'hud_debug': True},
+)
+
+HIGH_SCORE_VARS = {
+    'database': 'high_scores.db',  # Every finished game is kept here
+    'table_size': 10,  # Scores shown on the high score screen and needed to qualify
+    'legacy_files': ('high_scores.json', 'tank_high_scores.json'),  # Imported once into the database
+}
+
+METRICS_VARS = {
+    'enabled': False,  # Export aggregated frame metrics while the game runs
+    'target': 'udp',  # 'udp' for a statsd collector, 'file' to append lines to metrics_file
+    'host': '127.0.0.1',
+    'port': 8125,
+    'prefix': 'tanks',
+    'interval_ms': 1000,  # Frames are aggregated and sent once per interval
+    'max_packet_bytes': 1400,  # Keep each UDP datagram below a typical MTU
+    'metrics_file': 'profiles/metrics.log',
+}
+
+def init_display():
+    """Initialise pygame and return the desktop resolution used for fullscreen"""
+    pygame.init()
+    info = pygame.display.Info()
+    return info.current_w, info.current_h
+
+class Display:
+    """The window or fullscreen display, and the surface the game draws into.
+
+    The game draws at render size. When that differs from the display, or
+    vsync is wanted, pygame.SCALED has SDL's renderer scale each frame
+    (on the GPU where there is one). If that can't be created, or a
+    development window is a different size, frames are scaled into the
+    window in software, letterboxed to keep the aspect ratio.
+    """
+    def __init__(self, window_size, render_size, flags, pacer):
+        self.render_size = render_size
+        self.target = None  # Part of the window that software scaling draws into
+        vsync = pacer.mode == 'vsync'
+        if vsync or (render_size != window_size and flags & pygame.FULLSCREEN):
+            os.environ['SDL_RENDER_SCALE_QUALITY'] = 'linear' if DISPLAY_VARS['filter'] == 'smooth' else 'nearest'
+            try:
+                self.screen = pygame.display.set_mode(render_size, flags | pygame.SCALED, vsync=int(vsync))
+                return
+            except pygame.error as error:
+                if vsync:
+                    pacer.fall_back(f"Vsync unavailable ({error})")
+        window = pygame.display.set_mode(window_size, flags)
+        if render_size == window_size:
+            self.screen = window
+            return
+        self.screen = pygame.Surface(render_size).convert(window)
+        scale = min(window_size[0] / render_size[0], window_size[1] / render_size[1])
+        target = pygame.Rect(0, 0, round(render_size[0] * scale), round(render_size[1] * scale))
+        target.center = window.get_rect().center
+        window.fill(BLACK)
+        self.target = window.subsurface(target)
+        print(f"Drawing at {render_size[0]}x{render_size[1]}, scaled in software to {target.width}x{target.height}")
+
+    def present(self):
+        """Show the frame drawn on screen"""
+        if self.target is not None:
+            scale = pygame.transform.smoothscale if DISPLAY_VARS['filter'] == 'smooth' else pygame.transform.scale
+            scale(self.screen, self.target.get_size(), self.target)
+        pygame.display.flip()
+
+class GameClock:
+    """Source of game time in milliseconds.
+
+    Follows pygame's real-time clock by default. Headless tools switch it to
+    fixed steps so simulations are reproducible regardless of machine speed.
+    """
+    def __init__(self):
+        self.step_ms = None
+        self.now = 0.0
+
+    def ticks(self):
+        if self.step_ms is None:
+            return pygame.time.get_ticks()
+        return int(self.now)
+
+    def use_fixed_step(self, step_ms, start_ms=0):
+        self.step_ms = step_ms
+        self.now = float(start_ms)
+
+    def use_real_time(self):
+        self.step_ms = None
+
+    def restart(self):
+        """Rewind fixed-step time to zero at the start of a session"""
+        if self.step_ms is not None:
+            self.now = 0.0
+
+    def advance(self):
+        """Move fixed-step time forward by one tick"""
+        if self.step_ms is not None:
+            self.now += self.step_ms
+
+GAME_CLOCK = GameClock()
+
+class FramePacer:
+    """Ends each frame according to the pacing mode and tracks frame-to-frame jitter.
+
+    pygame's Clock rounds the frame interval to whole milliseconds (60 fps
+    runs at 62.5), so busy mode keeps its own perf_counter deadlines instead.
+    In vsync mode presentation blocks on the display refresh and nothing is
+    slept. If frames still arrive faster than the target rate (vsync isn't
+    available, or the display refreshes faster than the target) it falls
+    back to busy-wait capping.
+    """
+    MODES = ('sleep', 'busy', 'vsync', 'uncapped')
+
+    def __init__(self, mode, target_fps):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown frame pacing mode {mode!r}, expected one of {', '.join(self.MODES)}")
+        self.mode = mode
+        self.target_fps = target_fps
+        self.clock = pygame.time.Clock()
+        self.intervals = deque(maxlen=PACING_VARS['jitter_window'])  # ms between successive frame ends
+        self.next_deadline = None
+        self.last_frame_end = None
+        self.frames = 0
+
+    def fall_back(self, reason):
+        print(f"{reason}; pacing with busy-wait instead")
+        self.mode = 'busy'
+
+    def wait(self):
+        """Call once per frame after presenting it"""
+        if self.mode == 'sleep':
+            self.clock.tick(self.target_fps)
+        elif self.mode == 'busy':
+            self._wait_for_deadline()
+
+        now = time.perf_counter()
+        if self.last_frame_end is not None:
+            self.intervals.append((now - self.last_frame_end) * 1000)
+        self.last_frame_end = now
+        self.frames += 1
+        if self.mode == 'vsync' and self.frames == PACING_VARS['vsync_check_frames']:
+            self._check_vsync()
+
+    def _wait_for_deadline(self):
+        interval = 1 / self.target_fps
+        now = time.perf_counter()
+        deadline = self.next_deadline
+        if deadline is None or now - deadline > interval:
+            # More than a frame behind: start again from now rather than rushing to catch up
+            deadline = now
+        spin = PACING_VARS['spin_ms'] / 1000
+        if deadline - now > spin:
+            time.sleep(deadline - now - spin)
+        while time.perf_counter() < deadline:
+            pass
+        self.next_deadline = deadline + interval
+
+    def _check_vsync(self):
+        average = sum(self.intervals) / len(self.intervals)
+        if average < 1000 / self.target_fps * 0.95:
+            self.fall_back(f"Vsync pacing ran at {1000 / average:.0f} fps, above the {self.target_fps} fps target")
+
+    def stats(self):
+        """Frame interval statistics in ms over the jitter window, or None before two frames"""
+        if not self.intervals:
+            return None
+        ordered = sorted(self.intervals)
+        count = len(ordered)
+        mean = sum(ordered) / count
+        # Late frames took over one and a half target intervals
+        late_after = 1500 / self.target_fps if self.mode != 'uncapped' else mean * 1.5
+        return {
+            'fps': 1000 / mean if mean > 0 else 0.0,
+            'mean': mean,
+            'jitter': math.sqrt(sum((value - mean) ** 2 for value in ordered) / count),
+            'p1': ordered[int(0.01 * (count - 1))],
+            'p99': ordered[int(0.99 * (count - 1))],
+            'late': sum(1 for value in ordered if value > late_after),
+            'frames': count,
+        }
+
+    def describe(self):
+        target = "" if self.mode == 'uncapped' else f" @ {self.target_fps}"
+        return f"pacing {self.mode}{target}"
+
+    def status_lines(self):
+        """Overlay lines: mode, then interval spread and late frames"""
+        stats = self.stats()
+        if stats is None:
+            return [self.describe()]
+        return [
+            f"{self.describe()}: {stats['fps']:.1f} fps",
+            f"interval p1 {stats['p1']:.2f} p99 {stats['p99']:.2f} ms",
+            f"jitter {stats['jitter']:.2f} ms, {stats['late']} late",
+        ]
+
+    def report(self):
+        stats = self.stats()
+        if stats is None:
+            return
+        print(f"Frame pacing ({self.describe()}): {stats['fps']:.1f} fps over the last {stats['frames']} frames, "
+              f"interval mean {stats['mean']:.2f} ms, p1 {stats['p1']:.2f} ms, p99 {stats['p99']:.2f} ms, "
+              f"jitter (std dev) {stats['jitter']:.2f} ms, {stats['late']} late frames")
+
+class QualityController:
+    """Picks a QUALITY_LEVELS entry from how much of the frame budget recent frames used.
+
+    Work time excludes the pacing wait. Detail drops quickly when the p90
+    of a window goes over budget and rises only after a long stretch well
+    under it.
+    """
+    def __init__(self, budget_ms):
+        self.budget_ms = budget_ms
+        start = QUALITY_VARS['start_level']
+        self.level = len(QUALITY_LEVELS) - 1 if start is None else start
+        self.window = []
+        self.frames_since_change = 0
+        self.last_p90 = None
+
+    @property
+    def settings(self):
+        return QUALITY_LEVELS[self.level]
+
+    def record_frame(self, work_ms):
+        """Add one gameplay frame's work time, changing level at the end of a window if needed"""
+        if not QUALITY_VARS['adaptive']:
+            return
+        self.frames_since_change += 1
+        self.window.append(work_ms)
+        if len(self.window) < QUALITY_VARS['window_frames']:
+            return
+        ordered = sorted(self.window)
+        self.window = []
+        self.last_p90 = ordered[int(0.9 * (len(ordered) - 1))]
+        load = self.last_p90 / self.budget_ms
+        if (load > QUALITY_VARS['downgrade_ratio'] and self.level > 0 and
+                self.frames_since_change >= QUALITY_VARS['downgrade_cooldown_frames']):
+            self._set_level(self.level - 1)
+        elif (load < QUALITY_VARS['upgrade_ratio'] and self.level < len(QUALITY_LEVELS) - 1 and
+                self.frames_since_change >= QUALITY_VARS['upgrade_cooldown_frames']):
+            self._set_level(self.level + 1)
+
+    def _set_level(self, level):
+        print(f"Quality {self.settings['name']} -> {QUALITY_LEVELS[level]['name']} "
+              f"(p90 frame work {self.last_p90:.1f} ms of {self.budget_ms:.1f} ms)")
+        self.level = level
+        self.frames_since_change = 0
+
+    def status_line(self):
+        mode = "adaptive" if QUALITY_VARS['adaptive'] else "fixed"
+        p90 = f", p90 {self.last_p90:.1f}/{self.budget_ms:.1f} ms" if self.last_p90 is not None else ""
+        return f"quality {self.settings['name']} ({mode}{p90})"
+
+class TimerQueue:
+    """Callbacks due at a game time, kept in a min-heap by deadline.
+
+    run_due only pops the timers that are due, so a frame costs time in
+    proportion to what fires rather than to everything pending. Cancelled
+    timers stay in the heap and are skipped when they come up.
+    """
+    def __init__(self):
+        self.heap = []
+        self.sequence = 0  # Keeps timers with equal deadlines in scheduling order
+
+    def __len__(self):
+        return len(self.heap)
+
+    def schedule(self, deadline, callback, *args):
+        """Run callback(*args) once game time reaches deadline; returns a handle for cancel()"""
+        self.sequence += 1
+        timer = [deadline, self.sequence, callback, args]
+        heapq.heappush(self.heap, timer)
+        return timer
+
+    def cancel(self, timer):
+        if timer is not None:
+            timer[2] = None
+
+    def clear(self):
+        self.heap = []
+
+    def run_due(self, now):
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            _, _, callback, args = heapq.heappop(heap)
+            if callback is not None:
+                callback(*args)
+
+class Arena:
+    """Playfield dimensions shared by the game and the entities moving in it"""
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+    def contains(self, x, y):
+        return 0 <= x <= self.width and 0 <= y <= self.height
+
+def poisson_disk_sample(left, top, right, bottom, radius, rng, count, keep_out=(), attempts=30):
+    """count random points at least radius apart inside a box, or as many as fit.
+
+    keep_out is a list of (x, y, distance) circles no point may fall in.
+    Points start as uniform darts so they spread over the whole box. Once
+    attempts darts in a row miss, the set grows Bridson-style instead: an
+    active point gets attempts candidates in the annulus from radius to
+    2 * radius around it and retires when none fit. Fewer than count points
+    come back only once every point has retired, that is when the box is full.
+    A sparse grid of radius/sqrt(2) cells holds at most one point each, so
+    every candidate is checked against a few neighbouring cells only, and
+    stopping at count keeps the cost following the number of points rather
+    than the size of the box.
+    """
+    if right < left or bottom < top or count <= 0:
+        return []
+    cell = radius / math.sqrt(2)
+    grid = {}  # (column, row) -> point
+    neighbours = [(dx, dy) for dy in range(-2, 3) for dx in range(-2, 3) if abs(dx) + abs(dy) < 4]
+    radius_squared = radius * radius
+    points = []
+
+    def accept(x, y):
+        """Add (x, y) to the sample if it is in the box and clear of every other point"""
+        if not (left <= x <= right and top <= y <= bottom):
+            return False
+        for keep_x, keep_y, distance in keep_out:
+            if (x - keep_x) ** 2 + (y - keep_y) ** 2 < distance * distance:
+                return False
+        column, row = int((x - left) / cell), int((y - top) / cell)
+        for dx, dy in neighbours:
+            point = grid.get((column + dx, row + dy))
+            if point and (point[0] - x) ** 2 + (point[1] - y) ** 2 < radius_squared:
+                return False
+        points.append((x, y))
+        grid[column, row] = (x, y)
+        return True
+
+    misses = 0
+    while len(points) < count and misses < attempts:
+        if accept(rng.uniform(left, right), rng.uniform(top, bottom)):
+            misses = 0
+        else:
+            misses += 1
+
+    active = list(points)
+    while active and len(points) < count:
+        index = rng.randrange(len(active))
+        x, y = active[index]
+        for _ in range(attempts):
+            angle = rng.uniform(0, 2 * math.pi)
+            distance = rng.uniform(radius, 2 * radius)
+            if accept(x + math.cos(angle) * distance, y + math.sin(angle) * distance):
+                active.append(points[-1])
+                break
+        else:
+            active[index] = active[-1]
+            active.pop()
+    return points
+
+class Camera:
+    """Viewport onto the arena in world coordinates.
+
+    Follows the middle of the players and stops at the arena edges; an arena
+    smaller than the view is centred in it instead.
+    """
+    def __init__(self, width, height, arena):
+        self.width = width
+        self.height = height
+        self.arena = arena
+        self.x = 0
+        self.y = 0
+
+    @property
+    def offset(self):
+        return (self.x, self.y)
+
+    def view_rect(self, margin=0):
+        """Visible part of the world, grown by margin on every side"""
+        return pygame.Rect(self.x - margin, self.y - margin, self.width + 2 * margin, self.height + 2 * margin)
+
+    def follow(self, targets):
+        if targets:
+            self.center_on(sum(target.x for target in targets) / len(targets),
+                           sum(target.y for target in targets) / len(targets))
+
+    def center_on(self, x, y):
+        self.x = self._clamp(int(x) - self.width // 2, self.arena.width, self.width)
+        self.y = self._clamp(int(y) - self.height // 2, self.arena.height, self.height)
+
+    @staticmethod
+    def _clamp(position, world_size, view_size):
+        if world_size <= view_size:
+            return (world_size - view_size) // 2
+        return max(0, min(world_size - view_size, position))
+
+class ChunkedLayer:
+    """Static arena content (sand and obstacles) pre-rendered in square chunks.
+
+    A chunk is rendered the first time it comes into view and kept in an LRU
+    cache, so each frame is a handful of blits whatever the arena's size.
+    The sand image is tiled with mirrored copies so tile edges line up; a
+    new background or obstacle list drops the cache.
+    """
+    def __init__(self, view_size, chunk_size, max_chunks):
+        self.chunk_size = chunk_size
+        per_screen = (view_size[0] // chunk_size + 2) * (view_size[1] // chunk_size + 2)
+        self.max_chunks = max(max_chunks, per_screen * 2)
+        self.chunks = OrderedDict()  # (column, row) -> Surface
+        self.background = None
+        self.obstacles = None
+        self.tiles = {}
+        self.obstacles_by_chunk = {}
+
+    def reset(self, background, obstacles):
+        self.chunks.clear()
+        self.background = background
+        self.obstacles = obstacles
+        self.tiles = {}
+        if background is not None:
+            self.tiles = {
+                (0, 0): background,
+                (1, 0): pygame.transform.flip(background, True, False),
+                (0, 1): pygame.transform.flip(background, False, True),
+                (1, 1): pygame.transform.flip(background, True, True),
+            }
+        # Bucket obstacles by the chunks they touch; roofs overhang their rect by a few pixels
+        size = self.chunk_size
+        self.obstacles_by_chunk = {}
+        for obstacle in obstacles:
+            bounds = obstacle.rect.inflate(8, 8)
+            for row in range(bounds.top // size, (bounds.bottom - 1) // size + 1):
+                for column in range(bounds.left // size, (bounds.right - 1) // size + 1):
+                    self.obstacles_by_chunk.setdefault((column, row), []).append(obstacle)
+
+    def render_chunk(self, column, row):
+        size = self.chunk_size
+        left, top = column * size, row * size
+        chunk = pygame.Surface((size, size))
+        if self.background is None:
+            chunk.fill(SAND_COLOR)
+        else:
+            tile_w, tile_h = self.background.get_size()
+            for tile_y in range(top // tile_h, (top + size - 1) // tile_h + 1):
+                for tile_x in range(left // tile_w, (left + size - 1) // tile_w + 1):
+                    chunk.blit(self.tiles[(tile_x % 2, tile_y % 2)], (tile_x * tile_w - left, tile_y * tile_h - top))
+        for obstacle in self.obstacles_by_chunk.get((column, row), ()):
+            obstacle.draw(chunk, (left, top))
+        return chunk
+
+    def get_chunk(self, column, row):
+        key = (column, row)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+        chunk = self.render_chunk(column, row)
+        self.chunks[key] = chunk
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    def draw(self, screen, camera, background, obstacles):
+        if background is not self.background or obstacles is not self.obstacles:
+            self.reset(background, obstacles)
+        arena = camera.arena
+        size = self.chunk_size
+        arena_on_screen = pygame.Rect(-camera.x, -camera.y, arena.width, arena.height)
+        if not arena_on_screen.contains(screen.get_rect()):
+            screen.fill(BLACK)
+        screen.set_clip(arena_on_screen)
+        first_column, first_row = max(0, camera.x) // size, max(0, camera.y) // size
+        last_column = min(arena.width - 1, camera.x + camera.width - 1) // size
+        last_row = min(arena.height - 1, camera.y + camera.height - 1) // size
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                screen.blit(self.get_chunk(column, row), (column * size - camera.x, row * size - camera.y))
+        screen.set_clip(None)
+
+class FreeSpaceIndex:
+    """Grid cells of an area where something with the given clearance fits.
+
+    Cells touched by an obstacle (grown by the clearance) are dropped once
+    per obstacle layout. The remaining cells are kept in a list alongside
+    each cell's slot in it, so a cell is removed by swapping in the last one
+    and a uniform random free cell is a single random index. Tanks block the
+    cells around them only for the duration of one sample() call.
+    """
+    def __init__(self, bounds, cell_size, obstacles, clearance, hole=None):
+        self.left, self.top = bounds.left, bounds.top
+        self.cell_size = cell_size
+        self.columns = max(0, bounds.width // cell_size)
+        self.rows = max(0, bounds.height // cell_size)
+        self.obstacles = obstacles
+        cell_count = self.columns * self.rows
+        if hole is None:
+            self.free = list(range(cell_count))
+        else:
+            # Only cells with some part outside the hole, e.g. a band along the edges
+            inner = pygame.Rect(hole.left - self.left, hole.top - self.top, hole.width, hole.height)
+            first_column = -(-inner.left // cell_size)
+            last_column = inner.right // cell_size
+            first_row = -(-inner.top // cell_size)
+            last_row = inner.bottom // cell_size
+            self.free = [row * self.columns + column for row in range(self.rows) for column in range(self.columns)
+                         if not (first_column <= column < last_column and first_row <= row < last_row)]
+        self.slots = [-1] * cell_count
+        for slot, cell in enumerate(self.free):
+            self.slots[cell] = slot
+        for obstacle in obstacles:
+            # Any point of a blocked cell could be closer than clearance to the obstacle
+            for cell in self.cells_in(obstacle.rect.inflate(2 * clearance, 2 * clearance)):
+                self.remove(cell)
+
+    def __len__(self):
+        return len(self.free)
+
+    def cells_in(self, rect):
+        size = self.cell_size
+        first_column = max(0, (rect.left - self.left) // size)
+        last_column = min(self.columns - 1, (rect.right - 1 - self.left) // size)
+        first_row = max(0, (rect.top - self.top) // size)
+        last_row = min(self.rows - 1, (rect.bottom - 1 - self.top) // size)
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                yield row * self.columns + column
+
+    def remove(self, cell):
+        slot = self.slots[cell]
+        if slot < 0:
+            return False
+        last = self.free.pop()
+        if last != cell:
+            self.free[slot] = last
+            self.slots[last] = slot
+        self.slots[cell] = -1
+        return True
+
+    def add(self, cell):
+        self.slots[cell] = len(self.free)
+        self.free.append(cell)
+
+    def sample(self, rng, count=1, avoid=(), distance=0):
+        """Up to count random free points, none closer than distance to a point in avoid.
+
+        A random free cell is checked against the avoid points near it, which
+        are bucketed on a grid as coarse as the distance. A rejected cell is
+        set aside until the call returns, so each draw stays uniform over the
+        cells still possible and a point is found whenever one exists.
+        """
+        size = self.cell_size
+        reach = distance + size * 0.7072  # Any point of the cell, not just its centre
+        reach_squared = reach * reach
+        buckets = {}
+        for x, y in avoid:
+            buckets.setdefault((int(x // reach), int(y // reach)), []).append((x, y))
+        points = []
+        rejected = []
+        while len(points) < count and self.free:
+            cell = self.free[rng.randrange(len(self.free))]
+            row, column = divmod(cell, self.columns)
+            center_x = self.left + (column + 0.5) * size
+            center_y = self.top + (row + 0.5) * size
+            bucket_x, bucket_y = int(center_x // reach), int(center_y // reach)
+            if any((x - center_x) ** 2 + (y - center_y) ** 2 < reach_squared
+                   for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                   for x, y in buckets.get((bucket_x + dx, bucket_y + dy), ())):
+                self.remove(cell)
+                rejected.append(cell)
+                continue
+            points.append((int(self.left + (column + rng.random()) * size),
+                           int(self.top + (row + rng.random()) * size)))
+        for cell in reversed(rejected):
+            self.add(cell)
+        return points
+
+FLIPBOOK_COLORKEY = (255, 0, 255)
+
+def render_explosion_frame(size, rings):
+    """The explosion's circles at one size, on a colorkeyed surface centred on the explosion"""
+    radius = max(1, size)
+    surface = pygame.Surface((radius * 2 + 4, radius * 2 + 4))
+    surface.fill(FLIPBOOK_COLORKEY)
+    center = (radius + 2, radius + 2)
+    for i, color in enumerate([YELLOW, ORANGE, RED][:rings]):
+        circle_size = max(1, int(size * (1 - i * 0.2)))
+        pygame.draw.circle(surface, color, center, circle_size)
+        if i == 0:  # Outer ring
+            pygame.draw.circle(surface, WHITE, center, circle_size, 2)
+    surface = surface.convert()
+    surface.set_colorkey(FLIPBOOK_COLORKEY, pygame.RLEACCEL)
+    return surface
+
+class Flipbook:
+    """An effect's shape pre-rendered at each frame of its duration"""
+    def __init__(self, frames, duration):
+        self.frames = frames
+        self.duration = duration
+        self.bytes = sum(frame.get_pitch() * frame.get_height() for frame in frames)
+
+    def frame(self, elapsed):
+        """Frame for the elapsed time in ms, or None once the effect's duration has passed"""
+        if elapsed >= self.duration:
+            return None
+        return self.frames[min(len(self.frames) - 1, round(elapsed * len(self.frames) / self.duration))]
+
+class FlipbookCache:
+    """Flipbooks built on first use and kept within a byte budget, least recently used dropped first"""
+    def __init__(self):
+        self.books = OrderedDict()  # (kind, size, rings) -> Flipbook
+        self.bytes = 0
+
+    def explosion(self, size, rings):
+        key = ('explosion', size, rings)
+        book = self.books.get(key)
+        if book is not None:
+            self.books.move_to_end(key)
+            return book
+
+        duration = EFFECT_VARS['explosion_duration']
+        count = max(1, math.ceil(duration * EFFECT_VARS['flipbook_fps'] / 1000))
+        book = Flipbook([render_explosion_frame(int(size * i / count), rings) for i in range(count)], duration)
+        self.books[key] = book
+        self.bytes += book.bytes
+        while self.bytes > EFFECT_VARS['flipbook_cache_bytes'] and len(self.books) > 1:
+            _, dropped = self.books.popitem(last=False)
+            self.bytes -= dropped.bytes
+        return book
+
+FLIPBOOKS = FlipbookCache()
 
 class Obstacle:
     def __init__(self, x, y, width, height, obstacle_type=None):
@@ -208,37 +824,38 @@ class Obstacle:
         else:
             self.type = obstacle_type
 
-    def draw(self, screen):
+    def draw(self, screen, offset=(0, 0)):
+        rect = self.rect.move(-offset[0], -offset[1])
         if self.type == 'bunker':
-            self._draw_bunker(screen)
+            self._draw_bunker(screen, rect)
         elif self.type == 'barracks':
-            self._draw_barracks(screen)
+            self._draw_barracks(screen, rect)
         elif self.type == 'watchtower':
-            self._draw_watchtower(screen)
+            self._draw_watchtower(screen, rect)
         elif self.type == 'satellite':
-            self._draw_satellite(screen)
+            self._draw_satellite(screen, rect)
         elif self.type == 'supply_depot':
-            self._draw_supply_depot(screen)
+            self._draw_supply_depot(screen, rect)
         else:
             # Default fallback
-            pygame.draw.rect(screen, OBSTACLE_VARS['rock_color'], self.rect)
-            pygame.draw.rect(screen, BLACK, self.rect, 2)
+            pygame.draw.rect(screen, OBSTACLE_VARS['rock_color'], rect)
+            pygame.draw.rect(screen, BLACK, rect, 2)
 
-    def _draw_bunker(self, screen):
+    def _draw_bunker(self, screen, rect):
         """Draw a military bunker with sandbags"""
         # Main bunker body (dark gray concrete)
         bunker_color = (80, 80, 80)
-        pygame.draw.rect(screen, bunker_color, self.rect)
+        pygame.draw.rect(screen, bunker_color, rect)
 
         # Darker top (roof)
-        roof_rect = pygame.Rect(self.rect.x, self.rect.y, self.rect.width, self.rect.height // 4)
+        roof_rect = pygame.Rect(rect.x, rect.y, rect.width, rect.height // 4)
         pygame.draw.rect(screen, (60, 60, 60), roof_rect)
 
         # Firing slit (small black rectangle)
         slit_width = self.width // 3
         slit_height = 4
-        slit_x = self.rect.x + (self.width - slit_width) // 2
-        slit_y = self.rect.y + self.height // 2
+        slit_x = rect.x + (self.width - slit_width) // 2
+        slit_y = rect.y + self.height // 2
         pygame.draw.rect(screen, BLACK, (slit_x, slit_y, slit_width, slit_height))
 
         # Sandbag details (small brown circles on the sides)
@@ -247,22 +864,22 @@ class Obstacle:
         for i in range(3):
             # Left side sandbags
             pygame.draw.circle(screen, sandbag_color,
-                             (self.rect.x + 5, self.rect.y + 10 + i * 12), bag_size)
+                             (rect.x + 5, rect.y + 10 + i * 12), bag_size)
             # Right side sandbags
             pygame.draw.circle(screen, sandbag_color,
-                             (self.rect.x + self.width - 5, self.rect.y + 10 + i * 12), bag_size)
+                             (rect.x + self.width - 5, rect.y + 10 + i * 12), bag_size)
 
         # Border
-        pygame.draw.rect(screen, BLACK, self.rect, 2)
+        pygame.draw.rect(screen, BLACK, rect, 2)
 
-    def _draw_barracks(self, screen):
+    def _draw_barracks(self, screen, rect):
         """Draw military barracks building"""
         # Main building (olive drab)
         building_color = (107, 98, 71)
-        pygame.draw.rect(screen, building_color, self.rect)
+        pygame.draw.rect(screen, building_color, rect)
 
         # Roof (darker)
-        roof_rect = pygame.Rect(self.rect.x - 3, self.rect.y - 3, self.rect.width + 6, self.rect.height // 5)
+        roof_rect = pygame.Rect(rect.x - 3, rect.y - 3, rect.width + 6, rect.height // 5)
         pygame.draw.rect(screen, (70, 65, 50), roof_rect)
 
         # Windows (small dark rectangles)
@@ -273,61 +890,61 @@ class Obstacle:
         # Draw 2x2 grid of windows
         for row in range(2):
             for col in range(2):
-                window_x = self.rect.x + (col + 1) * (self.width // 3) - window_width // 2
-                window_y = self.rect.y + (row + 1) * (self.height // 3) - window_height // 2
+                window_x = rect.x + (col + 1) * (self.width // 3) - window_width // 2
+                window_y = rect.y + (row + 1) * (self.height // 3) - window_height // 2
                 pygame.draw.rect(screen, window_color, (window_x, window_y, window_width, window_height))
 
         # Door (brown rectangle at bottom center)
         door_width = self.width // 4
         door_height = self.height // 3
-        door_x = self.rect.x + (self.width - door_width) // 2
-        door_y = self.rect.y + self.height - door_height - 2
+        door_x = rect.x + (self.width - door_width) // 2
+        door_y = rect.y + self.height - door_height - 2
         pygame.draw.rect(screen, (60, 40, 20), (door_x, door_y, door_width, door_height))
 
         # Border
-        pygame.draw.rect(screen, BLACK, self.rect, 2)
+        pygame.draw.rect(screen, BLACK, rect, 2)
 
-    def _draw_watchtower(self, screen):
+    def _draw_watchtower(self, screen, rect):
         """Draw a military watchtower"""
         # Base/legs (dark brown)
         base_color = (70, 50, 30)
         base_width = self.width // 2
-        base_x = self.rect.x + (self.width - base_width) // 2
-        base_rect = pygame.Rect(base_x, self.rect.y + self.height // 2, base_width, self.height // 2)
+        base_x = rect.x + (self.width - base_width) // 2
+        base_rect = pygame.Rect(base_x, rect.y + self.height // 2, base_width, self.height // 2)
         pygame.draw.rect(screen, base_color, base_rect)
 
         # Tower platform (gray)
         platform_color = (90, 90, 90)
         platform_height = self.height // 2
-        platform_rect = pygame.Rect(self.rect.x, self.rect.y, self.rect.width, platform_height)
+        platform_rect = pygame.Rect(rect.x, rect.y, rect.width, platform_height)
         pygame.draw.rect(screen, platform_color, platform_rect)
 
         # Railing (white lines)
-        pygame.draw.rect(screen, WHITE, (self.rect.x, self.rect.y + platform_height - 3, self.rect.width, 2))
+        pygame.draw.rect(screen, WHITE, (rect.x, rect.y + platform_height - 3, rect.width, 2))
 
         # Observation window
         window_size = min(self.width // 3, self.height // 4)
-        window_x = self.rect.x + (self.width - window_size) // 2
-        window_y = self.rect.y + platform_height // 3
+        window_x = rect.x + (self.width - window_size) // 2
+        window_y = rect.y + platform_height // 3
         pygame.draw.rect(screen, BLACK, (window_x, window_y, window_size, window_size))
 
         # Support beams
         beam_width = 3
-        pygame.draw.rect(screen, base_color, (base_x + 2, self.rect.y + platform_height, beam_width, self.height // 2))
-        pygame.draw.rect(screen, base_color, (base_x + base_width - beam_width - 2, self.rect.y + platform_height, beam_width, self.height // 2))
+        pygame.draw.rect(screen, base_color, (base_x + 2, rect.y + platform_height, beam_width, self.height // 2))
+        pygame.draw.rect(screen, base_color, (base_x + base_width - beam_width - 2, rect.y + platform_height, beam_width, self.height // 2))
 
         # Border
-        pygame.draw.rect(screen, BLACK, self.rect, 2)
+        pygame.draw.rect(screen, BLACK, rect, 2)
 
-    def _draw_satellite(self, screen):
+    def _draw_satellite(self, screen, rect):
         """Draw a satellite dish installation"""
         # Base platform (gray)
         platform_color = (100, 100, 100)
-        pygame.draw.rect(screen, platform_color, self.rect)
+        pygame.draw.rect(screen, platform_color, rect)
 
         # Control box (darker gray box at bottom)
         box_height = self.height // 3
-        box_rect = pygame.Rect(self.rect.x + 5, self.rect.y + self.height - box_height - 5,
+        box_rect = pygame.Rect(rect.x + 5, rect.y + self.height - box_height - 5,
                               self.width // 3, box_height)
         pygame.draw.rect(screen, (60, 60, 60), box_rect)
 
@@ -337,8 +954,8 @@ class Obstacle:
 
         # Satellite dish (white/light gray circle)
         dish_radius = min(self.width, self.height) // 3
-        dish_center_x = self.rect.x + self.width - dish_radius - 10
-        dish_center_y = self.rect.y + dish_radius + 10
+        dish_center_x = rect.x + self.width - dish_radius - 10
+        dish_center_y = rect.y + dish_radius + 10
 
         # Dish outer rim
         pygame.draw.circle(screen, (200, 200, 200), (dish_center_x, dish_center_y), dish_radius)
@@ -354,13 +971,13 @@ class Obstacle:
                          pole_width, self.height // 3))
 
         # Border
-        pygame.draw.rect(screen, BLACK, self.rect, 2)
+        pygame.draw.rect(screen, BLACK, rect, 2)
 
-    def _draw_supply_depot(self, screen):
+    def _draw_supply_depot(self, screen, rect):
         """Draw a military supply depot with crates"""
         # Main depot (tan/brown)
         depot_color = (120, 100, 70)
-        pygame.draw.rect(screen, depot_color, self.rect)
+        pygame.draw.rect(screen, depot_color, rect)
 
         # Crates stacked (darker brown rectangles)
         crate_color = (80, 60, 40)
@@ -369,8 +986,8 @@ class Obstacle:
         # Draw grid of crates
         for row in range(2):
             for col in range(2):
-                crate_x = self.rect.x + col * (self.width // 2) + 10
-                crate_y = self.rect.y + row * (self.height // 2) + 10
+                crate_x = rect.x + col * (self.width // 2) + 10
+                crate_y = rect.y + row * (self.height // 2) + 10
                 crate_rect = pygame.Rect(crate_x, crate_y, crate_size, crate_size)
                 pygame.draw.rect(screen, crate_color, crate_rect)
                 pygame.draw.rect(screen, BLACK, crate_rect, 1)
@@ -386,88 +1003,338 @@ class Obstacle:
         # Warning stripes (yellow and black)
         stripe_width = 5
         for i in range(0, self.width, stripe_width * 2):
-            pygame.draw.rect(screen, YELLOW, (self.rect.x + i, self.rect.y, stripe_width, 3))
+            pygame.draw.rect(screen, YELLOW, (rect.x + i, rect.y, stripe_width, 3))
 
         # Border
-        pygame.draw.rect(screen, BLACK, self.rect, 2)
+        pygame.draw.rect(screen, BLACK, rect, 2)
 
     def get_rect(self):
         return self.rect
 
-class Missile:
-    def __init__(self, x, y, angle, speed, max_distance, is_player=True, player_owner=None):
-        self.x = x
-        self.y = y
-        self.angle = angle
-        self.speed = speed
-        self.max_distance = max_distance
-        self.distance_traveled = 0
-        self.is_player = is_player
-        self.radius = 5
-        self.player_owner = player_owner  # Track which player fired this missile
-        self.owner_tank = player_owner  # For tracking enemy tank owners too
-        
-    def update(self):
-        # Move missile
-        self.x += math.cos(self.angle) * self.speed
-        self.y += math.sin(self.angle) * self.speed
-        self.distance_traveled += self.speed
-        
-        # Check if missile should be removed
-        return self.distance_traveled >= self.max_distance or \
-               self.x < 0 or self.x > SCREEN_WIDTH or \
-               self.y < 0 or self.y > SCREEN_HEIGHT
-    
-    def draw(self, screen):
-        color = BLUE if self.is_player else RED
-        pygame.draw.circle(screen, color, (int(self.x), int(self.y)), self.radius)
-    
-    def get_rect(self):
-        return pygame.Rect(self.x - self.radius, self.y - self.radius, 
-                          self.radius * 2, self.radius * 2)
+class Archetype:
+    """Entities that share one set of components, stored as one list per component.
+
+    Row i of every column belongs to the same entity, so systems loop over
+    the columns instead of calling a method on one object per entity.
+    Removal is deferred: kill() marks a row and compact() drops the marked
+    rows in a single pass that keeps the survivors in spawn order.
+    """
+    def __init__(self, name, components):
+        self.name = name
+        self.columns = {component: [] for component in ('id',) + tuple(components)}
+        self.ids = self.columns['id']
+        self.dead = set()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, entity_id, values):
+        for component, column in self.columns.items():
+            column.append(entity_id if component == 'id' else values[component])
+
+    def kill(self, row):
+        self.dead.add(row)
+
+    def row(self, entity_id):
+        """Row of a live entity, or None. Ids only grow and compact() keeps
+        spawn order, so the id column is sorted and a bisect finds the row."""
+        row = bisect.bisect_left(self.ids, entity_id)
+        if row < len(self.ids) and self.ids[row] == entity_id and row not in self.dead:
+            return row
+        return None
 
-class HomingMissile(Missile):
-    def __init__(self, x, y, angle, speed, max_distance, target_enemies, player_owner=None):
-        super().__init__(x, y, angle, speed, max_distance, True, player_owner)
-        self.target_enemies = target_enemies
-        self.target = None
-        
-    def update(self):
-        # Find nearest enemy if no target or target is dead
-        if not self.target or self.target not in self.target_enemies:
-            if self.target_enemies:
-                self.target = min(self.target_enemies, key=lambda e: 
-                    math.sqrt((e.x - self.x)**2 + (e.y - self.y)**2))
-        
-        # Home in on target
-        if self.target:
-            dx = self.target.x - self.x
-            dy = self.target.y - self.y
-            target_angle = math.atan2(dy, dx)
-            
-            # Turn towards target
-            angle_diff = target_angle - self.angle
-            while angle_diff > math.pi:
-                angle_diff -= 2 * math.pi
-            while angle_diff < -math.pi:
-                angle_diff += 2 * math.pi
-            
-            # Apply turning
-            if abs(angle_diff) > POWERUP_VARS['homing_turn_speed']:
-                if angle_diff > 0:
-                    self.angle += POWERUP_VARS['homing_turn_speed']
-                else:
-                    self.angle -= POWERUP_VARS['homing_turn_speed']
-            else:
-                self.angle = target_angle
-        
-        # Regular missile update
-        return super().update()
-    
-    def draw(self, screen):
-        # Draw as yellow missile with trail
-        pygame.draw.circle(screen, YELLOW, (int(self.x), int(self.y)), self.radius + 1)
-        pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), self.radius)
+    def compact(self):
+        if not self.dead:
+            return
+        keep = [row for row in range(len(self.ids)) if row not in self.dead]
+        for column in self.columns.values():
+            column[:] = [column[row] for row in keep]
+        self.dead.clear()
+
+    def clear(self):
+        for column in self.columns.values():
+            column.clear()
+        self.dead.clear()
+
+class World:
+    """Hands out stable entity ids and owns the archetypes their components live in"""
+    def __init__(self):
+        self.archetypes = {}
+        self.last_id = 0
+
+    def add_archetype(self, name, components):
+        self.archetypes[name] = Archetype(name, components)
+        return self.archetypes[name]
+
+    def allocate(self):
+        """A new entity id, never handed out before; also used for tanks, which live outside the archetypes"""
+        self.last_id += 1
+        return self.last_id
+
+    def spawn(self, archetype, **values):
+        entity_id = self.allocate()
+        self.archetypes[archetype].add(entity_id, values)
+        return entity_id
+
+    def compact(self):
+        for archetype in self.archetypes.values():
+            archetype.compact()
+
+    def clear(self):
+        for archetype in self.archetypes.values():
+            archetype.clear()
+
+# Shots (missiles) are the most numerous entities, so they live in archetypes.
+# owner is the entity id of the tank that fired; target is the entity id of the
+# tank a homing shot is steering at. Ids are never reused, unlike id() of a tank.
+SHOT_COMPONENTS = ('x', 'y', 'prev_x', 'prev_y', 'angle', 'speed', 'max_distance', 'traveled',
+                   'owner', 'homing', 'target', 'blocked_at')
+SHOT_RADIUS = 5
+
+def shot_sweep(prev_x, prev_y, x, y, rect):
+    """Fraction of a shot's last move at which it first overlaps rect, or None.
+
+    The shot's square is swept from its previous position, so fast shots
+    (or low tick rates) can't skip over thin obstacles and tanks.
+    """
+    t_enter, t_exit = 0.0, 1.0
+    for start, end, low, high in ((prev_x, x, rect.left, rect.right), (prev_y, y, rect.top, rect.bottom)):
+        low -= SHOT_RADIUS
+        high += SHOT_RADIUS
+        delta = end - start
+        if delta == 0:
+            if not low < start < high:
+                return None
+            continue
+        t0 = (low - start) / delta
+        t1 = (high - start) / delta
+        if t0 > t1:
+            t0, t1 = t1, t0
+        t_enter = max(t_enter, t0)
+        t_exit = min(t_exit, t1)
+        if t_enter >= t_exit:
+            return None
+    return t_enter
+
+def shot_first_hit(prev_x, prev_y, x, y, targets):
+    """Return (fraction, target) for the first of targets' (rect, target) pairs along a shot's last move"""
+    best = None
+    # Bounds of the swept square, to skip targets nowhere near the path cheaply
+    left = min(prev_x, x) - SHOT_RADIUS
+    right = max(prev_x, x) + SHOT_RADIUS
+    top = min(prev_y, y) - SHOT_RADIUS
+    bottom = max(prev_y, y) + SHOT_RADIUS
+    for rect, target in targets:
+        if rect.right <= left or rect.left >= right or rect.bottom <= top or rect.top >= bottom:
+            continue
+        t = shot_sweep(prev_x, prev_y, x, y, rect)
+        if t is not None and (best is None or t < best[0]):
+            best = (t, target)
+    return best
+
+def steer_homing_shots(shots, enemies):
+    """Turn homing shots towards the nearest enemy, keeping a target until it's gone"""
+    columns = shots.columns
+    homing, targets, xs, ys, angles = (columns[name] for name in ('homing', 'target', 'x', 'y', 'angle'))
+    alive = {enemy.entity_id: enemy for enemy in enemies}
+    turn_speed = POWERUP_VARS['homing_turn_speed']
+    for row in range(len(shots)):
+        if not homing[row]:
+            continue
+        x, y = xs[row], ys[row]
+        target = alive.get(targets[row])
+        if target is None and enemies:
+            target = min(enemies, key=lambda e: math.sqrt((e.x - x)**2 + (e.y - y)**2))
+            targets[row] = target.entity_id
+        if target is None:
+            continue
+        target_angle = math.atan2(target.y - y, target.x - x)
+        angle = angles[row]
+        angle_diff = target_angle - angle
+        while angle_diff > math.pi:
+            angle_diff -= 2 * math.pi
+        while angle_diff < -math.pi:
+            angle_diff += 2 * math.pi
+        if abs(angle_diff) > turn_speed:
+            angles[row] = angle + turn_speed if angle_diff > 0 else angle - turn_speed
+        else:
+            angles[row] = target_angle
+
+def move_shots(shots):
+    """Advance every shot; end_shots removes the spent ones after the collision checks"""
+    columns = shots.columns
+    xs, ys, prev_xs, prev_ys, angles, speeds, traveled = (
+        columns[name] for name in ('x', 'y', 'prev_x', 'prev_y', 'angle', 'speed', 'traveled'))
+    for row in range(len(shots)):
+        x, y, speed, angle = xs[row], ys[row], speeds[row], angles[row]
+        prev_xs[row] = x
+        prev_ys[row] = y
+        x += math.cos(angle) * speed
+        y += math.sin(angle) * speed
+        xs[row] = x
+        ys[row] = y
+        traveled[row] += speed
+
+def block_shots(shots, obstacles):
+    """Record how far along its last move each shot reached an obstacle (None if it didn't)"""
+    columns = shots.columns
+    targets = [(obstacle.rect, obstacle) for obstacle in obstacles]
+    blocked = columns['blocked_at']
+    for row, (prev_x, prev_y, x, y) in enumerate(zip(columns['prev_x'], columns['prev_y'],
+                                                     columns['x'], columns['y'])):
+        hit = shot_first_hit(prev_x, prev_y, x, y, targets)
+        blocked[row] = hit[0] if hit else None
+
+def shot_hits(shots, targets):
+    """Yield (target, owner id) for each shot that hits a target before any obstacle, killing the shot.
+
+    targets maps tank entity ids to (rect, tank); the caller may delete entries
+    between hits (a destroyed tank can't be hit by the next shot).
+    """
+    columns = shots.columns
+    for row, (prev_x, prev_y, x, y, blocked_at) in enumerate(zip(
+            columns['prev_x'], columns['prev_y'], columns['x'], columns['y'], columns['blocked_at'])):
+        hit = shot_first_hit(prev_x, prev_y, x, y, targets.values())
+        if hit is None or (blocked_at is not None and hit[0] > blocked_at):
+            continue
+        shots.kill(row)
+        yield hit[1], columns['owner'][row]
+
+def draw_shots(screen, shots, color, offset=(0, 0), view=None):
+    """Draw every shot in view; homing shots are yellow with a white core"""
+    columns = shots.columns
+    for x, y, homing in zip(columns['x'], columns['y'], columns['homing']):
+        if view is not None and not view.collidepoint(x, y):
+            continue
+        center = (int(x - offset[0]), int(y - offset[1]))
+        if homing:
+            pygame.draw.circle(screen, YELLOW, center, SHOT_RADIUS + 1)
+            pygame.draw.circle(screen, WHITE, center, SHOT_RADIUS)
+        else:
+            pygame.draw.circle(screen, color, center, SHOT_RADIUS)
+
+def end_shots(shots, arena):
+    """Kill the shots whose last move reached an obstacle, the end of their range or the arena's edge.
+
+    This runs after the hit checks, so a shot's final move can still hit a
+    tank before the shot is removed.
+    """
+    columns = shots.columns
+    for row, (x, y, traveled, max_distance, blocked_at) in enumerate(zip(
+            columns['x'], columns['y'], columns['traveled'], columns['max_distance'], columns['blocked_at'])):
+        if (blocked_at is not None or traveled >= max_distance
+                or (arena is not None and not arena.contains(x, y))):
+            shots.kill(row)
+
+# Effects and their particles come in bursts of dozens, so they are archetypes too.
+# A particle's effect is the id of the effect it belongs to. Particles are spawned
+# with their effect and compact() keeps spawn order, so each effect's particles
+# sit in consecutive rows, in the same order as the effects. timed_out is set by
+# the effect's expiry timer while particles are still flying.
+EFFECT_COMPONENTS = ('x', 'y', 'kind', 'start_time', 'timed_out')
+PARTICLE_COMPONENTS = ('effect', 'x', 'y', 'color', 'speed', 'angle', 'life', 'max_life', 'size')
+
+def spawn_effect(world, x, y, kind, particle_fraction=1.0):
+    """Add an 'explosion' or 'hit' effect and its particles to world, returning the effect's id"""
+    if kind == 'explosion':
+        count = EFFECT_VARS['particle_count'] * 2
+        speeds = (1, EFFECT_VARS['particle_speed'] * 2)
+        colors = [RED, ORANGE, YELLOW]
+        lives = (20, 40)
+    else:  # hit effect
+        count = EFFECT_VARS['particle_count']
+        speeds = (0.5, EFFECT_VARS['particle_speed'])
+        colors = [WHITE, YELLOW, ORANGE]
+        lives = (10, 20)
+    effect = world.spawn('effects', x=x, y=y, kind=kind, start_time=GAME_CLOCK.ticks(), timed_out=False)
+
+    # Every particle is still rolled so the shared random stream (and replays)
+    # don't depend on the quality level; only the kept ones are simulated and drawn
+    keep = count if particle_fraction >= 1.0 else max(1, round(count * particle_fraction))
+    for i in range(count):
+        angle = random.uniform(0, 2 * math.pi)
+        speed = random.uniform(*speeds)
+        color = random.choice(colors)
+        life = random.randint(*lives)
+        size = random.randint(2, 6)
+        if i < keep:
+            world.spawn('particles', effect=effect, x=x, y=y, color=color, speed=speed, angle=angle,
+                        life=life, max_life=life, size=size)
+    return effect
+
+def effect_duration(kind):
+    """How long an effect's flash lasts in ms; its particles may outlive it"""
+    return EFFECT_VARS['explosion_duration'] if kind == 'explosion' else EFFECT_VARS['hit_effect_duration']
+
+def has_particles(particles, effect):
+    owners = particles.columns['effect']
+    row = bisect.bisect_left(owners, effect)
+    return row < len(owners) and owners[row] == effect
+
+def expire_effect(effects, particles, effect):
+    """Timer callback at an effect's end time: remove it, or leave it to go with its last particle"""
+    row = effects.row(effect)
+    if row is None:
+        return
+    if has_particles(particles, effect):
+        effects.columns['timed_out'][row] = True
+    else:
+        effects.kill(row)
+        effects.compact()
+
+def update_effects(effects, particles):
+    """Move and age every particle, removing timed out effects whose last particle just died"""
+    columns = particles.columns
+    owners, xs, ys, speeds, angles, lives = (
+        columns[name] for name in ('effect', 'x', 'y', 'speed', 'angle', 'life'))
+    emptied = []  # Effects that lost particles this tick, in effect order
+    for row in range(len(particles)):
+        speed, angle = speeds[row], angles[row]
+        xs[row] += math.cos(angle) * speed
+        ys[row] += math.sin(angle) * speed
+        lives[row] -= 1
+        speeds[row] = speed * 0.98  # Slow down over time
+        if lives[row] <= 0:
+            particles.kill(row)
+            if not emptied or emptied[-1] != owners[row]:
+                emptied.append(owners[row])
+    particles.compact()
+
+    timed_out = effects.columns['timed_out']
+    for effect in emptied:
+        row = effects.row(effect)
+        if row is not None and timed_out[row] and not has_particles(particles, effect):
+            effects.kill(row)
+    effects.compact()
+
+def draw_effects(screen, effects, particles, rings=3, offset=(0, 0), view=None):
+    """Draw each effect whose origin is in view: its explosion frame, then its particles"""
+    columns = particles.columns
+    owners, xs, ys, colors, lives, max_lives, sizes = (
+        columns[name] for name in ('effect', 'x', 'y', 'color', 'life', 'max_life', 'size'))
+    count = len(particles)
+    now = GAME_CLOCK.ticks()
+    row = 0
+    columns = effects.columns
+    for effect, x, y, kind, start_time in zip(effects.ids, columns['x'], columns['y'],
+                                              columns['kind'], columns['start_time']):
+        first = row
+        while row < count and owners[row] == effect:
+            row += 1
+        if view is not None and not view.collidepoint(x, y):
+            continue
+
+        if kind == 'explosion':
+            # Expanding explosion circles, one pre-rendered frame per blit
+            frame = FLIPBOOKS.explosion(EFFECT_VARS['explosion_max_size'], rings).frame(now - start_time)
+            if frame is not None:
+                half = frame.get_width() // 2
+                screen.blit(frame, (int(x - offset[0]) - half, int(y - offset[1]) - half))
+
+        for i in range(first, row):
+            size = int(sizes[i] * (lives[i] / max_lives[i]))
+            if size > 0:
+                pygame.draw.circle(screen, colors[i], (int(xs[i] - offset[0]), int(ys[i] - offset[1])), size)
 
 class Powerup:
     def __init__(self, x, y, powerup_type):
@@ -489,25 +1356,37 @@ class Powerup:
     def update(self):
         self.pulse_timer += 0.1
     
-    def draw(self, screen):
+    def draw(self, screen, offset=(0, 0)):
         # Pulsing effect
         pulse_size = self.size + int(math.sin(self.pulse_timer) * 5)
         color = self.colors.get(self.powerup_type, WHITE)
+        center = (int(self.x - offset[0]), int(self.y - offset[1]))
         
         # Draw powerup
-        pygame.draw.circle(screen, color, (int(self.x), int(self.y)), pulse_size)
-        pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), pulse_size, 3)
+        pygame.draw.circle(screen, color, center, pulse_size)
+        pygame.draw.circle(screen, WHITE, center, pulse_size, 3)
         
         # Draw symbol
         font = pygame.font.Font(None, 24)
         symbol = self.powerup_type[0].upper()
         text = font.render(symbol, True, BLACK)
-        text_rect = text.get_rect(center=(int(self.x), int(self.y)))
+        text_rect = text.get_rect(center=center)
         screen.blit(text, text_rect)
     
     def get_rect(self):
         return pygame.Rect(self.x - self.size, self.y - self.size, self.size * 2, self.size * 2)
 
+def powerup_pickups(powerups, players):
+    """Yield (powerup, player) for each powerup a player is touching, removing it from powerups"""
+    player_rects = [(player.get_rect(), player) for player in players]
+    for powerup in powerups[:]:
+        rect = powerup.get_rect()
+        for player_rect, player in player_rects:
+            if rect.colliderect(player_rect):
+                powerups.remove(powerup)
+                yield powerup, player
+                break
+
 class TrackTrail:
     def __init__(self, tank):
         self.tank = tank
@@ -566,11 +1445,18 @@ class TrackTrail:
         self.trail_points = valid_points
         self.last_position = current_pos
     
-    def draw(self, screen):
-        # Draw track marks for each trail point
+    def draw(self, screen, offset=(0, 0), view=None, detail=2):
+        # Draw track marks for each trail point; view (world rect) skips marks off screen.
+        # detail 2 draws cleats and rivets, 1 plain pads, 0 plain pads on every other point
         for i, (x, y, angle, alpha) in enumerate(self.trail_points):
             if alpha <= 0:
                 continue
+            if detail == 0 and i % 2:
+                continue
+            if view is not None and not view.collidepoint(x, y):
+                continue
+            x -= offset[0]
+            y -= offset[1]
             
             # Calculate track color based on fade
             if self.tank.is_player:
@@ -598,16 +1484,18 @@ class TrackTrail:
             right_y = y - math.sin(perp_angle) * track_offset
             
             # Draw realistic tank track patterns
-            self._draw_tank_track_pattern(screen, left_x, left_y, angle, faded_color, alpha)
-            self._draw_tank_track_pattern(screen, right_x, right_y, angle, faded_color, alpha)
+            self._draw_tank_track_pattern(screen, left_x, left_y, angle, faded_color, alpha, detail)
+            self._draw_tank_track_pattern(screen, right_x, right_y, angle, faded_color, alpha, detail)
     
-    def _draw_tank_track_pattern(self, screen, x, y, angle, color, alpha):
+    def _draw_tank_track_pattern(self, screen, x, y, angle, color, alpha, detail=2):
         # Draw individual track pads that look like real tank treads
         track_pad_length = 10
         track_pad_width = 6
         
         # Main track pad (rectangular)
         self._draw_rotated_rect(screen, x, y, angle, track_pad_length, track_pad_width, color)
+        if detail < 2:
+            return
         
         # Add track cleats (the grippy parts) - small perpendicular lines
         if alpha > 0.3:  # Only draw details on more visible tracks
@@ -661,13 +1549,51 @@ class TrackTrail:
         if len(rotated_corners) >= 3:
             pygame.draw.polygon(screen, color, rotated_corners)
 
+ENEMY_UPGRADE_TYPES = ('movement_speed', 'shot_speed', 'shot_distance', 'health', 'damage')
+
+class EnemyProfile:
+    """Stats every enemy shares: ENEMY_VARS scaled by the global upgrade multipliers.
+
+    Enemies reference the game's one profile instead of carrying copies, so
+    an upgrade updates a single object and a spawn just points at it.
+    version counts the changes.
+    """
+    def __init__(self, multipliers=None):
+        self.multipliers = dict.fromkeys(ENEMY_UPGRADE_TYPES, 1.0)
+        self.multipliers.update(multipliers or {})
+        self.version = 0
+        self._derive()
+
+    def _derive(self):
+        multipliers = self.multipliers
+        self.movement_speed = ENEMY_VARS['movement_speed'] * multipliers['movement_speed']
+        self.shot_speed = ENEMY_VARS['shot_speed'] * multipliers['shot_speed']
+        self.shot_distance = ENEMY_VARS['shot_distance'] * multipliers['shot_distance']
+        self.max_health = int(ENEMY_VARS['max_health'] * multipliers['health'])
+        self.damage = int(ENEMY_VARS['base_damage'] * multipliers['damage'])
+
+    def upgrade(self, upgrade_type, multiplier):
+        self.multipliers[upgrade_type] *= multiplier
+        self.version += 1
+        self._derive()
+
+    def set_multipliers(self, multipliers):
+        """Take multipliers from elsewhere (a netplay snapshot), re-deriving only if they changed"""
+        if multipliers != self.multipliers:
+            self.multipliers = dict(multipliers)
+            self.version += 1
+            self._derive()
+
 class Tank:
-    def __init__(self, x, y, is_player=True, player_num=1):
+    def __init__(self, x, y, is_player=True, player_num=1, arena=None, timers=None):
         self.x = x
         self.y = y
         self.angle = 0
         self.is_player = is_player
         self.player_num = player_num
+        self.arena = arena  # Playfield bounds; None leaves the tank unbounded
+        self.timers = timers  # Game's TimerQueue, which ends timed powerups
+        self.entity_id = None  # Allocated from the game's World; shots name their owner and target by it
         
         # Use appropriate variables based on tank type
         vars_dict = PLAYER_VARS if is_player else ENEMY_VARS
@@ -677,16 +1603,16 @@ class Tank:
         self.base_powerup_duration = vars_dict['powerup_duration']
         
         # Current stats (modified by leveling)
-        self.movement_speed = self.base_movement_speed
-        self.shot_speed = self.base_shot_speed
         self.fire_rate = self.base_fire_rate
         self.powerup_duration = self.base_powerup_duration
-        
         self.base_shot_distance = vars_dict['shot_distance']
-        self.shot_distance = self.base_shot_distance
-        
         self.base_max_health = vars_dict['max_health']
-        self.max_health = self.base_max_health
+        if is_player:
+            # An EnemyTank reads these from the shared EnemyProfile instead
+            self.movement_speed = self.base_movement_speed
+            self.shot_speed = self.base_shot_speed
+            self.shot_distance = self.base_shot_distance
+            self.max_health = self.base_max_health
         self.tank_size = vars_dict['tank_size']
         self.barrel_length = vars_dict['barrel_length']
         self.barrel_width = vars_dict['barrel_width']
@@ -695,18 +1621,6 @@ class Tank:
         self.last_shot = 0
         self.target = None  # For enemy AI
 
-        # Enemy upgrade tracking (only for enemies)
-        if not is_player:
-            self.base_damage = ENEMY_VARS['base_damage']
-            self.damage = self.base_damage
-            self.upgrade_multipliers = {
-                'movement_speed': 1.0,
-                'shot_speed': 1.0,
-                'shot_distance': 1.0,
-                'health': 1.0,
-                'damage': 1.0
-            }
-        
         # Leveling system (only for players)
         if is_player:
             self.level = 1
@@ -765,8 +1679,10 @@ class Tank:
         self.angle += 0.05  # Reduced from 0.1 to 0.05 (half speed)
     
     def _keep_in_bounds(self):
-        self.x = max(self.tank_size[0]//2, min(SCREEN_WIDTH - self.tank_size[0]//2, self.x))
-        self.y = max(self.tank_size[1]//2, min(SCREEN_HEIGHT - self.tank_size[1]//2, self.y))
+        if self.arena is None:
+            return
+        self.x = max(self.tank_size[0]//2, min(self.arena.width - self.tank_size[0]//2, self.x))
+        self.y = max(self.tank_size[1]//2, min(self.arena.height - self.tank_size[1]//2, self.y))
     
     def check_obstacle_collision(self, obstacles, new_x=None, new_y=None):
         # Check if moving to new position would collide with obstacles
@@ -786,12 +1702,16 @@ class Tank:
         if self.is_player and 'rapid_fire' in self.powerup_shots_remaining:
             fire_rate = self.fire_rate // 4  # 4x faster
         
-        return pygame.time.get_ticks() - self.last_shot > fire_rate
+        return GAME_CLOCK.ticks() - self.last_shot > fire_rate
     
-    def shoot(self, enemies=None):
+    def shoot(self):
+        """Fire if the cooldown allows, returning the shots as (x, y, angle, homing) tuples.
+
+        The shots are spawned into the game's world by Game.add_shots.
+        """
         if self.can_shoot():
-            self.last_shot = pygame.time.get_ticks()
-            missiles = []
+            self.last_shot = GAME_CLOCK.ticks()
+            shots = []
             
             # Calculate missile start position at end of barrel
             barrel_end_x = self.x + math.cos(self.angle) * self.barrel_length
@@ -804,23 +1724,16 @@ class Tank:
                     self.powerup_shots_remaining['shotgun'] -= 1
                     for i in range(POWERUP_VARS['shotgun_pellets']):
                         spread = (i - POWERUP_VARS['shotgun_pellets']//2) * (POWERUP_VARS['shotgun_spread'] / POWERUP_VARS['shotgun_pellets'])
-                        pellet_angle = self.angle + spread
-                        missile = Missile(barrel_end_x, barrel_end_y, pellet_angle, 
-                                        self.shot_speed, self.shot_distance, True, self)
-                        missiles.append(missile)
+                        shots.append((barrel_end_x, barrel_end_y, self.angle + spread, False))
                 
                 elif 'homing' in self.powerup_shots_remaining and self.powerup_shots_remaining['homing'] > 0:
                     # Homing missile
                     self.powerup_shots_remaining['homing'] -= 1
-                    missile = HomingMissile(barrel_end_x, barrel_end_y, self.angle, 
-                                          self.shot_speed, self.shot_distance, enemies or [], self)
-                    missiles.append(missile)
+                    shots.append((barrel_end_x, barrel_end_y, self.angle, True))
                 
                 else:
                     # Regular shot
-                    missile = Missile(barrel_end_x, barrel_end_y, self.angle, 
-                                    self.shot_speed, self.shot_distance, True, self)
-                    missiles.append(missile)
+                    shots.append((barrel_end_x, barrel_end_y, self.angle, False))
                     
                     # Consume rapid fire shot if active
                     if 'rapid_fire' in self.powerup_shots_remaining:
@@ -832,12 +1745,9 @@ class Tank:
                 self.powerup_shots_remaining = {k: v for k, v in self.powerup_shots_remaining.items() if v > 0}
             else:
                 # Enemy regular shot
-                missile = Missile(barrel_end_x, barrel_end_y, self.angle, 
-                                self.shot_speed, self.shot_distance, False, None)
-                missile.owner_tank = self  # Track which enemy fired this
-                missiles.append(missile)
+                shots.append((barrel_end_x, barrel_end_y, self.angle, False))
             
-            return missiles
+            return shots
         return []    
     def take_damage(self, damage=10):
         # Shield blocks damage
@@ -847,7 +1757,9 @@ class Tank:
         self.health -= damage
         return self.health <= 0
 
-    def draw(self, screen):
+    def draw(self, screen, offset=(0, 0)):
+            x, y = self.x - offset[0], self.y - offset[1]
+
             # Choose color based on tank type
             if self.is_player:
                 color = DARK_TAN
@@ -871,7 +1783,7 @@ class Tank:
             for corner_x, corner_y in corners:
                 rotated_x = corner_x * math.cos(self.angle) - corner_y * math.sin(self.angle)
                 rotated_y = corner_x * math.sin(self.angle) + corner_y * math.cos(self.angle)
-                rotated_corners.append((self.x + rotated_x, self.y + rotated_y))
+                rotated_corners.append((x + rotated_x, y + rotated_y))
         
             # Draw tank body
             pygame.draw.polygon(screen, color, rotated_corners)
@@ -880,14 +1792,14 @@ class Tank:
             # Draw shield effect if active
             if self.is_player and self.shield_active:
                 shield_radius = max(self.tank_size) + 10
-                pygame.draw.circle(screen, BLUE, (int(self.x), int(self.y)), shield_radius, 3)
+                pygame.draw.circle(screen, BLUE, (int(x), int(y)), shield_radius, 3)
                 # Pulsing effect
-                pulse = int(math.sin(pygame.time.get_ticks() * 0.01) * 5)
-                pygame.draw.circle(screen, (100, 150, 255), (int(self.x), int(self.y)), shield_radius + pulse, 1)
+                pulse = int(math.sin(GAME_CLOCK.ticks() * 0.01) * 5)
+                pygame.draw.circle(screen, (100, 150, 255), (int(x), int(y)), shield_radius + pulse, 1)
         
             # Draw barrel
-            barrel_end_x = self.x + math.cos(self.angle) * self.barrel_length
-            barrel_end_y = self.y + math.sin(self.angle) * self.barrel_length
+            barrel_end_x = x + math.cos(self.angle) * self.barrel_length
+            barrel_end_y = y + math.sin(self.angle) * self.barrel_length
         
             # Calculate barrel rectangle
             barrel_corners = []
@@ -904,21 +1816,21 @@ class Tank:
             for corner_x, corner_y in barrel_local_corners:
                 rotated_x = corner_x * math.cos(self.angle) - corner_y * math.sin(self.angle)
                 rotated_y = corner_x * math.sin(self.angle) + corner_y * math.cos(self.angle)
-                barrel_corners.append((self.x + rotated_x, self.y + rotated_y))
+                barrel_corners.append((x + rotated_x, y + rotated_y))
         
             pygame.draw.polygon(screen, color, barrel_corners)
             pygame.draw.polygon(screen, WHITE, barrel_corners, 1)
 
             # Draw health bar
-            self.draw_health_bar(screen)
+            self.draw_health_bar(screen, offset)
 
             # Draw ammo indicator for players
             if self.is_player:
-                self.draw_ammo_indicator(screen)
+                self.draw_ammo_indicator(screen, offset)
     
-    def draw_health_bar(self, screen):
-        bar_x = self.x - GAME_VARS['health_bar_width'] // 2
-        bar_y = self.y - self.tank_size[1] - 15
+    def draw_health_bar(self, screen, offset=(0, 0)):
+        bar_x = self.x - offset[0] - GAME_VARS['health_bar_width'] // 2
+        bar_y = self.y - offset[1] - self.tank_size[1] - 15
 
         # Background
         pygame.draw.rect(screen, RED, (bar_x, bar_y, GAME_VARS['health_bar_width'], GAME_VARS['health_bar_height']))
@@ -931,7 +1843,7 @@ class Tank:
         # Border
         pygame.draw.rect(screen, WHITE, (bar_x, bar_y, GAME_VARS['health_bar_width'], GAME_VARS['health_bar_height']), 1)
 
-    def draw_ammo_indicator(self, screen):
+    def draw_ammo_indicator(self, screen, offset=(0, 0)):
         """Draw ammo count indicator below the player tank with militaristic styling"""
         if not self.is_player:
             return
@@ -943,13 +1855,14 @@ class Tank:
         total_special_ammo = sum(self.powerup_shots_remaining.values())
 
         # Position below the tank
-        indicator_y = self.y + self.tank_size[1] + 15
+        x = self.x - offset[0]
+        indicator_y = self.y - offset[1] + self.tank_size[1] + 15
 
         if total_special_ammo > 0:
             # Draw background box with military styling
             box_width = 80
             box_height = 20
-            box_x = self.x - box_width // 2
+            box_x = x - box_width // 2
             box_y = indicator_y
 
             # Dark background with yellow/black warning stripes
@@ -985,7 +1898,7 @@ class Tank:
 
             # Draw ammo count text
             ammo_text = ammo_font.render(f"AMMO: {total_special_ammo}", True, text_color)
-            text_rect = ammo_text.get_rect(center=(self.x, indicator_y + box_height // 2))
+            text_rect = ammo_text.get_rect(center=(x, indicator_y + box_height // 2))
             screen.blit(ammo_text, text_rect)
 
             # Border
@@ -994,7 +1907,7 @@ class Tank:
             # Show "STANDARD" when no special ammo
             box_width = 90
             box_height = 20
-            box_x = self.x - box_width // 2
+            box_x = x - box_width // 2
             box_y = indicator_y
 
             # Dark gray background
@@ -1002,7 +1915,7 @@ class Tank:
 
             # Standard ammo text in white
             ammo_text = ammo_font.render("STANDARD", True, WHITE)
-            text_rect = ammo_text.get_rect(center=(self.x, indicator_y + box_height // 2))
+            text_rect = ammo_text.get_rect(center=(x, indicator_y + box_height // 2))
             screen.blit(ammo_text, text_rect)
 
             # White border
@@ -1113,16 +2026,20 @@ class Tank:
             if not self.is_player:
                 return
         
-            current_time = pygame.time.get_ticks()
+            current_time = GAME_CLOCK.ticks()
             duration = int(POWERUP_VARS['shield_base_duration'] * (1 + (self.powerup_upgrades * LEVELING_VARS['stat_increase_percent'] / 100)))
         
             if powerup_type == 'shield':
                 self.shield_active = True
                 self.active_powerups['shield'] = current_time + duration
+                if self.timers is not None:
+                    self.timers.schedule(current_time + duration, self.expire_powerup, 'shield')
         
             elif powerup_type == 'speed':
                 self.speed_boost_active = True
                 self.active_powerups['speed'] = current_time + duration
+                if self.timers is not None:
+                    self.timers.schedule(current_time + duration, self.expire_powerup, 'speed')
         
             elif powerup_type == 'rapid_fire':
                 # Replace any existing weapon powerup
@@ -1142,22 +2059,16 @@ class Tank:
                 shots = int(POWERUP_VARS['homing_shots'] * (1 + (self.powerup_upgrades * LEVELING_VARS['stat_increase_percent'] / 100)))
                 self.powerup_shots_remaining['homing'] = shots
     
-    def update_powerups(self):
-        """Update powerup timers"""
-        if not self.is_player:
+    def expire_powerup(self, powerup_type):
+        """Timer callback: end a timed powerup unless it was picked up again since"""
+        if self.active_powerups.get(powerup_type, float('inf')) > GAME_CLOCK.ticks():
             return
+        del self.active_powerups[powerup_type]
         
-        current_time = pygame.time.get_ticks()
-        
-        # Check timed powerups
-        for powerup_type in list(self.active_powerups.keys()):
-            if current_time >= self.active_powerups[powerup_type]:
-                del self.active_powerups[powerup_type]
-                
-                if powerup_type == 'shield':
-                    self.shield_active = False
-                elif powerup_type == 'speed':
-                    self.speed_boost_active = False
+        if powerup_type == 'shield':
+            self.shield_active = False
+        elif powerup_type == 'speed':
+            self.speed_boost_active = False
     
     def heal_to_full(self):
         """Restore full health"""
@@ -1393,6 +2304,61 @@ class Tank:
                     else:
                         self.turn_left()
 
+class EnemyTank(Tank):
+    """An enemy tank. Health, position and AI state are its own; the other stats come from its profile"""
+    movement_speed = property(lambda self: self.profile.movement_speed)
+    shot_speed = property(lambda self: self.profile.shot_speed)
+    shot_distance = property(lambda self: self.profile.shot_distance)
+    max_health = property(lambda self: self.profile.max_health)
+    damage = property(lambda self: self.profile.damage)
+
+    def __init__(self, x, y, profile, arena=None):
+        self.profile = profile
+        super().__init__(x, y, False, arena=arena)
+
+class OutlinedTextRenderer:
+    """Builds and caches text surfaces, optionally with a pixel art border"""
+    def __init__(self, border_size=2, max_entries=256):
+        self.border_size = border_size
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.surfaces = OrderedDict()  # (text, size, color, border_color) -> (surface, text_size)
+
+        # Square kernel used to dilate the glyph mask into the border
+        kernel_size = border_size * 2 + 1
+        self.kernel = pygame.mask.Mask((kernel_size, kernel_size), fill=True)
+
+    def get_font(self, size):
+        """Return a shared font for the given size"""
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+        return font
+
+    def render(self, text, size, color, border_color=None):
+        """Return (surface, text_size) for the text, building it on first use"""
+        key = (text, size, tuple(color), tuple(border_color) if border_color else None)
+        cached = self.surfaces.get(key)
+        if cached is not None:
+            self.surfaces.move_to_end(key)
+            return cached
+
+        text_surface = self.get_font(size).render(text, True, color)
+        if border_color is None:
+            cached = (text_surface, text_surface.get_size())
+        else:
+            # Dilate the glyph mask once instead of rendering the text at every border offset
+            border_mask = pygame.mask.from_surface(text_surface).convolve(self.kernel)
+            surface = border_mask.to_surface(setcolor=border_color, unsetcolor=(0, 0, 0, 0))
+            surface.blit(text_surface, (self.border_size, self.border_size))
+            cached = (surface, text_surface.get_size())
+
+        self.surfaces[key] = cached
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return cached
+
 class NameInputScreen:
     def __init__(self, screen, score, wave, level, is_coop=False):
         self.screen = screen
@@ -1400,6 +2366,7 @@ class NameInputScreen:
         self.wave = wave
         self.level = level
         self.is_coop = is_coop
+        self.screen_width, self.screen_height = screen.get_size()
         self.font_large = pygame.font.Font(None, 96)
         self.font_medium = pygame.font.Font(None, 64)
         self.font_small = pygame.font.Font(None, 48)
@@ -1413,6 +2380,8 @@ class NameInputScreen:
         self.keyboard_name = ""
         self.finished = False
         self.ok_selected = False
+        self.backdrop = None  # Cached background and static labels
+        self.backdrop_key = None
         
         # Detect controllers
         self.controllers = []
@@ -1484,68 +2453,103 @@ class NameInputScreen:
                         
         return None
     
-    def draw(self):
+    def get_background_image(self):
+        if hasattr(self, 'parent_game') and hasattr(self.parent_game, 'sand_image'):
+            return self.parent_game.sand_image
+        return None
+    
+    def build_backdrop(self):
+        """Compose the background, score summary and static input labels once"""
+        target = pygame.Surface(self.screen.get_size()).convert()
+        
         # Draw sand background if available, otherwise use sand color
-        if hasattr(self, 'parent_game') and hasattr(self.parent_game, 'sand_image') and self.parent_game.sand_image:
-            self.screen.blit(self.parent_game.sand_image, (0, 0))
+        background = self.get_background_image()
+        if background:
+            target.blit(background, (0, 0))
         else:
-            self.screen.fill(SAND_COLOR)
+            target.fill(SAND_COLOR)
         
         # Add dark overlay for better text visibility
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        overlay = pygame.Surface((self.screen_width, self.screen_height))
         overlay.set_alpha(150)
         overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        target.blit(overlay, (0, 0))
         
         # Title
         title_text = self.font_large.render("NEW HIGH SCORE!", True, YELLOW)
-        title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 200))
-        self.screen.blit(title_text, title_rect)
+        title_rect = title_text.get_rect(center=(self.screen_width // 2, 200))
+        target.blit(title_text, title_rect)
         
         # Mode indicator
         mode_text = self.font_medium.render(f"{'CO-OP' if self.is_coop else 'SINGLE PLAYER'} MODE", True, BLUE)
-        mode_rect = mode_text.get_rect(center=(SCREEN_WIDTH // 2, 270))
-        self.screen.blit(mode_text, mode_rect)
+        mode_rect = mode_text.get_rect(center=(self.screen_width // 2, 270))
+        target.blit(mode_text, mode_rect)
         
         # Score info
         score_text = self.font_medium.render(f"Score: {self.score:,}", True, WHITE)
-        score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, 350))
-        self.screen.blit(score_text, score_rect)
+        score_rect = score_text.get_rect(center=(self.screen_width // 2, 350))
+        target.blit(score_text, score_rect)
         
         wave_text = self.font_medium.render(f"Wave: {self.wave}", True, WHITE)
-        wave_rect = wave_text.get_rect(center=(SCREEN_WIDTH // 2, 410))
-        self.screen.blit(wave_text, wave_rect)
+        wave_rect = wave_text.get_rect(center=(self.screen_width // 2, 410))
+        target.blit(wave_text, wave_rect)
         
         level_text = self.font_medium.render(f"Level: {self.level}", True, WHITE)
-        level_rect = level_text.get_rect(center=(SCREEN_WIDTH // 2, 470))
-        self.screen.blit(level_text, level_rect)
+        level_rect = level_text.get_rect(center=(self.screen_width // 2, 470))
+        target.blit(level_text, level_rect)
         
         # Input method indicator
         if self.input_mode == "keyboard":
             prompt_text = self.font_medium.render("Enter your name:", True, WHITE)
-            prompt_rect = prompt_text.get_rect(center=(SCREEN_WIDTH // 2, 550))
-            self.screen.blit(prompt_text, prompt_rect)
+            prompt_rect = prompt_text.get_rect(center=(self.screen_width // 2, 550))
+            target.blit(prompt_text, prompt_rect)
+            
+            inst_text = self.font_small.render("Type your name and press ENTER", True, GRAY)
+            inst_rect = inst_text.get_rect(center=(self.screen_width // 2, 770))
+            target.blit(inst_text, inst_rect)
             
+        else:
+            # Controller mode - 3 letter input
+            prompt_text = self.font_medium.render("Enter your initials:", True, WHITE)
+            prompt_rect = prompt_text.get_rect(center=(self.screen_width // 2, 550))
+            target.blit(prompt_text, prompt_rect)
+            
+            # Instructions
+            instructions = [
+                "D-pad Up/Down: Change letter",
+                "D-pad Left/Right: Move cursor",
+                "A button: Confirm/Next",
+                "B button: Go back"
+            ]
+            
+            for i, inst in enumerate(instructions):
+                inst_text = self.font_small.render(inst, True, GRAY)
+                inst_rect = inst_text.get_rect(center=(self.screen_width // 2, 900 + i * 30))
+                target.blit(inst_text, inst_rect)
+        
+        return target
+    
+    def draw(self):
+        # Only switching input mode (or a late-loading background) rebuilds the backdrop
+        backdrop_key = (self.input_mode, id(self.get_background_image()))
+        if self.backdrop is None or self.backdrop_key != backdrop_key:
+            self.backdrop = self.build_backdrop()
+            self.backdrop_key = backdrop_key
+        self.screen.blit(self.backdrop, (0, 0))
+        
+        # Draw only the name being entered and the cursor on top
+        if self.input_mode == "keyboard":
             name_display = self.keyboard_name + "_" if len(self.keyboard_name) < 10 else self.keyboard_name
             name_text = self.font_large.render(name_display, True, BLUE)
-            name_rect = name_text.get_rect(center=(SCREEN_WIDTH // 2, 650))
+            name_rect = name_text.get_rect(center=(self.screen_width // 2, 650))
             
             box_rect = name_rect.inflate(40, 20)
             pygame.draw.rect(self.screen, WHITE, box_rect, 3)
             self.screen.blit(name_text, name_rect)
             
-            inst_text = self.font_small.render("Type your name and press ENTER", True, GRAY)
-            inst_rect = inst_text.get_rect(center=(SCREEN_WIDTH // 2, 770))
-            self.screen.blit(inst_text, inst_rect)
-            
         else:
-            # Controller mode - 3 letter input
-            prompt_text = self.font_medium.render("Enter your initials:", True, WHITE)
-            prompt_rect = prompt_text.get_rect(center=(SCREEN_WIDTH // 2, 550))
-            self.screen.blit(prompt_text, prompt_rect)
-            
             letter_spacing = 120
-            start_x = SCREEN_WIDTH // 2 - letter_spacing
+            start_x = self.screen_width // 2 - letter_spacing
             
             for i, letter in enumerate(self.name):
                 x = start_x + i * letter_spacing
@@ -1563,35 +2567,25 @@ class NameInputScreen:
             # OK button
             ok_color = YELLOW if self.ok_selected else WHITE
             ok_text = self.font_medium.render("OK", True, ok_color)
-            ok_rect = ok_text.get_rect(center=(SCREEN_WIDTH // 2, 800))
+            ok_rect = ok_text.get_rect(center=(self.screen_width // 2, 800))
             
             if self.ok_selected:
                 box_rect = ok_rect.inflate(40, 20)
                 pygame.draw.rect(self.screen, YELLOW, box_rect, 3)
             
             self.screen.blit(ok_text, ok_rect)
-            
-            # Instructions
-            instructions = [
-                "D-pad Up/Down: Change letter",
-                "D-pad Left/Right: Move cursor",
-                "A button: Confirm/Next",
-                "B button: Go back"
-            ]
-            
-            for i, inst in enumerate(instructions):
-                inst_text = self.font_small.render(inst, True, GRAY)
-                inst_rect = inst_text.get_rect(center=(SCREEN_WIDTH // 2, 900 + i * 30))
-                self.screen.blit(inst_text, inst_rect)
 
 class HighScoreScreen:
     def __init__(self, screen, high_scores):
         self.screen = screen
         self.high_scores = high_scores
+        self.screen_width, self.screen_height = screen.get_size()
         self.font_large = pygame.font.Font(None, 96)
         self.font_medium = pygame.font.Font(None, 64)
         self.font_small = pygame.font.Font(None, 48)
         self.viewing_coop = False  # False = single player, True = coop
+        self.backdrop = None  # Cached table for the current mode
+        self.backdrop_key = None
     
     def handle_events(self):
         for event in pygame.event.get():
@@ -1610,29 +2604,38 @@ class HighScoreScreen:
                     self.viewing_coop = not self.viewing_coop
         return None
     
-    def draw(self):
+    def get_background_image(self):
+        if hasattr(self, 'parent_game') and hasattr(self.parent_game, 'highscores_image'):
+            return self.parent_game.highscores_image
+        return None
+    
+    def build_backdrop(self):
+        """Compose the whole table for the current mode onto one surface"""
+        target = pygame.Surface(self.screen.get_size()).convert()
+        
         # Draw high scores background image or fallback to sand color
-        if hasattr(self, 'parent_game') and hasattr(self.parent_game, 'highscores_image') and self.parent_game.highscores_image:
-            self.screen.blit(self.parent_game.highscores_image, (0, 0))
+        background = self.get_background_image()
+        if background:
+            target.blit(background, (0, 0))
         else:
-            self.screen.fill(SAND_COLOR)
+            target.fill(SAND_COLOR)
         
         # Add dark overlay for better text visibility
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        overlay = pygame.Surface((self.screen_width, self.screen_height))
         overlay.set_alpha(100)
         overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        target.blit(overlay, (0, 0))
         
         # Title
         mode_text = "CO-OP" if self.viewing_coop else "SINGLE PLAYER"
         title_text = self.font_large.render(f"{mode_text} HIGH SCORES", True, YELLOW)
-        title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 120))
-        self.screen.blit(title_text, title_rect)
+        title_rect = title_text.get_rect(center=(self.screen_width // 2, 120))
+        target.blit(title_text, title_rect)
         
         # Mode toggle instruction
         toggle_text = self.font_small.render("Press TAB or Left/Right to switch modes", True, BLUE)
-        toggle_rect = toggle_text.get_rect(center=(SCREEN_WIDTH // 2, 180))
-        self.screen.blit(toggle_text, toggle_rect)
+        toggle_rect = toggle_text.get_rect(center=(self.screen_width // 2, 180))
+        target.blit(toggle_text, toggle_rect)
         
         # Headers
         header_y = 250
@@ -1644,11 +2647,11 @@ class HighScoreScreen:
             wave_header = self.font_medium.render("WAVE", True, WHITE)
             score_header = self.font_medium.render("SCORE", True, WHITE)
             
-            self.screen.blit(rank_header, (150, header_y))
-            self.screen.blit(p1_header, (350, header_y))
-            self.screen.blit(p2_header, (600, header_y))
-            self.screen.blit(wave_header, (850, header_y))
-            self.screen.blit(score_header, (1100, header_y))
+            target.blit(rank_header, (150, header_y))
+            target.blit(p1_header, (350, header_y))
+            target.blit(p2_header, (600, header_y))
+            target.blit(wave_header, (850, header_y))
+            target.blit(score_header, (1100, header_y))
         else:
             # Single player headers
             rank_header = self.font_medium.render("RANK", True, WHITE)
@@ -1657,14 +2660,14 @@ class HighScoreScreen:
             level_header = self.font_medium.render("LEVEL", True, WHITE)
             score_header = self.font_medium.render("SCORE", True, WHITE)
             
-            self.screen.blit(rank_header, (200, header_y))
-            self.screen.blit(name_header, (400, header_y))
-            self.screen.blit(wave_header, (650, header_y))
-            self.screen.blit(level_header, (850, header_y))
-            self.screen.blit(score_header, (1100, header_y))
+            target.blit(rank_header, (200, header_y))
+            target.blit(name_header, (400, header_y))
+            target.blit(wave_header, (650, header_y))
+            target.blit(level_header, (850, header_y))
+            target.blit(score_header, (1100, header_y))
         
         # Header underline
-        pygame.draw.line(self.screen, WHITE, (100, header_y + 60), (SCREEN_WIDTH - 100, header_y + 60), 2)
+        pygame.draw.line(target, WHITE, (100, header_y + 60), (self.screen_width - 100, header_y + 60), 2)
         
         # High scores list
         scores = self.high_scores['coop'] if self.viewing_coop else self.high_scores['single_player']
@@ -1675,11 +2678,11 @@ class HighScoreScreen:
             
             # Alternating row background - transparent dark overlay
             if i % 2 == 1:
-                row_rect = pygame.Rect(100, y - 10, SCREEN_WIDTH - 200, 50)
+                row_rect = pygame.Rect(100, y - 10, self.screen_width - 200, 50)
                 # Create a transparent surface
-                row_surface = pygame.Surface((SCREEN_WIDTH - 200, 50), pygame.SRCALPHA)
+                row_surface = pygame.Surface((self.screen_width - 200, 50), pygame.SRCALPHA)
                 row_surface.fill((0, 0, 0, 100))  # Black with 100/255 alpha (about 40% opacity)
-                self.screen.blit(row_surface, (100, y - 10))
+                target.blit(row_surface, (100, y - 10))
             
             # Rank number with special colors for top 3
             rank_color = YELLOW if i == 0 else ORANGE if i < 3 else WHITE
@@ -1689,105 +2692,831 @@ class HighScoreScreen:
                 # Co-op format: (player1_name, player2_name, wave, total_score)
                 p1_name, p2_name, wave, points = score_entry
                 
-                self.screen.blit(rank_text, (150, y))
+                target.blit(rank_text, (150, y))
                 
                 p1_text = self.font_small.render(p1_name[:12], True, WHITE)
-                self.screen.blit(p1_text, (350, y))
+                target.blit(p1_text, (350, y))
                 
                 p2_text = self.font_small.render(p2_name[:12], True, WHITE)
-                self.screen.blit(p2_text, (600, y))
+                target.blit(p2_text, (600, y))
                 
                 wave_text = self.font_small.render(f"{wave}", True, WHITE)
-                self.screen.blit(wave_text, (850, y))
+                target.blit(wave_text, (850, y))
                 
                 score_text = self.font_small.render(f"{points:,}", True, WHITE)
-                self.screen.blit(score_text, (1100, y))
+                target.blit(score_text, (1100, y))
             else:
                 # Single player format: (player_name, wave, level, score)
                 name, wave, level, points = score_entry
                 
-                self.screen.blit(rank_text, (200, y))
+                target.blit(rank_text, (200, y))
                 
                 name_text = self.font_small.render(name[:12], True, WHITE)
-                self.screen.blit(name_text, (400, y))
+                target.blit(name_text, (400, y))
                 
                 wave_text = self.font_small.render(f"{wave}", True, WHITE)
-                self.screen.blit(wave_text, (650, y))
+                target.blit(wave_text, (650, y))
                 
                 level_text = self.font_small.render(f"{level}", True, WHITE)
-                self.screen.blit(level_text, (850, y))
+                target.blit(level_text, (850, y))
                 
                 score_text = self.font_small.render(f"{points:,}", True, WHITE)
-                self.screen.blit(score_text, (1100, y))
+                target.blit(score_text, (1100, y))
         
         # No scores message
         if not scores:
             no_scores_text = self.font_medium.render(f"No {mode_text.lower()} high scores yet!", True, GRAY)
-            no_scores_rect = no_scores_text.get_rect(center=(SCREEN_WIDTH // 2, 500))
-            self.screen.blit(no_scores_text, no_scores_rect)
+            no_scores_rect = no_scores_text.get_rect(center=(self.screen_width // 2, 500))
+            target.blit(no_scores_text, no_scores_rect)
         
         # Instructions
         instruction_text = self.font_small.render("Press ESC, ENTER, or controller button to return to menu", True, GRAY)
-        instruction_rect = instruction_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 80))
-        self.screen.blit(instruction_text, instruction_rect)
-        
-        pygame.display.flip()
+        instruction_rect = instruction_text.get_rect(center=(self.screen_width // 2, self.screen_height - 80))
+        target.blit(instruction_text, instruction_rect)
+        return target
+    
+    def draw(self):
+        # Scores cannot change while this screen is open, so only the mode toggle
+        # or a late-loading background image invalidates the cached table
+        backdrop_key = (self.viewing_coop, id(self.get_background_image()))
+        if self.backdrop is None or self.backdrop_key != backdrop_key:
+            self.backdrop = self.build_backdrop()
+            self.backdrop_key = backdrop_key
+        self.screen.blit(self.backdrop, (0, 0))
+
+class FrameProfiler:
+    """Times named phases of each frame, with an on-screen overlay and CSV export"""
+    PHASES = (
+        'events', 'input',
+        'timers', 'powerups', 'missiles', 'effects', 'ai',
+        'collide_obstacles', 'collide_powerups', 'collide_enemies', 'collide_players', 'wave_logic',
+        'draw_static', 'draw_trails', 'draw_powerups', 'draw_tanks',
+        'draw_missiles', 'draw_effects', 'draw_hud', 'draw_screen',
+        'overlay', 'present', 'wait',
+    )
+
+    def __init__(self):
+        self.history = deque(maxlen=PROFILER_VARS['history_frames'])  # (frame_ms, phases, counts)
+        self.show_overlay = False
+        self.overlay_surface = None
+        self.frames_since_overlay = 0
+        self.frame_number = 0
+        self.csv_file = None
+        self.csv_writer = None
+        self.count_names = None
+        self.frame_start = time.perf_counter()
+        self.last_lap = self.frame_start
+        self.current = {}
+        self.extra_lines = []  # Additional status lines other systems can show in the overlay
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        self.frame_start = now
+        self.last_lap = now
+        self.current = {}
+
+    def lap(self, phase):
+        """Charge the time since the previous lap to the named phase"""
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0.0) + (now - self.last_lap) * 1000
+        self.last_lap = now
+
+    @property
+    def wants_counts(self):
+        """Entity counts are only gathered while the overlay or CSV recording shows them"""
+        return self.show_overlay or self.csv_writer is not None
+
+    def end_frame(self, counts=None):
+        frame_ms = (time.perf_counter() - self.frame_start) * 1000
+        self.history.append((frame_ms, self.current, counts))
+        self.frame_number += 1
+        self.frames_since_overlay += 1
+        if self.csv_writer:
+            self._write_row(frame_ms, counts)
+
+    def last_frame_ms(self):
+        return self.history[-1][0] if self.history else 0.0
+
+    def phase_stats(self):
+        """Return {phase: (average ms, p99 ms)} over the rolling history"""
+        stats = {}
+        frames = len(self.history)
+        if not frames:
+            return stats
+        for phase in ('frame',) + self.PHASES:
+            if phase == 'frame':
+                values = sorted(entry[0] for entry in self.history)
+            else:
+                values = sorted(entry[1].get(phase, 0.0) for entry in self.history)
+            if values[-1] <= 0.0:
+                continue
+            stats[phase] = (sum(values) / frames, values[int(0.99 * (frames - 1))])
+        return stats
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        self.overlay_surface = None
+
+    def toggle_recording(self):
+        """Start or stop writing per-frame timings to a CSV file"""
+        if self.csv_file:
+            self.csv_file.close()
+            self.csv_file = None
+            self.csv_writer = None
+            print("Stopped frame profile recording")
+            return
 
-class Game:
-    def __init__(self):            
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
-        pygame.display.set_caption("Tanks For Nothing")
-        self.clock = pygame.time.Clock()
+        os.makedirs(PROFILER_VARS['csv_directory'], exist_ok=True)
+        path = os.path.join(PROFILER_VARS['csv_directory'], time.strftime("frames_%Y%m%d_%H%M%S.csv"))
+        self.csv_file = open(path, 'w', newline='')
+        self.csv_writer = csv.writer(self.csv_file)
+        self.count_names = None
+        print(f"Recording frame profile to {path}")
+
+    def _write_row(self, frame_ms, counts):
+        if self.count_names is None:
+            self.count_names = list(counts)
+            self.csv_writer.writerow(['frame', 'frame_ms'] + list(self.PHASES) +
+                                     ['count_' + name for name in self.count_names])
+        row = [self.frame_number, f"{frame_ms:.3f}"]
+        row.extend(f"{self.current.get(phase, 0.0):.3f}" for phase in self.PHASES)
+        row.extend(counts.get(name, 0) for name in self.count_names)
+        self.csv_writer.writerow(row)
+
+    def close(self):
+        if self.csv_file:
+            self.toggle_recording()
+
+    def draw(self, screen, font):
+        """Draw the overlay in the top right corner, refreshing its text periodically"""
+        if (self.overlay_surface is None or
+                self.frames_since_overlay >= PROFILER_VARS['overlay_refresh_frames']):
+            self.overlay_surface = self._build_overlay(font)
+            self.frames_since_overlay = 0
+        screen.blit(self.overlay_surface, (screen.get_width() - self.overlay_surface.get_width() - 10, 10))
+
+    def _build_overlay(self, font):
+        rows = [("phase", "avg ms", "p99 ms")]
+        for phase, (average, p99) in self.phase_stats().items():
+            rows.append((phase, f"{average:.2f}", f"{p99:.2f}"))
+        if self.history and self.history[-1][2]:
+            rows.append(("",))
+            rows.extend((name, str(value)) for name, value in self.history[-1][2].items())
+        rows.extend((line,) for line in self.extra_lines)
+        if self.csv_writer:
+            rows.append(("REC",))
+
+        # Names are left aligned, numbers right aligned in fixed columns
+        name_width = max(font.size(row[0])[0] for row in rows) + 15
+        column_width = max(font.size(cell)[0] for row in rows for cell in row[1:]) + 15
+        line_height = font.get_linesize()
+        surface = pygame.Surface((name_width + column_width * 2 + 20, line_height * len(rows) + 20), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 170))
+        for i, row in enumerate(rows):
+            y = 10 + i * line_height
+            surface.blit(font.render(row[0], True, WHITE), (10, y))
+            for column, cell in enumerate(row[1:], start=1):
+                text = font.render(cell, True, WHITE)
+                surface.blit(text, (10 + name_width + column * column_width - text.get_width(), y))
+        return surface
+
+class SamplingProfiler:
+    """Statistical profiler that samples the main thread's stack from a timer thread.
+
+    Cheap enough to leave running during real play, unlike cProfile. Samples
+    are grouped by wave and written as collapsed stacks (one "a;b;c count"
+    line per stack), the input format of flamegraph.pl and speedscope.
+    """
+    def __init__(self):
+        self.main_thread_id = threading.get_ident()
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.label = None
+        self.stacks = {}
+        self.directory = None
+        self.code_names = {}
+
+    @property
+    def active(self):
+        return self.thread is not None
+
+    def toggle(self, label):
+        """Start or stop sampling, writing out the samples collected so far"""
+        if self.active:
+            self.stop()
+            return
+        self.directory = os.path.join(PROFILER_VARS['csv_directory'], time.strftime("flame_%Y%m%d_%H%M%S"))
+        os.makedirs(self.directory, exist_ok=True)
+        self.label = label
+        self.stacks = {}
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._sample_loop, daemon=True)
+        self.thread.start()
+        print(f"Sampling profiler writing flame graphs to {self.directory}")
+
+    def stop(self):
+        if not self.active:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self._write(self.label, self.stacks)
+        print("Stopped sampling profiler")
+
+    def set_label(self, label):
+        """Switch the file samples are attributed to, e.g. when a new wave starts"""
+        if not self.active or label == self.label:
+            return
+        with self.lock:
+            finished_label, finished_stacks = self.label, self.stacks
+            self.label = label
+            self.stacks = {}
+        self._write(finished_label, finished_stacks)
+
+    def _sample_loop(self):
+        interval = PROFILER_VARS['sampling_interval_ms'] / 1000
+        while not self.stop_event.wait(interval):
+            frame = sys._current_frames().get(self.main_thread_id)
+            names = []
+            while frame is not None:
+                names.append(self._code_name(frame.f_code))
+                frame = frame.f_back
+            stack = ';'.join(reversed(names))
+            with self.lock:
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def _code_name(self, code):
+        name = self.code_names.get(code)
+        if name is None:
+            name = getattr(code, 'co_qualname', code.co_name)
+            if code.co_filename != __file__:
+                name = f"{os.path.splitext(os.path.basename(code.co_filename))[0]}:{name}"
+            self.code_names[code] = name
+        return name
+
+    def _write(self, label, stacks):
+        if not stacks:
+            return
+        path = os.path.join(self.directory, f"{label}.folded")
+        with open(path, 'a') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+class MemoryReporter:
+    """Per-wave memory report: tracemalloc growth by subsystem, live objects and surface memory.
+
+    Each wave boundary takes a tracemalloc snapshot and diffs it against the
+    previous one. Allocation sites are attributed to the function containing
+    them, and through the function's class to a subsystem. The report is
+    appended to a log under PROFILER_VARS['csv_directory'].
+    """
+    def __init__(self):
+        self.active = False
+        self.log_path = None
+        self.snapshot = None
+        self.wave = None
+        self.function_index = None
+
+    def toggle(self, game):
+        if self.active:
+            self.active = False
+            self.snapshot = None
+            tracemalloc.stop()
+            print("Stopped memory report")
+            return
+        os.makedirs(PROFILER_VARS['csv_directory'], exist_ok=True)
+        self.log_path = os.path.join(PROFILER_VARS['csv_directory'], time.strftime("memory_%Y%m%d_%H%M%S.log"))
+        tracemalloc.start()
+        self.active = True
+        self.wave = game.wave
+        self.snapshot = self._take_snapshot()
+        print(f"Writing per-wave memory report to {self.log_path}")
+
+    def check_wave(self, game):
+        """Write a report whenever the wave number changes"""
+        if self.active and game.wave != self.wave:
+            self.report(game)
+            self.wave = game.wave
+
+    def report(self, game):
+        snapshot = self._take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"=== wave {self.wave} -> {game.wave} ({'coop' if game.coop_mode else 'single'}) "
+                 f"at {time.strftime('%H:%M:%S')} ===",
+                 f"traced memory {current / 1048576:.2f} MB, peak {peak / 1048576:.2f} MB"]
+
+        differences = snapshot.compare_to(self.snapshot, 'lineno')
+        by_subsystem = {}
+        for stat in differences:
+            frame = stat.traceback[0]
+            subsystem = self._function_name(frame).split('.')[0]
+            by_subsystem[subsystem] = by_subsystem.get(subsystem, 0) + stat.size_diff
+        lines.append(f"growth since last report {sum(by_subsystem.values()) / 1024:+.1f} KB, by subsystem:")
+        for subsystem, size in sorted(by_subsystem.items(), key=lambda item: -abs(item[1]))[:10]:
+            lines.append(f"  {subsystem:<28} {size / 1024:+10.1f} KB")
+
+        lines.append("largest changes by allocation site:")
+        for stat in differences[:PROFILER_VARS['memory_report_lines']]:
+            frame = stat.traceback[0]
+            lines.append(f"  {stat.size_diff / 1024:+10.1f} KB {stat.count_diff:+7d} blocks  "
+                         f"{self._function_name(frame)} ({os.path.basename(frame.filename)}:{frame.lineno})")
+
+        lines.extend(self._live_objects(game))
+        self.snapshot = snapshot
+        with open(self.log_path, 'a') as f:
+            f.write('\n'.join(lines) + '\n\n')
+        print(f"Memory report for wave {game.wave}: {current / 1048576:.2f} MB traced")
+
+    def _take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def _live_objects(self, game):
+        """Count live instances of the game's classes and estimate pygame surface memory"""
+        classes = {obj for obj in globals().values() if isinstance(obj, type) and obj.__module__ == __name__}
+        counts = {}
+        surfaces = {}
+        tracked = gc.get_objects()
+        for obj in tracked:
+            cls = type(obj)
+            if cls in classes:
+                counts[cls.__name__] = counts.get(cls.__name__, 0) + 1
+        # Surfaces aren't tracked by the collector, so find them through their holders
+        # (including tuples, which the collector stops tracking once they hold only untracked objects)
+        pending = gc.get_referents(*tracked)
+        while pending:
+            referent = pending.pop()
+            if isinstance(referent, pygame.Surface):
+                surfaces[id(referent)] = referent
+            elif type(referent) is tuple and not gc.is_tracked(referent):
+                pending.extend(referent)
+        surface_bytes = sum(surface.get_pitch() * surface.get_height() for surface in surfaces.values())
+
+        in_play = {
+            'Tank': len(game.players) + len(game.enemies),
+            'TrackTrail': len(game.players) + len(game.enemies),
+            'Obstacle': len(game.obstacles),
+            'Powerup': len(game.powerups),
+        }
+        lines = ["live objects (in play):"]
+        for name, count in sorted(counts.items(), key=lambda item: -item[1]):
+            expected = f" ({in_play[name]})" if name in in_play else ""
+            lines.append(f"  {name:<28} {count:6d}{expected}")
+        lines.append(f"pygame surfaces {len(surfaces)}, about {surface_bytes / 1048576:.1f} MB of pixels")
+        return lines
+
+    def _function_name(self, frame):
+        """Qualified name of the function in this module containing a traced line"""
+        if frame.filename != __file__:
+            module = os.path.splitext(os.path.basename(frame.filename))[0]
+            if module == '__init__':
+                module = os.path.basename(os.path.dirname(frame.filename))
+            return module
+        if self.function_index is None:
+            functions = []
+            for obj in list(globals().values()):
+                members = vars(obj).values() if isinstance(obj, type) and obj.__module__ == __name__ else [obj]
+                for member in members:
+                    if isinstance(member, property):
+                        member = member.fget
+                    code = getattr(member, '__code__', None)
+                    if code is not None and code.co_filename == __file__:
+                        functions.append((code.co_firstlineno, member.__qualname__))
+            functions.sort()
+            self.function_index = ([line for line, _ in functions], [name for _, name in functions])
+        first_lines, names = self.function_index
+        position = bisect.bisect_right(first_lines, frame.lineno) - 1
+        return names[position] if position >= 0 else "<module>"
+
+class MetricsExporter:
+    """Aggregates per-frame timings and sends them as statsd lines once per interval.
+
+    Recording a frame only appends to a list; the percentiles are computed
+    and the batched packets sent on a non-blocking socket at flush time.
+    """
+    def __init__(self):
+        self.enabled = METRICS_VARS['enabled']
+        self.socket = None
+        self.file = None
+        self.frame_times = []
+        self.state_ms = {}
+        self.count_entities = dict  # Called at flush time only; counting every frame is wasted work
+        self.last_state = None
+        self.reported_state = None  # State whose gauge was last set to 1
+        self.wave = 0
+        self.interval_start = time.perf_counter()
+
+        if not self.enabled:
+            return
+        if METRICS_VARS['target'] == 'file':
+            directory = os.path.dirname(METRICS_VARS['metrics_file'])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.file = open(METRICS_VARS['metrics_file'], 'a')
+        else:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.setblocking(False)
+            self.address = (METRICS_VARS['host'], METRICS_VARS['port'])
+
+    def record_frame(self, frame_ms, state, wave, count_entities):
+        if not self.enabled:
+            return
+        self.frame_times.append(frame_ms)
+        self.state_ms[state] = self.state_ms.get(state, 0.0) + frame_ms
+        self.last_state = state
+        self.wave = wave
+        self.count_entities = count_entities
+        if (time.perf_counter() - self.interval_start) * 1000 >= METRICS_VARS['interval_ms']:
+            self.flush()
+
+    def flush(self):
+        if not self.frame_times:
+            return
+        now = time.perf_counter()
+        elapsed = now - self.interval_start
+        self.interval_start = now
+        prefix = METRICS_VARS['prefix']
+
+        times = sorted(self.frame_times)
+        frames = len(times)
+        lines = [f"{prefix}.frame_ms.{name}:{times[int(fraction * (frames - 1))]:.2f}|g"
+                 for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))]
+        lines.append(f"{prefix}.frame_ms.max:{times[-1]:.2f}|g")
+        lines.append(f"{prefix}.tick_rate:{frames / elapsed:.1f}|g")
+        lines.append(f"{prefix}.frames:{frames}|c")
+        lines.append(f"{prefix}.wave:{self.wave}|g")
+        lines.extend(f"{prefix}.entities.{name}:{value}|g" for name, value in self.count_entities().items())
+        # Time per state covers the blurred level-up, upgrade warning and game over screens
+        lines.extend(f"{prefix}.state_ms.{state}:{int(ms)}|c" for state, ms in self.state_ms.items())
+        if self.reported_state not in (None, self.last_state):
+            # Gauges hold their last value, so the state just left has to be cleared
+            lines.append(f"{prefix}.state.{self.reported_state}:0|g")
+        lines.append(f"{prefix}.state.{self.last_state}:1|g")
+        self.reported_state = self.last_state
+        self.frame_times = []
+        self.state_ms = {}
+        self._send(lines)
+
+    def _send(self, lines):
+        if self.file:
+            stamp = time.strftime('%Y-%m-%dT%H:%M:%S')
+            self.file.write(''.join(f"{stamp} {line}\n" for line in lines))
+            self.file.flush()
+            return
 
-        # Load title screen image
+        packet = []
+        size = 0
+        for line in lines:
+            if packet and size + len(line) + 1 > METRICS_VARS['max_packet_bytes']:
+                self._send_packet(packet)
+                packet = []
+                size = 0
+            packet.append(line)
+            size += len(line) + 1
+        if packet:
+            self._send_packet(packet)
+
+    def _send_packet(self, lines):
         try:
-            self.title_image = pygame.image.load("assets/title.png").convert()
-            # Scale to screen size if needed (though your image should already be 1920x1080)
-            self.title_image = pygame.transform.scale(self.title_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-        except pygame.error as e:
-            print(f"Could not load title image: {e}")
-            print("Using fallback tan background")
-            self.title_image = None
-
-        # Load warning screen image
+            self.socket.sendto('\n'.join(lines).encode('ascii'), self.address)
+        except OSError:
+            pass  # Metrics are best effort; a missing or slow collector must never stall a frame
+
+    def close(self):
+        if not self.enabled:
+            return
+        self.flush()
+        if self.file:
+            self.file.close()
+        if self.socket:
+            self.socket.close()
+
+class HighScoreStore:
+    """SQLite store of every finished game, with writes on a background thread.
+
+    Entries use the tuples the high score screen shows:
+    single_player (name, wave, level, score) and coop (name, partner, wave, score).
+    """
+    MODES = ('single_player', 'coop')
+
+    def __init__(self, path):
+        self.path = path
+        self.writes = queue.Queue()
+        self.available = True
         try:
-            self.warning_image = pygame.image.load("assets/warning.png").convert()
-            self.warning_image = pygame.transform.scale(self.warning_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-            print("Warning image loaded successfully")
-        except pygame.error as e:
-            print(f"Could not load warning image: {e}")
-            print("Will use title image as fallback for warnings")
-            self.warning_image = None
-
-        # Load game over screen image
+            connection = self._connect()
+            try:
+                self._migrate(connection)
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"High scores unavailable, could not open {path}: {e}")
+            self.available = False
+            return
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def _migrate(self, connection):
+        """Create the schema and import the old JSON score files the first time"""
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version >= 1:
+            return
+        with connection:
+            connection.execute("""CREATE TABLE IF NOT EXISTS scores (
+                id INTEGER PRIMARY KEY,
+                mode TEXT NOT NULL,
+                name TEXT NOT NULL,
+                partner TEXT,
+                wave INTEGER NOT NULL,
+                level INTEGER,
+                score INTEGER NOT NULL,
+                created REAL NOT NULL)""")
+            connection.execute("CREATE INDEX IF NOT EXISTS scores_by_mode ON scores (mode, score DESC)")
+
+            imported = set()
+            for legacy_path in HIGH_SCORE_VARS['legacy_files']:
+                for mode, entry in self._read_legacy(legacy_path):
+                    if (mode, entry) not in imported:
+                        imported.add((mode, entry))
+                        connection.execute(*self._insert(mode, entry, 0.0))
+            connection.execute("PRAGMA user_version = 1")
+        if imported:
+            print(f"Imported {len(imported)} high scores from {', '.join(HIGH_SCORE_VARS['legacy_files'])}")
+
+    def _read_legacy(self, path):
+        if not os.path.exists(path):
+            return []
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            return [(mode, tuple(entry)) for mode in self.MODES for entry in data.get(mode, [])
+                    if len(entry) == 4]
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Skipping unreadable high score file {path}: {e}")
+            return []
+
+    def _insert(self, mode, entry, created):
+        if mode == 'coop':
+            name, partner, wave, score = entry
+            level = None
+        else:
+            name, wave, level, score = entry
+            partner = None
+        return ("INSERT INTO scores (mode, name, partner, wave, level, score, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (mode, name, partner, wave, level, score, created))
+
+    def top(self, mode, limit=None):
+        """Best scores for a mode, highest first, in the high score screen's tuple layout"""
+        if not self.available:
+            return []
+        limit = limit or HIGH_SCORE_VARS['table_size']
+        columns = "name, partner, wave, score" if mode == 'coop' else "name, wave, level, score"
+        connection = self._connect()
         try:
-            self.gameover_image = pygame.image.load("assets/gameover.png").convert()
-            self.gameover_image = pygame.transform.scale(self.gameover_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-            print("Game over image loaded successfully")
-        except pygame.error as e:
-            print(f"Could not load game over image: {e}")
-            print("Will use title image as fallback for game over")
-            self.gameover_image = None
-
-        # Load sand background image for gameplay
+            rows = connection.execute(
+                f"SELECT {columns} FROM scores WHERE mode = ? ORDER BY score DESC, id LIMIT ?",
+                (mode, limit)).fetchall()
+        except sqlite3.Error as e:
+            print(f"Could not read high scores: {e}")
+            rows = []
+        finally:
+            connection.close()
+        return [tuple(row) for row in rows]
+
+    def add(self, mode, entry):
+        """Queue a score to be written; returns immediately"""
+        if self.available:
+            self.writes.put((mode, tuple(entry), time.time()))
+
+    def _write_loop(self):
+        connection = self._connect()
+        while True:
+            item = self.writes.get()
+            if item is None:
+                break
+            try:
+                with connection:
+                    connection.execute(*self._insert(*item))
+            except sqlite3.Error as e:
+                print(f"Could not save high score: {e}")
+            finally:
+                self.writes.task_done()
+        connection.close()
+
+    def close(self):
+        """Finish pending writes and stop the writer thread"""
+        if self.available and self.writer.is_alive():
+            self.writes.put(None)
+            self.writer.join()
+
+class SessionRecorder:
+    """Records a game's seed, per-frame player commands and menu choices.
+
+    Commands are stored only when they change, as [frame, commands] pairs.
+    benchmarks/replay.py replays the file headlessly.
+    """
+    def __init__(self, seed, coop_mode, arena, view_size):
+        self.seed = seed
+        self.coop_mode = coop_mode
+        self.arena_size = (arena.width, arena.height)
+        self.view_size = tuple(view_size)
+        self.frame = 0
+        self.inputs = []
+        self.events = []
+        self.last_commands = None
+
+    def record_commands(self, commands):
+        commands = [list(command) for command in commands]
+        if commands != self.last_commands:
+            self.inputs.append([self.frame, commands])
+            self.last_commands = commands
+
+    def record_event(self, name, value=None):
+        self.events.append([self.frame, name, value])
+
+    def end_frame(self):
+        self.frame += 1
+
+    def save(self, game):
+        os.makedirs(REPLAY_VARS['directory'], exist_ok=True)
+        mode = 'coop' if self.coop_mode else 'single'
+        path = os.path.join(REPLAY_VARS['directory'],
+                            time.strftime(f"session_%Y%m%d_%H%M%S_{mode}_wave{game.wave}.json"))
+        session = {
+            'version': 1,
+            'seed': self.seed,
+            'coop': self.coop_mode,
+            'step_ms': GAME_CLOCK.step_ms,
+            'arena': list(self.arena_size),
+            'view': list(self.view_size),
+            'frames': self.frame + 1,
+            'inputs': self.inputs,
+            'events': self.events,
+            'final': session_summary(game),
+        }
         try:
-            self.sand_image = pygame.image.load("assets/sand.png").convert()
-            self.sand_image = pygame.transform.scale(self.sand_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-            print("Sand background image loaded successfully")
-        except pygame.error as e:
-            print(f"Could not load sand background image: {e}")
-            print("Will use default sand color for gameplay background")
-            self.sand_image = None
-
-        # Load high scores background image
+            with open(path, 'w') as f:
+                json.dump(session, f)
+            print(f"Recorded session to {path}")
+        except OSError as e:
+            print(f"Could not save session recording: {e}")
+
+def session_summary(game):
+    """Compact description of the simulation state, used to detect replay desyncs"""
+    return {
+        'state': game.state,
+        'wave': game.wave,
+        'enemies': len(game.enemies),
+        'players': [[player.level, player.xp, player.health] for player in game.players],
+    }
+
+class AssetManager:
+    """Loads full screen images, decoding and scaling all but the first on a worker thread.
+
+    Its messages go to stderr: the worker can print at any time, and tools
+    that write JSON to stdout must not get timing lines mixed in.
+    """
+    ASSETS = {
+        'title': ("assets/title.png", "Using fallback tan background"),
+        'warning': ("assets/warning.png", "Will use title image as fallback for warnings"),
+        'gameover': ("assets/gameover.png", "Will use title image as fallback for game over"),
+        'sand': ("assets/sand.png", "Will use default sand color for gameplay background"),
+        'highscores': ("assets/highscores.png", "Will use default sand color for high scores background"),
+    }
+
+    def __init__(self, size):
+        self.size = size
+        self.images = {}  # name -> converted surface (None if loading failed)
+        self.loaded = {}  # name -> scaled surface waiting to be converted on the main thread
+        self.callbacks = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def _load(self, name):
+        """Decode and scale one image; safe to call off the main thread"""
+        path, fallback_message = self.ASSETS[name]
+        start = time.perf_counter()
         try:
-            self.highscores_image = pygame.image.load("assets/highscores.png").convert()
-            self.highscores_image = pygame.transform.scale(self.highscores_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-            print("High scores background image loaded successfully")
-        except pygame.error as e:
-            print(f"Could not load high scores background image: {e}")
-            print("Will use default sand color for high scores background")
-            self.highscores_image = None
+            image = pygame.image.load(path)
+            image = pygame.transform.scale(image, self.size)
+        except (pygame.error, OSError) as e:
+            print(f"Could not load {path}: {e}", file=sys.stderr)
+            print(fallback_message, file=sys.stderr)
+            image = None
+        else:
+            print(f"Loaded {path} in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+        with self.lock:
+            self.loaded[name] = image
+
+    def _load_all(self, names):
+        start = time.perf_counter()
+        for name in names:
+            self._load(name)
+        print(f"Background asset loading finished in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+
+    def load_now(self, name):
+        """Load an asset synchronously so it is available immediately"""
+        self._load(name)
+        return self.get(name)
+
+    def load_in_background(self, names):
+        """Start decoding the given assets on a daemon worker thread"""
+        self.thread = threading.Thread(target=self._load_all, args=(list(names),), daemon=True)
+        self.thread.start()
+
+    def on_ready(self, name, callback):
+        """Run callback(image) on the main thread once the asset has loaded"""
+        self.callbacks[name] = callback
+
+    def get(self, name):
+        """Return the asset, or None while it is still loading so callers use their fallback"""
+        if name in self.images:
+            return self.images[name]
+        with self.lock:
+            if name not in self.loaded:
+                return None
+            image = self.loaded.pop(name)
+
+        # Convert on the main thread, since it needs the display surface
+        if image is not None:
+            image = image.convert()
+        self.images[name] = image
+        if image is not None and name in self.callbacks:
+            self.callbacks.pop(name)(image)
+        return image
+
+    def poll(self):
+        """Finish any assets the worker has completed since the last frame"""
+        with self.lock:
+            names = list(self.loaded)
+        for name in names:
+            self.get(name)
+
+    def wait(self):
+        """Block until background loading is complete (used by headless tools)"""
+        if self.thread:
+            self.thread.join()
+        self.poll()
+
+class Game:
+    def __init__(self, screen_size=None, arena_size=None):
+        # Display and audio are only initialised when a game is actually created
+        desktop_size = init_display()
+        self.pacer = FramePacer(PACING_VARS['mode'], PACING_VARS['target_fps'])
+        if screen_size:
+            # Explicit size (tools, benchmarks) opens a window drawn at that size
+            window_size, render_size, flags = screen_size, screen_size, 0
+        else:
+            if DISPLAY_VARS['windowed']:
+                window_size, flags = DISPLAY_VARS['window_size'], 0
+            else:
+                window_size, flags = desktop_size, pygame.FULLSCREEN
+            # Everything, assets included, is laid out at render size and scaled to the display once per frame
+            render_size = DISPLAY_VARS['render_size'] or (
+                max(1, round(window_size[0] * DISPLAY_VARS['render_scale'])),
+                max(1, round(window_size[1] * DISPLAY_VARS['render_scale'])))
+        self.display = Display(tuple(window_size), tuple(render_size), flags, self.pacer)
+        self.screen = self.display.screen
+        self.screen_width, self.screen_height = self.screen.get_size()
+        self.quality = QualityController(1000 / self.pacer.target_fps)  # Visual detail level, F3 overlay shows it
+        # Explosion frames are rendered up front rather than on the first kill
+        FLIPBOOKS.explosion(EFFECT_VARS['explosion_max_size'], self.quality.settings['explosion_rings'])
+        self.arena = Arena(*(arena_size or ARENA_VARS['size'] or (self.screen_width, self.screen_height)))
+        self.camera = Camera(self.screen_width, self.screen_height, self.arena)
+        self.static_layer = ChunkedLayer((self.screen_width, self.screen_height),
+                                         ARENA_VARS['chunk_size'], ARENA_VARS['max_cached_chunks'])
+        self.free_space_indexes = {}  # 'powerup' / 'enemy_entry' -> FreeSpaceIndex
+        self.timers = TimerQueue()  # Enemy spawns, powerup spawns and expiry, effect lifetimes
+        self.enemy_spawn_timer = None
+        self.powerup_spawn_timer = None
+        pygame.display.set_caption("Tanks For Nothing")
+        self.text_renderer = OutlinedTextRenderer()
+        self.blur_cache = OrderedDict()  # (surface id, radius, size) -> (source, blurred)
+        self.menu_backdrop = None  # Static menu composition, built on first draw
+        self.menu_backdrop_source = None
+        self.profiler = FrameProfiler()  # F3 toggles the overlay, F4 toggles CSV recording
+        self.sampler = SamplingProfiler()  # F5 toggles, writes one flame graph file per wave
+        self.memory_reporter = MemoryReporter()  # F6 toggles the per-wave memory report
+        self.metrics = MetricsExporter()
+        self.recorder = None  # SessionRecorder while a recorded game is running
+        if REPLAY_VARS['record_sessions']:
+            # Recorded sessions run on fixed 60 Hz game time so replays are exact
+            GAME_CLOCK.use_fixed_step(1000 / PACING_VARS['simulation_hz'])
+
+        # Title image is needed for the first frame; everything else loads in the background
+        self.assets = AssetManager((self.screen_width, self.screen_height))
+        self.assets.on_ready('warning', lambda image: self.get_blurred(image, 20))
+        self.assets.on_ready('gameover', lambda image: self.get_blurred(image, 32))
+        self.assets.load_now('title')
+        self.assets.load_in_background(['sand', 'warning', 'gameover', 'highscores'])
         
         # Initialize joysticks
         pygame.joystick.init()
@@ -1797,8 +3526,16 @@ class Game:
         
         self.state = "menu"  # menu, game, game_over, level_up, high_scores
         self.coop_mode = False
+        # Shots (one archetype per side) and effects live in component arrays under stable
+        # entity ids. Tanks and powerups stay objects: there are only dozens of them, and
+        # their cost is the AI's obstacle queries and pathing, not per-object dispatch.
+        # Tanks still take their entity id from the world, so shots never hold a tank
+        self.world = World()
+        self.player_shots = self.world.add_archetype('player_shots', SHOT_COMPONENTS)
+        self.enemy_shots = self.world.add_archetype('enemy_shots', SHOT_COMPONENTS)
+        self.effects = self.world.add_archetype('effects', EFFECT_COMPONENTS)
+        self.particles = self.world.add_archetype('particles', PARTICLE_COMPONENTS)
         self.obstacles = []
-        self.effects = []
         self.pending_level_ups = []  # Players who need to level up
         self.level_up_selection = 0  # Current selection in level up menu
         self.background_surface = None  # For blurred background
@@ -1812,14 +3549,8 @@ class Game:
         self.enemy_upgrade_info = None  # Stores upgrade info for warning screen
         self.pending_enemy_upgrade = False
 
-        # Enemy upgrade tracking
-        self.global_enemy_multipliers = {
-            'movement_speed': 1.0,
-            'shot_speed': 1.0,
-            'shot_distance': 1.0,
-            'health': 1.0,
-            'damage': 1.0
-        }
+        # Enemy upgrade tracking: the multipliers and stats all enemies share
+        self.enemy_profile = EnemyProfile()
         
         # Menu system
         self.menu_selection = 0  # 0=Single Player, 1=Co-op, 2=High Scores, 3=Quit
@@ -1846,23 +3577,37 @@ class Game:
         self.is_spawning_wave = False  # Whether we're currently spawning enemies
         
         self.reset_game()
+        if PROFILER_VARS['memory_report']:
+            self.memory_reporter.toggle(self)
     
-    def draw_pixel_text(self, text, x, y, size, color, border_color=BLACK):
+    @property
+    def title_image(self):
+        return self.assets.get('title')
+
+    @property
+    def warning_image(self):
+        return self.assets.get('warning')
+
+    @property
+    def gameover_image(self):
+        return self.assets.get('gameover')
+
+    @property
+    def sand_image(self):
+        return self.assets.get('sand')
+
+    @property
+    def highscores_image(self):
+        return self.assets.get('highscores')
+    
+    def draw_pixel_text(self, text, x, y, size, color, border_color=BLACK, target=None):
         """Draw text with pixel art style and black border"""
-        font = pygame.font.Font(None, size)
-        
-        # Draw border (8 directions)
-        for dx in [-2, -1, 0, 1, 2]:
-            for dy in [-2, -1, 0, 1, 2]:
-                if dx != 0 or dy != 0:
-                    border_surface = font.render(text, True, border_color)
-                    self.screen.blit(border_surface, (x + dx, y + dy))
+        # Outlined surface is built once and cached, so each label is a single blit
+        surface, text_size = self.text_renderer.render(text, size, color, border_color)
+        border = self.text_renderer.border_size
+        (target or self.screen).blit(surface, (x - border, y - border))
         
-        # Draw main text
-        text_surface = font.render(text, True, color)
-        self.screen.blit(text_surface, (x, y))
-        
-        return text_surface.get_size()
+        return text_size
 
     def generate_obstacles(self):
         """Generate random obstacles for the current wave"""
@@ -1873,106 +3618,81 @@ class Game:
             OBSTACLE_VARS['max_obstacles'],
             OBSTACLE_VARS['min_obstacles'] + (self.wave - 1) // 2
         )
+        # Arenas larger than the screen get the same density of obstacles
+        area_scale = (self.arena.width * self.arena.height) / (self.screen_width * self.screen_height)
+        obstacle_count = int(obstacle_count * max(1.0, area_scale))
+        
+        # Keep obstacles away from player spawn points
+        spawn_points = self.player_start_positions(False) + self.player_start_positions(True)
+        clearance = OBSTACLE_VARS['min_distance_from_spawn']
+        
+        # Spread the obstacles out, spaced apart and clear of the spawn points.
+        # The margin keeps even the largest obstacle away from the edges.
+        margin = OBSTACLE_VARS['max_size'] // 2 + 50
+        spots = poisson_disk_sample(
+            margin, margin, self.arena.width - margin, self.arena.height - margin,
+            OBSTACLE_VARS['min_distance_between'], random, obstacle_count,
+            [(x, y, clearance) for x, y in spawn_points]
+        )
         
-        attempts = 0
-        max_attempts = 100
+        if len(spots) < obstacle_count:
+            print(f"Arena only has room for {len(spots)} of {obstacle_count} obstacles")
         
-        while len(self.obstacles) < obstacle_count and attempts < max_attempts:
-            attempts += 1
-            
+        for x, y in spots:
             # Random size
             width = random.randint(OBSTACLE_VARS['min_size'], OBSTACLE_VARS['max_size'])
             height = random.randint(OBSTACLE_VARS['min_size'], OBSTACLE_VARS['max_size'])
-            
-            # Random position (keep away from edges)
-            x = random.randint(width//2 + 50, SCREEN_WIDTH - width//2 - 50)
-            y = random.randint(height//2 + 50, SCREEN_HEIGHT - height//2 - 50)
-            
-            # Check if this position is valid
-            valid_position = True
-            
-            # Check distance from player spawn points
-            spawn_points = [
-                (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2),  # Single player spawn
-                (SCREEN_WIDTH // 3, SCREEN_HEIGHT // 2),  # Coop player 1 spawn
-                (2 * SCREEN_WIDTH // 3, SCREEN_HEIGHT // 2)  # Coop player 2 spawn
-            ]
-            
-            for spawn_x, spawn_y in spawn_points:
-                distance = math.sqrt((x - spawn_x)**2 + (y - spawn_y)**2)
-                if distance < OBSTACLE_VARS['min_distance_from_spawn']:
-                    valid_position = False
-                    break
-            
-            # Check distance from other obstacles
-            if valid_position:
-                for obstacle in self.obstacles:
-                    distance = math.sqrt((x - obstacle.x)**2 + (y - obstacle.y)**2)
-                    if distance < OBSTACLE_VARS['min_distance_between']:
-                        valid_position = False
-                        break
-            
-            if valid_position:
-                self.obstacles.append(Obstacle(x, y, width, height))
+            self.obstacles.append(Obstacle(int(x), int(y), width, height))
     
     def reset_game(self):
         self.players = []
         self.enemies = []
-        self.player_missiles = []
-        self.enemy_missiles = []
+        self.world.clear()
         self.wave = 1
         self.enemies_remaining = 0
-        self.effects = []
         self.pending_level_ups = []
         self.powerups = []
-        self.last_powerup_spawn = pygame.time.get_ticks()
+        self.timers.clear()
+        self.last_powerup_spawn = GAME_CLOCK.ticks()
+        self.schedule_powerup_spawn()
 
         # Reset enemy spawning system
         self.enemies_to_spawn = []
         self.wave_start_time = 0
         self.is_spawning_wave = False
+        self.enemy_spawn_timer = None
 
         # Reset enemy upgrade multipliers
-        self.global_enemy_multipliers = {
-            'movement_speed': 1.0,
-            'shot_speed': 1.0,
-            'shot_distance': 1.0,
-            'health': 1.0,
-            'damage': 1.0
-        }
+        self.enemy_profile = EnemyProfile()
         
         # Create players
-        if self.coop_mode:
-            self.players.append(Tank(SCREEN_WIDTH // 3, SCREEN_HEIGHT // 2, True, 1))
-            self.players.append(Tank(2 * SCREEN_WIDTH // 3, SCREEN_HEIGHT // 2, True, 2))
-        else:
-            self.players.append(Tank(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, True, 1))
+        for player_num, (x, y) in enumerate(self.player_start_positions(self.coop_mode), 1):
+            player = Tank(x, y, True, player_num, self.arena, self.timers)
+            player.entity_id = self.world.allocate()
+            self.players.append(player)
         
         self.generate_obstacles()  # Generate obstacles before spawning wave
         self.spawn_wave()
     
+    def player_start_positions(self, coop_mode):
+        """Where player 1 (and player 2 in co-op) start each wave"""
+        center_x, center_y = self.arena.width // 2, self.arena.height // 2
+        if not coop_mode:
+            return [(center_x, center_y)]
+        if self.arena.width <= self.screen_width:
+            return [(self.arena.width // 3, center_y), (2 * self.arena.width // 3, center_y)]
+        # In a scrolling arena both tanks start around the centre, within one screen
+        spacing = self.screen_width // 6
+        return [(center_x - spacing, center_y), (center_x + spacing, center_y)]
+
     def reset_players_to_start_positions(self):
         """Reset players to their starting positions"""
-        if self.coop_mode:
-            if len(self.players) >= 1:
-                self.players[0].x = SCREEN_WIDTH // 3
-                self.players[0].y = SCREEN_HEIGHT // 2
-                self.players[0].angle = 0
-                if self.players[0].trail:
-                    self.players[0].trail.trail_points = []  # Clear trail
-            if len(self.players) >= 2:
-                self.players[1].x = 2 * SCREEN_WIDTH // 3
-                self.players[1].y = SCREEN_HEIGHT // 2
-                self.players[1].angle = 0
-                if self.players[1].trail:
-                    self.players[1].trail.trail_points = []  # Clear trail
-        else:
-            if len(self.players) >= 1:
-                self.players[0].x = SCREEN_WIDTH // 2
-                self.players[0].y = SCREEN_HEIGHT // 2
-                self.players[0].angle = 0
-                if self.players[0].trail:
-                    self.players[0].trail.trail_points = []  # Clear trail
+        for player, (x, y) in zip(self.players, self.player_start_positions(self.coop_mode)):
+            player.x = x
+            player.y = y
+            player.angle = 0
+            if player.trail:
+                player.trail.trail_points = []  # Clear trail
 
     def spawn_wave(self):
         # Reset players to starting positions
@@ -1986,23 +3706,18 @@ class Game:
         self.enemies = []
         self.enemies_to_spawn = []
         
+        # Enemies drive in from off-screen, entering where the edge is clear of obstacles
+        entries = self.free_space('enemy_entry').sample(
+            random, enemy_count, [(player.x, player.y) for player in self.players],
+            GAME_VARS['spawn_clearance_from_players'])
+        
         # Generate spawn positions and times for all enemies
         for i in range(enemy_count):
-            # Spawn enemies around the edges of the screen
-            side = random.randint(0, 3)  # 0=top, 1=right, 2=bottom, 3=left
-            
-            if side == 0:  # Top
-                x = random.randint(0, SCREEN_WIDTH)
-                y = -GAME_VARS['spawn_distance']
-            elif side == 1:  # Right
-                x = SCREEN_WIDTH + GAME_VARS['spawn_distance']
-                y = random.randint(0, SCREEN_HEIGHT)
-            elif side == 2:  # Bottom
-                x = random.randint(0, SCREEN_WIDTH)
-                y = SCREEN_HEIGHT + GAME_VARS['spawn_distance']
-            else:  # Left
-                x = -GAME_VARS['spawn_distance']
-                y = random.randint(0, SCREEN_HEIGHT)
+            if entries:
+                x, y = self.offscreen_spawn_point(*entries[i])
+            else:
+                # No clear entry anywhere, so any point on the edge will do
+                x, y = self.offscreen_spawn_point(random.randint(0, self.arena.width), 0)
             
             # Calculate spawn time: immediate for first enemy, then staggered
             spawn_time = i * GAME_VARS['enemy_spawn_delay']
@@ -2014,11 +3729,44 @@ class Game:
             })
         
         # Start wave spawning
-        self.wave_start_time = pygame.time.get_ticks()
+        self.wave_start_time = GAME_CLOCK.ticks()
         self.is_spawning_wave = True
         self.enemies_remaining = enemy_count
+        self.timers.cancel(self.enemy_spawn_timer)
+        self.enemy_spawn_timer = self.timers.schedule(self.wave_start_time, self.update_enemy_spawning)
     
 
+    def offscreen_spawn_point(self, x, y):
+        """Move a point near the arena edge out past its nearest edge by spawn_distance"""
+        distance = GAME_VARS['spawn_distance']
+        nearest = min((x, 'left'), (self.arena.width - x, 'right'), (y, 'top'), (self.arena.height - y, 'bottom'))
+        if nearest[1] == 'left':
+            return -distance, y
+        if nearest[1] == 'right':
+            return self.arena.width + distance, y
+        if nearest[1] == 'top':
+            return x, -distance
+        return x, self.arena.height + distance
+
+    def free_space(self, kind):
+        """Free-space index for placing a powerup or an enemy, rebuilt when the obstacles change"""
+        index = self.free_space_indexes.get(kind)
+        if index is None or index.obstacles is not self.obstacles:
+            arena_rect = pygame.Rect(0, 0, self.arena.width, self.arena.height)
+            cell_size = ARENA_VARS['free_space_cell']
+            if kind == 'powerup':
+                margin = POWERUP_VARS['edge_margin']
+                index = FreeSpaceIndex(arena_rect.inflate(-2 * margin, -2 * margin), cell_size,
+                                       self.obstacles, POWERUP_VARS['obstacle_clearance'])
+            else:
+                # Band along the edges where an enemy is first pushed into the arena
+                depth = max(ENEMY_VARS['tank_size'])
+                clearance = int(math.hypot(*ENEMY_VARS['tank_size']) / 2)
+                index = FreeSpaceIndex(arena_rect, cell_size, self.obstacles, clearance,
+                                       hole=arena_rect.inflate(-2 * depth, -2 * depth))
+            self.free_space_indexes[kind] = index
+        return index
+
     def advance_to_next_wave(self):
         """Handle advancement to the next wave, including enemy upgrades"""
         print(f"Wave {self.wave} completed. Next enemy upgrade at wave {self.waves_until_enemy_upgrade}")
@@ -2035,209 +3783,158 @@ class Game:
             self.spawn_wave()
 
     def update_enemy_spawning(self):
-        """Handle staggered enemy spawning"""
-        if not self.is_spawning_wave or not self.enemies_to_spawn:
+        """Timer callback: spawn the queued enemies that are due, then wait for the next one.
+
+        The queue is in spawn order, so due enemies are always at its front.
+        """
+        if not self.is_spawning_wave:
             return
-            
-        current_time = pygame.time.get_ticks()
-        elapsed_time = current_time - self.wave_start_time
-        
-        # Check if any enemies are ready to spawn
-        enemies_spawned = []
-        for enemy_data in self.enemies_to_spawn:
-            if elapsed_time >= enemy_data['spawn_time']:
-                # Spawn this enemy with upgrades
-                new_enemy = self.create_upgraded_enemy(enemy_data['x'], enemy_data['y'])
-                self.enemies.append(new_enemy)
-                enemies_spawned.append(enemy_data)
-        
-        # Remove spawned enemies from the queue
-        for spawned_enemy in enemies_spawned:
-            self.enemies_to_spawn.remove(spawned_enemy)
         
-        # Check if all enemies have been spawned
-        if not self.enemies_to_spawn:
+        elapsed_time = GAME_CLOCK.ticks() - self.wave_start_time
+        queue = self.enemies_to_spawn
+        spawned = 0
+        while spawned < len(queue) and elapsed_time >= queue[spawned]['spawn_time']:
+            # Spawn this enemy with upgrades
+            enemy_data = queue[spawned]
+            self.enemies.append(self.create_upgraded_enemy(enemy_data['x'], enemy_data['y']))
+            spawned += 1
+        del queue[:spawned]
+        
+        self.timers.cancel(self.enemy_spawn_timer)
+        if queue:
+            self.enemy_spawn_timer = self.timers.schedule(
+                self.wave_start_time + queue[0]['spawn_time'], self.update_enemy_spawning)
+        else:
             self.is_spawning_wave = False
 
     def spawn_powerup(self):
-        """Spawn a new powerup at a random location"""
-        attempts = 0
-        max_attempts = 50
-        
-        while attempts < max_attempts:
-            attempts += 1
-            
-            # Random position
-            x = random.randint(100, SCREEN_WIDTH - 100)
-            y = random.randint(100, SCREEN_HEIGHT - 100)
-            
-            # Check if position is valid (not too close to tanks or obstacles)
-            valid_position = True
-            
-            # Check distance from all tanks (players and enemies)
-            all_tanks = self.players + self.enemies
-            for tank in all_tanks:
-                distance = math.sqrt((x - tank.x)**2 + (y - tank.y)**2)
-                if distance < POWERUP_VARS['min_distance_from_tanks']:
-                    valid_position = False
-                    break
-            
-            # Check distance from obstacles
-            if valid_position:
-                for obstacle in self.obstacles:
-                    # Simple check if powerup would overlap with obstacle
-                    if (abs(x - obstacle.x) < obstacle.width//2 + 40 and 
-                        abs(y - obstacle.y) < obstacle.height//2 + 40):
-                        valid_position = False
-                        break
-            
-            if valid_position:
-                # Choose random powerup type
-                powerup_types = ['shield', 'speed', 'rapid_fire', 'shotgun', 'homing']
-                powerup_type = random.choice(powerup_types)
-                self.powerups.append(Powerup(x, y, powerup_type))
-                break
+        """Spawn a new powerup at a random spot clear of tanks and obstacles"""
+        tanks = [(tank.x, tank.y) for tank in self.players + self.enemies]
+        spots = self.free_space('powerup').sample(random, 1, tanks, POWERUP_VARS['min_distance_from_tanks'])
+        if spots:
+            x, y = spots[0]
+            # Choose random powerup type
+            powerup_types = ['shield', 'speed', 'rapid_fire', 'shotgun', 'homing']
+            powerup_type = random.choice(powerup_types)
+            self.powerups.append(Powerup(x, y, powerup_type))
     
+    def schedule_powerup_spawn(self):
+        self.powerup_spawn_timer = self.timers.schedule(
+            self.last_powerup_spawn + POWERUP_VARS['spawn_frequency'] + 1, self.update_powerup_spawning)
+
     def update_powerup_spawning(self):
-        """Handle automatic powerup spawning"""
-        current_time = pygame.time.get_ticks()
-        
-        # Check if it's time to spawn a new powerup
-        if (current_time - self.last_powerup_spawn > POWERUP_VARS['spawn_frequency'] and
-            len(self.powerups) < POWERUP_VARS['max_powerups']):
+        """Timer callback: spawn a powerup if there is room, then wait spawn_frequency again"""
+        if len(self.powerups) >= POWERUP_VARS['max_powerups']:
+            self.powerup_spawn_timer = None  # Rescheduled when a powerup is picked up
+            return
+        self.spawn_powerup()
+        self.last_powerup_spawn = GAME_CLOCK.ticks()
+        self.schedule_powerup_spawn()
+
+    def add_effect(self, x, y, effect_type):
+        effect = spawn_effect(self.world, x, y, effect_type, self.quality.settings['particle_fraction'])
+        self.timers.schedule(GAME_CLOCK.ticks() + effect_duration(effect_type),
+                             expire_effect, self.effects, self.particles, effect)
+        return effect
+
+    def spawn_shot(self, owner, x, y, angle, homing=False, max_distance=None):
+        """Add one shot fired by owner to the world, returning its entity id"""
+        return self.world.spawn(
+            'player_shots' if owner.is_player else 'enemy_shots',
+            x=x, y=y, prev_x=x, prev_y=y, angle=angle, speed=owner.shot_speed,
+            max_distance=owner.shot_distance if max_distance is None else max_distance,
+            traveled=0, owner=owner.entity_id, homing=homing, target=None, blocked_at=None)
+
+    def add_shots(self, owner, shots):
+        """Spawn the (x, y, angle, homing) shots returned by owner.shoot()"""
+        for x, y, angle, homing in shots:
+            self.spawn_shot(owner, x, y, angle, homing)
+
+    def read_player_commands(self):
+        """Sample keyboard and controllers into one command per player.
+
+        A command is (forward, backward, left, right, fire), each counting how
+        many bound inputs are held, so holding a key and a stick together
+        still applies the action twice.
+        """
+        keys = pygame.key.get_pressed()
+        
+        # Player 1 controls (WASD + Space), Player 2 (Arrow keys + Right Ctrl) only in coop mode
+        bindings = [(pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d, pygame.K_SPACE)]
+        if self.coop_mode:
+            bindings.append((pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_RCTRL))
+        
+        commands = []
+        for i, (up_key, down_key, left_key, right_key, fire_key) in enumerate(bindings[:len(self.players)]):
+            forward = int(keys[up_key])
+            backward = int(keys[down_key])
+            turn_left = int(keys[left_key])
+            turn_right = int(keys[right_key])
+            fire = int(keys[fire_key])
+            
+            # Controller support: left stick and D-pad both move, A button fires
+            if len(self.joysticks) > i:
+                joy = self.joysticks[i]
+                hat = joy.get_hat(0)
+                forward += int(joy.get_axis(1) < -0.5) + int(hat[1] == 1)
+                backward += int(joy.get_axis(1) > 0.5) + int(hat[1] == -1)
+                turn_left += int(joy.get_axis(0) < -0.5) + int(hat[0] == -1)
+                turn_right += int(joy.get_axis(0) > 0.5) + int(hat[0] == 1)
+                fire += int(joy.get_button(0))
             
-            self.spawn_powerup()
-            self.last_powerup_spawn = current_time
+            commands.append((forward, backward, turn_left, turn_right, fire))
+        return commands
+
+    def apply_player_command(self, player, command):
+        """Move, turn and fire a player tank according to a command tuple"""
+        forward, backward, turn_left, turn_right, fire = command
+        
+        # Check movement before applying it
+        for _ in range(forward):
+            new_x = player.x + math.cos(player.angle) * player.movement_speed
+            new_y = player.y + math.sin(player.angle) * player.movement_speed
+            if not player.check_obstacle_collision(self.obstacles, new_x, new_y) and self.within_leash(player, new_x, new_y):
+                player.move_forward()
+        
+        for _ in range(backward):
+            new_x = player.x - math.cos(player.angle) * player.movement_speed
+            new_y = player.y - math.sin(player.angle) * player.movement_speed
+            if not player.check_obstacle_collision(self.obstacles, new_x, new_y) and self.within_leash(player, new_x, new_y):
+                player.move_backward()
+        
+        for _ in range(turn_left):
+            player.turn_left()
+        for _ in range(turn_right):
+            player.turn_right()
+        
+        for _ in range(fire):
+            self.add_shots(player, player.shoot())
+
+    def within_leash(self, player, x, y):
+        """Whether a co-op player at (x, y) stays on screen with the others.
+
+        The camera follows the players' midpoint, so keeping their spread
+        inside the view (less a margin for the tanks themselves) keeps every
+        living player visible in an arena larger than the screen.
+        """
+        max_dx = self.camera.width - ARENA_VARS['coop_leash_margin']
+        max_dy = self.camera.height - ARENA_VARS['coop_leash_margin']
+        for other in self.players:
+            if other is player or getattr(other, 'is_dead', False):
+                continue
+            if self.arena.width > self.camera.width and abs(x - other.x) > max(max_dx, abs(player.x - other.x)):
+                return False
+            if self.arena.height > self.camera.height and abs(y - other.y) > max(max_dy, abs(player.y - other.y)):
+                return False
+        return True
 
     def handle_input(self):
-            keys = pygame.key.get_pressed()
-        
-            if self.state == "game":
-                # Player 1 controls (WASD + Space)
-                if len(self.players) >= 1:
-                    player1 = self.players[0]
-                
-                    # Check movement before applying it
-                    if keys[pygame.K_w]:
-                        new_x = player1.x + math.cos(player1.angle) * player1.movement_speed
-                        new_y = player1.y + math.sin(player1.angle) * player1.movement_speed
-                        if not player1.check_obstacle_collision(self.obstacles, new_x, new_y):
-                            player1.move_forward()
-                
-                    if keys[pygame.K_s]:
-                        new_x = player1.x - math.cos(player1.angle) * player1.movement_speed
-                        new_y = player1.y - math.sin(player1.angle) * player1.movement_speed
-                        if not player1.check_obstacle_collision(self.obstacles, new_x, new_y):
-                            player1.move_backward()
-                
-                    if keys[pygame.K_a]:
-                        player1.turn_left()
-                    if keys[pygame.K_d]:
-                        player1.turn_right()
-                    if keys[pygame.K_SPACE]:
-                        missiles = player1.shoot(self.enemies)
-                        if missiles:
-                            self.player_missiles.extend(missiles)
-                
-                    # Controller support for Player 1
-                    if len(self.joysticks) >= 1:
-                        joy = self.joysticks[0]
-                        # Left stick for movement
-                        if joy.get_axis(1) < -0.5:  # Up
-                            new_x = player1.x + math.cos(player1.angle) * player1.movement_speed
-                            new_y = player1.y + math.sin(player1.angle) * player1.movement_speed
-                            if not player1.check_obstacle_collision(self.obstacles, new_x, new_y):
-                                player1.move_forward()
-                        if joy.get_axis(1) > 0.5:   # Down
-                            new_x = player1.x - math.cos(player1.angle) * player1.movement_speed
-                            new_y = player1.y - math.sin(player1.angle) * player1.movement_speed
-                            if not player1.check_obstacle_collision(self.obstacles, new_x, new_y):
-                                player1.move_backward()
-                        if joy.get_axis(0) < -0.5:  # Left
-                            player1.turn_left()
-                        if joy.get_axis(0) > 0.5:   # Right
-                            player1.turn_right()
-                        # D-pad controls
-                        if joy.get_hat(0)[1] == 1:  # D-pad Up
-                            new_x = player1.x + math.cos(player1.angle) * player1.movement_speed
-                            new_y = player1.y + math.sin(player1.angle) * player1.movement_speed
-                            if not player1.check_obstacle_collision(self.obstacles, new_x, new_y):
-                                player1.move_forward()
-                        if joy.get_hat(0)[1] == -1:  # D-pad Down
-                            new_x = player1.x - math.cos(player1.angle) * player1.movement_speed
-                            new_y = player1.y - math.sin(player1.angle) * player1.movement_speed
-                            if not player1.check_obstacle_collision(self.obstacles, new_x, new_y):
-                                player1.move_backward()
-                        if joy.get_hat(0)[0] == -1:  # D-pad Left
-                            player1.turn_left()
-                        if joy.get_hat(0)[0] == 1:   # D-pad Right
-                            player1.turn_right()
-                        if joy.get_button(0):  # A button
-                            missiles = player1.shoot(self.enemies)
-                            if missiles:
-                                self.player_missiles.extend(missiles)
-            
-                # Player 2 controls (Arrow keys + Right Ctrl) - only in coop mode
-                if self.coop_mode and len(self.players) >= 2:
-                    player2 = self.players[1]
-                
-                    if keys[pygame.K_UP]:
-                        new_x = player2.x + math.cos(player2.angle) * player2.movement_speed
-                        new_y = player2.y + math.sin(player2.angle) * player2.movement_speed
-                        if not player2.check_obstacle_collision(self.obstacles, new_x, new_y):
-                            player2.move_forward()
-                
-                    if keys[pygame.K_DOWN]:
-                        new_x = player2.x - math.cos(player2.angle) * player2.movement_speed
-                        new_y = player2.y - math.sin(player2.angle) * player2.movement_speed
-                        if not player2.check_obstacle_collision(self.obstacles, new_x, new_y):
-                            player2.move_backward()
-                
-                    if keys[pygame.K_LEFT]:
-                        player2.turn_left()
-                    if keys[pygame.K_RIGHT]:
-                        player2.turn_right()
-                    if keys[pygame.K_RCTRL]:
-                        missiles = player2.shoot(self.enemies)
-                        if missiles:
-                            self.player_missiles.extend(missiles)
-                
-                    # Controller support for Player 2
-                    if len(self.joysticks) >= 2:
-                        joy = self.joysticks[1]
-                        if joy.get_axis(1) < -0.5:
-                            new_x = player2.x + math.cos(player2.angle) * player2.movement_speed
-                            new_y = player2.y + math.sin(player2.angle) * player2.movement_speed
-                            if not player2.check_obstacle_collision(self.obstacles, new_x, new_y):
-                                player2.move_forward()
-                        if joy.get_axis(1) > 0.5:
-                            new_x = player2.x - math.cos(player2.angle) * player2.movement_speed
-                            new_y = player2.y - math.sin(player2.angle) * player2.movement_speed
-                            if not player2.check_obstacle_collision(self.obstacles, new_x, new_y):
-                                player2.move_backward()
-                        if joy.get_axis(0) < -0.5:
-                            player2.turn_left()
-                        if joy.get_axis(0) > 0.5:
-                            player2.turn_right()
-                        # D-pad controls for Player 2
-                        if joy.get_hat(0)[1] == 1:  # D-pad Up
-                            new_x = player2.x + math.cos(player2.angle) * player2.movement_speed
-                            new_y = player2.y + math.sin(player2.angle) * player2.movement_speed
-                            if not player2.check_obstacle_collision(self.obstacles, new_x, new_y):
-                                player2.move_forward()
-                        if joy.get_hat(0)[1] == -1:  # D-pad Down
-                            new_x = player2.x - math.cos(player2.angle) * player2.movement_speed
-                            new_y = player2.y - math.sin(player2.angle) * player2.movement_speed
-                            if not player2.check_obstacle_collision(self.obstacles, new_x, new_y):
-                                player2.move_backward()
-                        if joy.get_hat(0)[0] == -1:  # D-pad Left
-                            player2.turn_left()
-                        if joy.get_hat(0)[0] == 1:   # D-pad Right
-                            player2.turn_right()
-                        if joy.get_button(0):
-                            missiles = player2.shoot(self.enemies)
-                            if missiles:
-                                self.player_missiles.extend(missiles)
+        if self.state == "game":
+            commands = self.read_player_commands()
+            if self.recorder:
+                self.recorder.record_commands(commands)
+            for player, command in zip(self.players, commands):
+                self.apply_player_command(player, command)
 
     def check_for_enemy_upgrade(self):
         """Check if enemies should be upgraded this wave"""
@@ -2270,39 +3967,24 @@ class Game:
             'percentage': upgrade_percentage
         }
         
-        # Update global multipliers
-        multiplier = 1.0 + (upgrade_percentage / 100.0)
-        self.global_enemy_multipliers[upgrade_type] *= multiplier
-        
-        # Apply upgrade to all existing enemies
-        for enemy in self.enemies:
-            if hasattr(enemy, 'upgrade_multipliers'):
-                enemy.upgrade_multipliers[upgrade_type] *= multiplier
-                
-                # Apply the actual stat changes
-                if upgrade_type == 'movement_speed':
-                    enemy.movement_speed = enemy.base_movement_speed * enemy.upgrade_multipliers['movement_speed']
-                elif upgrade_type == 'shot_speed':
-                    enemy.shot_speed = enemy.base_shot_speed * enemy.upgrade_multipliers['shot_speed']
-                elif upgrade_type == 'shot_distance':
-                    enemy.shot_distance = enemy.base_shot_distance * enemy.upgrade_multipliers['shot_distance']
-                elif upgrade_type == 'health':
-                    old_max = enemy.max_health
-                    enemy.max_health = int(enemy.base_max_health * enemy.upgrade_multipliers['health'])
-                    # Heal proportionally
-                    health_ratio = enemy.health / old_max if old_max > 0 else 1.0
-                    enemy.health = int(enemy.max_health * health_ratio)
-                elif upgrade_type == 'damage':
-                    enemy.damage = int(enemy.base_damage * enemy.upgrade_multipliers['damage'])
+        # Every enemy, live or yet to spawn, reads its stats from the shared profile
+        old_max = self.enemy_profile.max_health
+        self.enemy_profile.upgrade(upgrade_type, 1.0 + (upgrade_percentage / 100.0))
+        if upgrade_type == 'health':
+            # Health is per enemy: heal any live ones proportionally (upgrades normally
+            # happen between waves, when there are none)
+            for enemy in self.enemies:
+                health_ratio = enemy.health / old_max if old_max > 0 else 1.0
+                enemy.health = int(enemy.max_health * health_ratio)
     
     def draw_enemy_upgrade_warning(self):
         # Draw warning background image with blur effect
         if self.warning_image:
-            blurred_warning = self.create_blur_effect(self.warning_image, blur_radius=20)
+            blurred_warning = self.get_blurred(self.warning_image, 20)
             self.screen.blit(blurred_warning, (0, 0))
         elif self.title_image:
             # Fallback to title image
-            blurred_title = self.create_blur_effect(self.title_image, blur_radius=20)
+            blurred_title = self.get_blurred(self.title_image, 20)
             self.screen.blit(blurred_title, (0, 0))
         else:
             self.screen.fill((100, 50, 50))  # Dark red background
@@ -2313,7 +3995,7 @@ class Game:
         
         # Warning title
         warning_text = font_large.render("⚠ ENEMY UPGRADE DETECTED ⚠", True, RED)
-        warning_rect = warning_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//3))
+        warning_rect = warning_text.get_rect(center=(self.screen_width//2, self.screen_height//3))
         self.screen.blit(warning_text, warning_rect)
         
         if self.enemy_upgrade_info:
@@ -2322,137 +4004,123 @@ class Game:
             
             # Upgrade details
             upgrade_text = font_medium.render(f"Enemy {upgrade_type} increased by {upgrade_percentage}%!", True, YELLOW)
-            upgrade_rect = upgrade_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
+            upgrade_rect = upgrade_text.get_rect(center=(self.screen_width//2, self.screen_height//2))
             self.screen.blit(upgrade_text, upgrade_rect)
             
             # Additional warning
             warning_detail = font_small.render("All enemy tanks have been enhanced!", True, WHITE)
-            detail_rect = warning_detail.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 60))
+            detail_rect = warning_detail.get_rect(center=(self.screen_width//2, self.screen_height//2 + 60))
             self.screen.blit(warning_detail, detail_rect)
         
         # Continue instruction
         continue_text = font_small.render("Press ENTER/SPACE or A Button to continue", True, GRAY)
-        continue_rect = continue_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT - 100))
+        continue_rect = continue_text.get_rect(center=(self.screen_width//2, self.screen_height - 100))
         self.screen.blit(continue_text, continue_rect)
 
+    def continue_after_enemy_upgrade(self):
+        """Leave the enemy upgrade warning and start the next wave"""
+        if self.recorder:
+            self.recorder.record_event('continue_after_enemy_upgrade')
+        self.state = "game"
+        self.wave += 1  # NOW increment the wave
+        self.generate_obstacles()
+        self.spawn_wave()
+        self.pending_enemy_upgrade = False
+
     def create_upgraded_enemy(self, x, y):
         """Create a new enemy with all current upgrades applied"""
-        enemy = Tank(x, y, False)
-        
-        # Apply global multipliers to new enemy
-        for upgrade_type, multiplier in self.global_enemy_multipliers.items():
-            enemy.upgrade_multipliers[upgrade_type] = multiplier
-            
-            # Apply the actual stat changes
-            if upgrade_type == 'movement_speed':
-                enemy.movement_speed = enemy.base_movement_speed * multiplier
-            elif upgrade_type == 'shot_speed':
-                enemy.shot_speed = enemy.base_shot_speed * multiplier
-            elif upgrade_type == 'shot_distance':
-                enemy.shot_distance = enemy.base_shot_distance * multiplier
-            elif upgrade_type == 'health':
-                enemy.max_health = int(enemy.base_max_health * multiplier)
-                enemy.health = enemy.max_health
-            elif upgrade_type == 'damage':
-                enemy.damage = int(enemy.base_damage * multiplier)
-        
+        enemy = EnemyTank(x, y, self.enemy_profile, self.arena)
+        enemy.entity_id = self.world.allocate()
         return enemy
 
     def update(self):
         if self.state == "game":
 
-            # Update enemy spawning
-            self.update_enemy_spawning()
+            profiler = self.profiler
+            profiler.lap('input')
 
-            # Update powerup spawning
-            self.update_powerup_spawning()
+            # Enemy and powerup spawns, powerup expiry and effect lifetimes that are due
+            self.timers.run_due(GAME_CLOCK.ticks())
+            profiler.lap('timers')
             
             # Update powerups
-            for powerup in self.powerups[:]:
+            for powerup in self.powerups:
                 powerup.update()
-            
-            # Update player powerups
-            for player in self.players:
-                player.update_powerups()
+            profiler.lap('powerups')
             
             # Update missiles
-            self.player_missiles = [m for m in self.player_missiles if not m.update()]
-            self.enemy_missiles = [m for m in self.enemy_missiles if not m.update()]
+            steer_homing_shots(self.player_shots, self.enemies)
+            move_shots(self.player_shots)
+            move_shots(self.enemy_shots)
+            profiler.lap('missiles')
             
             # Update effects
-            self.effects = [e for e in self.effects if not e.update()]
+            update_effects(self.effects, self.particles)
+            profiler.lap('effects')
             
             # Update enemy AI and collect missiles
             for enemy in self.enemies[:]:
-                missiles = enemy.update_ai(self.players, self.obstacles)
-                if missiles:
-                    self.enemy_missiles.extend(missiles)
-            
-            # Check collisions - missiles vs obstacles
-            for missile in self.player_missiles[:]:
-                for obstacle in self.obstacles:
-                    if missile.get_rect().colliderect(obstacle.get_rect()):
-                        self.player_missiles.remove(missile)
-                        break
-            
-            for missile in self.enemy_missiles[:]:
-                for obstacle in self.obstacles:
-                    if missile.get_rect().colliderect(obstacle.get_rect()):
-                        self.enemy_missiles.remove(missile)
-                        break
+                shots = enemy.update_ai(self.players, self.obstacles)
+                if shots:
+                    self.add_shots(enemy, shots)
+            profiler.lap('ai')
+            
+            # Check collisions - missiles vs obstacles. Missiles are swept along their last
+            # move; one that reaches an obstacle is removed after the tank checks, so it
+            # can still hit a tank it passed before the obstacle
+            block_shots(self.player_shots, self.obstacles)
+            block_shots(self.enemy_shots, self.obstacles)
+            profiler.lap('collide_obstacles')
             
             # Check collisions - player vs powerups
-            for powerup in self.powerups[:]:
-                for player in self.players:
-                    if powerup.get_rect().colliderect(player.get_rect()):
-                        player.activate_powerup(powerup.powerup_type)
-                        self.powerups.remove(powerup)
-                        break
+            for powerup, player in powerup_pickups(self.powerups, self.players):
+                player.activate_powerup(powerup.powerup_type)
+                if self.powerup_spawn_timer is None:
+                    self.schedule_powerup_spawn()
+            profiler.lap('collide_powerups')
             
             # Check collisions - player missiles vs enemies
-            for missile in self.player_missiles[:]:
-                for enemy in self.enemies[:]:
-                    if missile.get_rect().colliderect(enemy.get_rect()):
-                        # Award XP only to the player who shot the missile
-                        if missile.player_owner:
-                            missile.player_owner.gain_xp(LEVELING_VARS['xp_per_hit'])
-                        
-                        # Create hit effect
-                        self.effects.append(Effect(enemy.x, enemy.y, 'hit'))
-                        
-                        if enemy.take_damage():
-                            # Award kill XP only to the shooting player
-                            if missile.player_owner:
-                                missile.player_owner.gain_xp(LEVELING_VARS['xp_per_kill'])
-                            
-                            # Create explosion effect
-                            self.effects.append(Effect(enemy.x, enemy.y, 'explosion'))
-                            
-                            self.enemies.remove(enemy)
-                        self.player_missiles.remove(missile)
-                        break
+            players = {player.entity_id: player for player in self.players}
+            targets = {enemy.entity_id: (enemy.get_rect(), enemy) for enemy in self.enemies}
+            for enemy, owner_id in shot_hits(self.player_shots, targets):
+                # Award XP only to the player who shot the missile
+                owner = players[owner_id]
+                owner.gain_xp(LEVELING_VARS['xp_per_hit'])
+                
+                # Create hit effect
+                self.add_effect(enemy.x, enemy.y, 'hit')
+                
+                if enemy.take_damage():
+                    # Award kill XP only to the shooting player
+                    owner.gain_xp(LEVELING_VARS['xp_per_kill'])
+                    
+                    # Create explosion effect
+                    self.add_effect(enemy.x, enemy.y, 'explosion')
+                    
+                    self.enemies.remove(enemy)
+                    del targets[enemy.entity_id]
+            profiler.lap('collide_enemies')
             
             # Check collisions - enemy missiles vs players
-            for missile in self.enemy_missiles[:]:
-                for player in self.players[:]:
-                    if missile.get_rect().colliderect(player.get_rect()):
-                        # Create hit effect
-                        self.effects.append(Effect(player.x, player.y, 'hit'))
-               
-         
-                        # Calculate damage from the enemy that fired this missile
-                        damage = 10  # Default damage
-                        if hasattr(missile, 'owner_tank') and missile.owner_tank:
-                            damage = int(missile.owner_tank.damage)
-            
-                        if player.take_damage(damage):
-                            # Create explosion effect
-                            self.effects.append(Effect(player.x, player.y, 'explosion'))
-                            # Mark player as dead but don't remove from list yet
-                            player.is_dead = True
-                            player.health = 0
-                        self.enemy_missiles.remove(missile)
-                        break
+            targets = {player.entity_id: (player.get_rect(), player) for player in self.players}
+            for player, _ in shot_hits(self.enemy_shots, targets):
+                # Create hit effect
+                self.add_effect(player.x, player.y, 'hit')
+                
+                # Every enemy's damage comes from the shared profile, so a missile
+                # still hits as hard after the enemy that fired it is gone
+                if player.take_damage(int(self.enemy_profile.damage)):
+                    # Create explosion effect
+                    self.add_effect(player.x, player.y, 'explosion')
+                    # Mark player as dead but don't remove from list yet
+                    player.is_dead = True
+                    player.health = 0
+            
+            # Missiles stopped by an obstacle, out of range or out of the arena end here
+            end_shots(self.player_shots, self.arena)
+            end_shots(self.enemy_shots, self.arena)
+            self.world.compact()
+            profiler.lap('collide_players')
             
             # Check win/lose conditions
             alive_players = [p for p in self.players if not getattr(p, 'is_dead', False)]
@@ -2485,15 +4153,9 @@ class Game:
                         player.is_dead = False
                         player.health = player.max_health
                         # Reset position
-                        if player.player_num == 1:
-                            if self.coop_mode:
-                                player.x = SCREEN_WIDTH // 3
-                            else:
-                                player.x = SCREEN_WIDTH // 2
-                            player.y = SCREEN_HEIGHT // 2
-                        elif player.player_num == 2:
-                            player.x = 2 * SCREEN_WIDTH // 3
-                            player.y = SCREEN_HEIGHT // 2
+                        positions = self.player_start_positions(self.coop_mode)
+                        if player.player_num <= len(positions):
+                            player.x, player.y = positions[player.player_num - 1]
                         player.angle = 0
                     else:
                         player.heal_to_full()
@@ -2523,47 +4185,75 @@ class Game:
                 if players_to_level:
                     # Capture background for blur effect
                     self.background_surface = self.screen.copy()
+                    self.get_blurred(self.background_surface, 12)
                     self.pending_level_ups = players_to_level.copy()
                     self.level_up_selection = 0
                     self.state = "level_up"
                 else:
                     # No level ups, advance to next wave
                     self.advance_to_next_wave()
-    def draw_menu(self):
+            profiler.lap('wave_logic')
+
+    def build_menu_backdrop(self):
+        """Compose the static parts of the menu (image, overlay, titles) once"""
+        backdrop = pygame.Surface(self.screen.get_size()).convert()
+        
         # Draw title background image or fallback to tan
         if self.title_image:
-            self.screen.blit(self.title_image, (0, 0))
+            backdrop.blit(self.title_image, (0, 0))
 
             # Optional: Add semi-transparent overlay for better text readability
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            overlay = pygame.Surface((self.screen_width, self.screen_height))
             overlay.set_alpha(100)  # Adjust transparency (0-255, lower = more transparent)
             overlay.fill(BLACK)
-            self.screen.blit(overlay, (0, 0))
+            backdrop.blit(overlay, (0, 0))
         else:
-            self.screen.fill(SAND_COLOR)
+            backdrop.fill(SAND_COLOR)
         
         # Title with pixel art style
-        title_y = SCREEN_HEIGHT // 6
+        title_y = self.screen_height // 6
         title_width, title_height = self.draw_pixel_text(
             "TANKS FOR NOTHING", 
-            SCREEN_WIDTH//2 - 300, 
+            self.screen_width//2 - 300, 
             title_y, 
             84, 
             YELLOW, 
-            BLACK
+            BLACK,
+            backdrop
         )
         
         # Subtitle
         subtitle_y = title_y + title_height + 20
         self.draw_pixel_text(
             "A Co-op Tank Battle Experience", 
-            SCREEN_WIDTH//2 - 200, 
+            self.screen_width//2 - 200, 
             subtitle_y, 
             36, 
             WHITE, 
-            BLACK
+            BLACK,
+            backdrop
         )
         
+        # Controls info
+        controls_y = self.screen_height - 100
+        self.draw_pixel_text(
+            "Use WASD/Arrow Keys or Controller to navigate • ENTER/A Button to select",
+            self.screen_width//2 - 350,
+            controls_y,
+            24,
+            GRAY,
+            BLACK,
+            backdrop
+        )
+        return backdrop
+
+    def draw_menu(self):
+        # Rebuild the cached backdrop only if the title image has changed
+        if self.menu_backdrop is None or self.menu_backdrop_source is not self.title_image:
+            self.menu_backdrop = self.build_menu_backdrop()
+            self.menu_backdrop_source = self.title_image
+        self.screen.blit(self.menu_backdrop, (0, 0))
+        
         # Menu options
         menu_options = [
             "Single Player",
@@ -2572,7 +4262,7 @@ class Game:
             "Quit Game"
         ]
         
-        menu_start_y = SCREEN_HEIGHT//2 - 50
+        menu_start_y = self.screen_height//2 - 50
         
         for i, option in enumerate(menu_options):
             color = YELLOW if i == self.menu_selection else WHITE
@@ -2584,23 +4274,12 @@ class Game:
             option_y = menu_start_y + i * 60
             self.draw_pixel_text(
                 prefix + option,
-                SCREEN_WIDTH//2 - 150,
+                self.screen_width//2 - 150,
                 option_y,
                 48,
                 color,
                 border_color
             )
-        
-        # Controls info
-        controls_y = SCREEN_HEIGHT - 100
-        self.draw_pixel_text(
-            "Use WASD/Arrow Keys or Controller to navigate • ENTER/A Button to select",
-            SCREEN_WIDTH//2 - 350,
-            controls_y,
-            24,
-            GRAY,
-            BLACK
-        )
 
     def draw_high_scores(self):
         """Handle high scores screen with new table-based layout"""
@@ -2615,78 +4294,54 @@ class Game:
             del self.high_score_screen
             return
         elif action == "quit":
-            pygame.quit()
-            sys.exit()
+            self.shutdown()
         
         self.high_score_screen.draw()
 
-    def load_high_scores(self):
-        """Load high scores from file"""
-        try:
-            if os.path.exists('high_scores.json'):
-                with open('high_scores.json', 'r') as f:
-                    self.high_scores = json.load(f)
-            else:
-                self.high_scores = {
-                    'single_player': [],
-                    'coop': []
-                }
-        except:
-            self.high_scores = {
-                'single_player': [],
-                'coop': []
-            }
-
-    def save_high_scores(self):
-        """Save high scores to file"""
-        try:
-            with open('high_scores.json', 'w') as f:
-                json.dump(self.high_scores, f, indent=2)
-        except:
-            pass  # Fail silently if can't save
-    
     def draw_game(self):
-        # Draw sand background image or fallback to sand color
-        if self.sand_image:
-            self.screen.blit(self.sand_image, (0, 0))
-        else:
-            self.screen.fill(SAND_COLOR)
+        profiler = self.profiler
+        alive_players = [player for player in self.players if not getattr(player, 'is_dead', False)]
+        self.camera.follow(alive_players)
+        offset = self.camera.offset
+        view = self.camera.view_rect(ARENA_VARS['cull_margin'])
         
-        # Draw game objects
-        for obstacle in self.obstacles:
-            obstacle.draw(self.screen)
+        # Sand and obstacles come from pre-rendered chunks; only what the camera sees is blitted
+        self.static_layer.draw(self.screen, self.camera, self.sand_image, self.obstacles)
+        profiler.lap('draw_static')
+
+        quality = self.quality.settings
 
         # Draw tank trails (before drawing tanks so trails appear behind them)
-        for player in self.players:
-            if not getattr(player, 'is_dead', False) and player.trail:
-                player.trail.draw(self.screen)
+        for player in alive_players:
+            if player.trail:
+                player.trail.draw(self.screen, offset, view, quality['trail_detail'])
 
         # Draw enemy trails
-        for enemy in self.enemies:
-            if enemy.trail:
-                enemy.trail.draw(self.screen)
+        if quality['enemy_trails']:
+            for enemy in self.enemies:
+                if enemy.trail:
+                    enemy.trail.draw(self.screen, offset, view, quality['trail_detail'])
+        profiler.lap('draw_trails')
         
-        # Draw powerups
+        # Everything below skips entities outside the view
         for powerup in self.powerups:
-            powerup.draw(self.screen)
+            if view.colliderect(powerup.get_rect()):
+                powerup.draw(self.screen, offset)
+        profiler.lap('draw_powerups')
         
         # Only draw alive players
-        for player in self.players:
-            if not getattr(player, 'is_dead', False):
-                player.draw(self.screen)
-        
-        for enemy in self.enemies:
-            enemy.draw(self.screen)
+        for tank in alive_players + self.enemies:
+            if view.colliderect(tank.get_rect()):
+                tank.draw(self.screen, offset)
+        profiler.lap('draw_tanks')
         
-        for missile in self.player_missiles:
-            missile.draw(self.screen)
+        draw_shots(self.screen, self.player_shots, BLUE, offset, view)
+        draw_shots(self.screen, self.enemy_shots, RED, offset, view)
+        profiler.lap('draw_missiles')
         
-        for missile in self.enemy_missiles:
-            missile.draw(self.screen)
-        
-        # Draw effects
-        for effect in self.effects:
-            effect.draw(self.screen)
+        effect_view = self.camera.view_rect(ARENA_VARS['effect_cull_margin'])
+        draw_effects(self.screen, self.effects, self.particles, quality['explosion_rings'], offset, effect_view)
+        profiler.lap('draw_effects')
         
         # Draw HUD
         font = pygame.font.Font(None, 36)
@@ -2754,7 +4409,7 @@ class Game:
             y_offset += 120
 
         # Debug: Show enemy upgrade info
-        if self.enemies:
+        if self.enemies and quality['hud_debug']:
             debug_y = y_offset + 20
             enemy = self.enemies[0]  # Show first enemy's stats
             small_font = pygame.font.Font(None, 24)
@@ -2762,25 +4417,68 @@ class Game:
             debug_text = small_font.render(f"Enemy Stats: Speed={enemy.movement_speed:.1f} Damage={enemy.damage}", True, RED)
             self.screen.blit(debug_text, (10, debug_y))
             
-            multiplier_text = small_font.render(f"Multipliers: Dmg={enemy.upgrade_multipliers['damage']:.2f} Spd={enemy.upgrade_multipliers['movement_speed']:.2f}", True, RED)
+            multiplier_text = small_font.render(f"Multipliers: Dmg={enemy.profile.multipliers['damage']:.2f} Spd={enemy.profile.multipliers['movement_speed']:.2f}", True, RED)
             self.screen.blit(multiplier_text, (10, debug_y + 20))
             
             # Show global multipliers too
-            global_text = small_font.render(f"Global: Dmg={self.global_enemy_multipliers['damage']:.2f} Health={self.global_enemy_multipliers['health']:.2f}", True, RED)
+            global_text = small_font.render(f"Global: Dmg={self.enemy_profile.multipliers['damage']:.2f} Health={self.enemy_profile.multipliers['health']:.2f}", True, RED)
             self.screen.blit(global_text, (10, debug_y + 40))
+        profiler.lap('draw_hud')
     
-    def create_blur_effect(self, surface, blur_radius=8):
-        """Create a nice blur effect by applying multiple passes"""
-        # Create a copy to work with
-        blurred = surface.copy()
-        
-        # Apply multiple blur passes for smoother effect
-        for _ in range(blur_radius):
-            # Scale down and up for blur effect
-            w, h = blurred.get_size()
-            small = pygame.transform.smoothscale(blurred, (w//2, h//2))
-            blurred = pygame.transform.smoothscale(small, (w, h))
-        
+    def get_entity_counts(self):
+        """Live entity counts, used by the profiler overlay and CSV export"""
+        return {
+            'enemies': len(self.enemies),
+            'enemies_queued': len(self.enemies_to_spawn),
+            'player_missiles': len(self.player_shots),
+            'enemy_missiles': len(self.enemy_shots),
+            'effects': len(self.effects),
+            'particles': len(self.particles),
+            'powerups': len(self.powerups),
+            'obstacles': len(self.obstacles),
+            'trail_points': sum(len(tank.trail.trail_points) for tank in self.players + self.enemies),
+        }
+    
+    def create_blur_effect(self, surface, blur_radius=8, smooth=True):
+        """Create a nice blur effect with a single down/up resolution pyramid.
+
+        Without smooth, it scales straight down and back up instead: a little
+        blockier, but cheaper when detail has been turned down.
+        """
+        w, h = surface.get_size()
+        target_w = max(1, w // max(2, blur_radius))
+        target_h = max(1, h // max(2, blur_radius))
+        if not smooth:
+            return pygame.transform.smoothscale(pygame.transform.smoothscale(surface, (target_w, target_h)), (w, h))
+        
+        # Halve down towards the target size so smoothscale averages every pixel
+        blurred = surface
+        current_w, current_h = w, h
+        while current_w // 2 >= target_w and current_h // 2 >= target_h:
+            current_w, current_h = current_w // 2, current_h // 2
+            blurred = pygame.transform.smoothscale(blurred, (current_w, current_h))
+        
+        # Double back up so the upscale stays smooth instead of blocky
+        while current_w * 2 < w and current_h * 2 < h:
+            current_w, current_h = current_w * 2, current_h * 2
+            blurred = pygame.transform.smoothscale(blurred, (current_w, current_h))
+        
+        return pygame.transform.smoothscale(blurred, (w, h))
+    
+    def get_blurred(self, surface, blur_radius):
+        """Return a cached blur of the surface, creating it on first use"""
+        smooth = self.quality.settings['smooth_blur']
+        key = (id(surface), blur_radius, surface.get_size(), smooth)
+        cached = self.blur_cache.get(key)
+        # The source is kept in the entry so its id cannot be reused while cached
+        if cached is not None and cached[0] is surface:
+            self.blur_cache.move_to_end(key)
+            return cached[1]
+        
+        blurred = self.create_blur_effect(surface, blur_radius, smooth)
+        self.blur_cache[key] = (surface, blurred)
+        if len(self.blur_cache) > 4:
+            self.blur_cache.popitem(last=False)
         return blurred
     
     def draw_game_over(self):
@@ -2792,21 +4490,21 @@ class Game:
         # Draw game over background image with blur effect
         if self.gameover_image:
             # Create a blurred version of the game over image
-            blurred_gameover = self.create_blur_effect(self.gameover_image, blur_radius=32)
+            blurred_gameover = self.get_blurred(self.gameover_image, 32)
             self.screen.blit(blurred_gameover, (0, 0))
             
             # Add a subtle dark overlay for better text visibility
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            overlay = pygame.Surface((self.screen_width, self.screen_height))
             overlay.set_alpha(120)  # Slightly more opaque than menu for better readability
             overlay.fill(BLACK)
             self.screen.blit(overlay, (0, 0))
         elif self.title_image:
             # Fallback to title image if gameover image not available
-            blurred_title = self.create_blur_effect(self.title_image, blur_radius=32)
+            blurred_title = self.get_blurred(self.title_image, 32)
             self.screen.blit(blurred_title, (0, 0))
             
             # Add a subtle dark overlay for better text visibility
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            overlay = pygame.Surface((self.screen_width, self.screen_height))
             overlay.set_alpha(120)
             overlay.fill(BLACK)
             self.screen.blit(overlay, (0, 0))
@@ -2816,18 +4514,18 @@ class Game:
         # Title
         self.draw_pixel_text(
             "GAME OVER",
-            SCREEN_WIDTH//2 - 150,
-            SCREEN_HEIGHT//3 - 50,
+            self.screen_width//2 - 150,
+            self.screen_height//3 - 50,
             84,
             RED,
             BLACK
         )
         
         # Stats
-        stats_y = SCREEN_HEIGHT//2 - 50
+        stats_y = self.screen_height//2 - 50
         self.draw_pixel_text(
             f"You reached Wave {self.wave}",
-            SCREEN_WIDTH//2 - 120,
+            self.screen_width//2 - 120,
             stats_y,
             48,
             WHITE,
@@ -2841,7 +4539,7 @@ class Game:
                 score_y = stats_y + 60 + (i * 40)
                 self.draw_pixel_text(
                     f"Player {player.player_num}: Level {player.level}, Score {score}",
-                    SCREEN_WIDTH//2 - 150,
+                    self.screen_width//2 - 150,
                     score_y,
                     32,
                     YELLOW,
@@ -2853,7 +4551,7 @@ class Game:
                 score_y = stats_y + 60 + (i * 40)
                 self.draw_pixel_text(
                     f"Player {player_num}: Level {level}, Score {score}",
-                    SCREEN_WIDTH//2 - 150,
+                    self.screen_width//2 - 150,
                     score_y,
                     32,
                     YELLOW,
@@ -2874,7 +4572,7 @@ class Game:
             if any(score > top_10_threshold for score in current_scores) or len(self.high_scores[mode]) < 10:
                 self.draw_pixel_text(
                     "NEW HIGH SCORE!",
-                    SCREEN_WIDTH//2 - 100,
+                    self.screen_width//2 - 100,
                     stats_y - 60,
                     36,
                     YELLOW,
@@ -2884,8 +4582,8 @@ class Game:
         # Instructions
         self.draw_pixel_text(
             "Press 'R' to Restart • 'ESC' for Menu",
-            SCREEN_WIDTH//2 - 150,
-            SCREEN_HEIGHT - 150,
+            self.screen_width//2 - 150,
+            self.screen_height - 150,
             32,
             GRAY,
             BLACK
@@ -2895,10 +4593,10 @@ class Game:
         # Draw enhanced blurred background
         if self.background_surface:
             # Create a high-quality blur effect
-            blurred_surface = self.create_blur_effect(self.background_surface, blur_radius=12)
+            blurred_surface = self.get_blurred(self.background_surface, 12)
             
             # Add a subtle dark overlay for better text visibility
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            overlay = pygame.Surface((self.screen_width, self.screen_height))
             overlay.set_alpha(60)  # Much lighter darkening
             overlay.fill(BLACK)
             
@@ -2912,14 +4610,11 @@ class Game:
         if not current_player:
             return
         
-        font_large = pygame.font.Font(None, 74)
-        font_medium = pygame.font.Font(None, 48)
-        font_small = pygame.font.Font(None, 36)
-        font_tiny = pygame.font.Font(None, 28)
+        text_renderer = self.text_renderer
         
         # Title
-        title_text = font_large.render("LEVEL UP!", True, YELLOW)
-        title_rect = title_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//4))
+        title_text, _ = text_renderer.render("LEVEL UP!", 74, YELLOW)
+        title_rect = title_text.get_rect(center=(self.screen_width//2, self.screen_height//4))
         self.screen.blit(title_text, title_rect)
         
         # Player info with pending upgrades
@@ -2928,8 +4623,8 @@ class Game:
         if pending_upgrades > 1:
             player_info += f" ({pending_upgrades} upgrades remaining)"
         
-        player_text = font_medium.render(player_info, True, WHITE)
-        player_rect = player_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//4 + 80))
+        player_text, _ = text_renderer.render(player_info, 48, WHITE)
+        player_rect = player_text.get_rect(center=(self.screen_width//2, self.screen_height//4 + 80))
         self.screen.blit(player_text, player_rect)
         
         # Upgrade options with detailed progression info
@@ -2942,7 +4637,7 @@ class Game:
             ("Health", "health")
         ]
         
-        start_y = SCREEN_HEIGHT//2 - 75
+        start_y = self.screen_height//2 - 75
         for i, (display_name, stat_name) in enumerate(options):
             color = WHITE
             prefix = "  "
@@ -2969,12 +4664,12 @@ class Game:
                 prefix = "> "
                 color = YELLOW if can_upgrade else GRAY
             
-            option_text = font_small.render(prefix + full_text, True, color)
-            self.screen.blit(option_text, (SCREEN_WIDTH//2 - 200, start_y + i * 50))
+            option_text, _ = text_renderer.render(prefix + full_text, 36, color)
+            self.screen.blit(option_text, (self.screen_width//2 - 200, start_y + i * 50))
         
         # Instructions
-        instruction_text = font_tiny.render("Use Arrow Keys/WASD to select, ENTER/SPACE to confirm", True, WHITE)
-        instruction_rect = instruction_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT - 100))
+        instruction_text, _ = text_renderer.render("Use Arrow Keys/WASD to select, ENTER/SPACE to confirm", 28, WHITE)
+        instruction_rect = instruction_text.get_rect(center=(self.screen_width//2, self.screen_height - 100))
         self.screen.blit(instruction_text, instruction_rect)
     
     def apply_level_up_choice(self):
@@ -2982,6 +4677,9 @@ class Game:
         if not self.pending_level_ups:
             return
         
+        if self.recorder:
+            self.recorder.record_event('level_up_choice', self.level_up_selection)
+        
         current_player = self.pending_level_ups[0]
         options = ["movement_speed", "shot_speed", "shot_distance", "fire_rate", "powerup_duration", "health"]
         selected_stat = options[self.level_up_selection]
@@ -3025,95 +4723,96 @@ class Game:
     def handle_menu_selection(self):
         """Handle menu selection"""
         if self.menu_selection == 0:  # Single Player
-            self.coop_mode = False
-            self.state = "game"
-            self.reset_game()
+            self.start_session(False)
         elif self.menu_selection == 1:  # Co-op
-            self.coop_mode = True
-            self.state = "game"
-            self.reset_game()
+            self.start_session(True)
         elif self.menu_selection == 2:  # High Scores
             self.state = "high_scores"
             self.high_scores_page = 0
         elif self.menu_selection == 3:  # Quit
-            pygame.quit()
-            sys.exit()
+            self.shutdown()
+
+    def start_session(self, coop_mode, seed=None):
+        """Start a new game, seeding the simulation so it can be recorded and replayed"""
+        self.finish_recording()
+        if seed is None and REPLAY_VARS['record_sessions']:
+            seed = random.randrange(2**32)
+        if seed is not None:
+            random.seed(seed)
+        
+        self.coop_mode = coop_mode
+        self.state = "game"
+        self.pending_enemy_upgrade = False
+        self.waves_until_enemy_upgrade = random.randint(
+            GAME_VARS['enemy_upgrade_min_waves'], 
+            GAME_VARS['enemy_upgrade_max_waves']
+        )
+        GAME_CLOCK.restart()
+        if REPLAY_VARS['record_sessions']:
+            self.recorder = SessionRecorder(seed, coop_mode, self.arena,
+                                            (self.screen_width, self.screen_height))
+        self.reset_game()
+
+    def finish_recording(self):
+        """Save the current session recording, if one is running"""
+        if self.recorder:
+            self.recorder.save(self)
+            self.recorder = None
 
     def calculate_score(self, player):
         """Calculate final score for a player"""
         # Score = (Wave * 1000) + (Level * 500) + XP
         return (self.wave * 1000) + (player.level * 500) + player.xp
 
-    def add_high_score(self, name, score, wave, level, is_coop=False):
-        """Add a new score to the appropriate list"""
-        if is_coop:
-            # For coop, calculate combined score from both players
-            if len(self.players) >= 2:
-                combined_score = self.calculate_score(self.players[0]) + self.calculate_score(self.players[1])
-                player1_name = name  # The name entered
-                player2_name = f"P2"  # You might want to modify NameInputScreen to get both names
-                score_entry = (player1_name, player2_name, wave, combined_score)
-            else:
-                # Fallback for single player in coop mode
-                score_entry = (name, "P2", wave, score)
-            
-            self.high_scores['coop'].append(score_entry)
-            self.high_scores['coop'].sort(key=lambda x: x[3], reverse=True)
-            self.high_scores['coop'] = self.high_scores['coop'][:10]
-        else:
-            score_entry = (name, wave, level, score)
-            self.high_scores['single_player'].append(score_entry)
-            self.high_scores['single_player'].sort(key=lambda x: x[3], reverse=True)
-            self.high_scores['single_player'] = self.high_scores['single_player'][:10]
-        
-        self.save_high_scores()
-
     def load_high_scores(self):
-        """Load high scores from file"""
-        try:
-            if os.path.exists('tank_high_scores.json'):
-                with open('tank_high_scores.json', 'r') as f:
-                    self.high_scores = json.load(f)
-            else:
-                self.high_scores = {
-                    'single_player': [],
-                    'coop': []
-                }
-        except:
-            self.high_scores = {
-                'single_player': [],
-                'coop': []
-            }
-
-    def save_high_scores(self):
-        """Save high scores to file"""
-        try:
-            with open('tank_high_scores.json', 'w') as f:
-                json.dump(self.high_scores, f, indent=2)
-        except:
-            pass  # Fail silently if can't save
+        """Open the score database and cache the top of each table for the UI"""
+        self.score_store = HighScoreStore(HIGH_SCORE_VARS['database'])
+        self.high_scores = {mode: self.score_store.top(mode) for mode in HighScoreStore.MODES}
 
     def is_high_score(self, score, is_coop=False):
         """Check if score qualifies for high score list"""
         scores = self.high_scores['coop'] if is_coop else self.high_scores['single_player']
-        return len(scores) < 10 or (scores and score > scores[-1][3])
+        return len(scores) < HIGH_SCORE_VARS['table_size'] or (scores and score > scores[-1][3])
 
     def add_high_score(self, name, score, wave, level, is_coop=False):
         """Add a new score to the appropriate list"""
         if is_coop:
             # For coop, you might want to handle two player names differently
             # For now, just use the single name for both players
+            mode = 'coop'
             score_entry = (name, name, wave, score)
-            self.high_scores['coop'].append(score_entry)
-            self.high_scores['coop'].sort(key=lambda x: x[3], reverse=True)
-            self.high_scores['coop'] = self.high_scores['coop'][:10]
         else:
+            mode = 'single_player'
             score_entry = (name, wave, level, score)
-            self.high_scores['single_player'].append(score_entry)
-            self.high_scores['single_player'].sort(key=lambda x: x[3], reverse=True)
-            self.high_scores['single_player'] = self.high_scores['single_player'][:10]
         
-        self.save_high_scores()
+        # The database write happens in the background; the cached table updates now
+        self.score_store.add(mode, score_entry)
+        table = self.high_scores[mode]
+        table.append(score_entry)
+        table.sort(key=lambda x: x[3], reverse=True)
+        del table[HIGH_SCORE_VARS['table_size']:]
+
+    def sampling_label(self):
+        """Name of the flame graph file the current frame's samples go to"""
+        if self.state in ("menu", "high_scores"):
+            return "menu"
+        mode = "coop" if self.coop_mode else "single"
+        return f"wave{self.wave:03d}_{mode}"
+
+    def draw(self):
+        """Draw the screen for the current state"""
+        if self.state == "menu":
+            self.draw_menu()
+        elif self.state == "game":
+            self.draw_game()
+        elif self.state == "game_over":
+            self.draw_game_over()
+        elif self.state == "level_up":
+            self.draw_level_up()
+        elif self.state == "enemy_upgrade_warning":
+            self.draw_enemy_upgrade_warning()
+        elif self.state == "high_scores":
+            self.draw_high_scores()
 
     def run(self):
         running = True
@@ -3121,10 +4820,22 @@ class Game:
         # Add input timing to prevent rapid menu scrolling
         last_input_time = 0
         input_delay = 200  # milliseconds
+
+        # The game updates at a fixed rate and the display at the pacer's; frame times within
+        # a millisecond of the target interval count as exact so 60 fps gets one update a frame
+        update_ms = 1000 / PACING_VARS['simulation_hz']
+        frame_ms = 1000 / self.pacer.target_fps
+        max_lag_ms = update_ms * PACING_VARS['max_catch_up_updates']
+        lag_ms = 0.0
+        last_frame_time = time.perf_counter()
         
         while running:
+            self.profiler.begin_frame()
             current_time = pygame.time.get_ticks()
             
+            # Pick up any images the background loader has finished
+            self.assets.poll()
+            
             # Special handling for name input
             if self.state == "game_over" and self.awaiting_name_input:
                 name = self.name_input_screen.handle_events()
@@ -3154,7 +4865,15 @@ class Game:
                         running = False
                     
                     elif event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_ESCAPE:
+                        if event.key == pygame.K_F3:
+                            self.profiler.toggle_overlay()
+                        elif event.key == pygame.K_F4:
+                            self.profiler.toggle_recording()
+                        elif event.key == pygame.K_F5:
+                            self.sampler.toggle(self.sampling_label())
+                        elif event.key == pygame.K_F6:
+                            self.memory_reporter.toggle(self)
+                        elif event.key == pygame.K_ESCAPE:
                             if self.state == "high_scores":
                                 self.state = "menu"
                             else:
@@ -3178,8 +4897,7 @@ class Game:
                             # Only handle game over inputs if NOT awaiting name input
                             if not self.awaiting_name_input:
                                 if event.key == pygame.K_r:
-                                    self.state = "game"
-                                    self.reset_game()
+                                    self.start_session(self.coop_mode)
                                 elif event.key == pygame.K_ESCAPE:
                                     self.state = "menu"
                                     self.menu_selection = 0
@@ -3194,11 +4912,7 @@ class Game:
 
                         elif self.state == "enemy_upgrade_warning":
                             if event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
-                                self.state = "game"
-                                self.wave += 1  # NOW increment the wave
-                                self.generate_obstacles()
-                                self.spawn_wave()
-                                self.pending_enemy_upgrade = False
+                                self.continue_after_enemy_upgrade()
                     
                     # Controller button presses
                     elif event.type == pygame.JOYBUTTONDOWN:
@@ -3214,8 +4928,7 @@ class Game:
                             # Only handle controller inputs if NOT awaiting name input
                             if not self.awaiting_name_input:
                                 if event.button == 0:  # A button - Restart
-                                    self.state = "game"
-                                    self.reset_game()
+                                    self.start_session(self.coop_mode)
                                 elif event.button == 1:  # B button - Menu
                                     self.state = "menu"
                                     self.menu_selection = 0
@@ -3227,11 +4940,7 @@ class Game:
 
                         elif self.state == "enemy_upgrade_warning":
                             if event.button == 0:  # A button
-                                self.state = "game"
-                                self.wave += 1  # NOW increment the wave
-                                self.generate_obstacles()
-                                self.spawn_wave()
-                                self.pending_enemy_upgrade = False
+                                self.continue_after_enemy_upgrade()
                     
                     # Controller D-pad
                     elif event.type == pygame.JOYHATMOTION:
@@ -3289,33 +4998,85 @@ class Game:
                                         self.level_up_selection = (self.level_up_selection + 1) % 6
                                         last_input_time = current_time
             
-            # Handle continuous input (only for game state)
-            if self.state == "game":
-                self.handle_input()
+            self.profiler.lap('events')
             
-            # Update game state
-            self.update()
+            now = time.perf_counter()
+            elapsed_ms = (now - last_frame_time) * 1000
+            last_frame_time = now
+            if abs(elapsed_ms - frame_ms) < 1.0:
+                elapsed_ms = frame_ms
+            lag_ms = min(lag_ms + elapsed_ms, max_lag_ms)
+            while lag_ms >= update_ms:
+                lag_ms -= update_ms
+                # Handle continuous input (only for game state)
+                if self.state == "game":
+                    self.handle_input()
+                
+                # Update game state
+                self.update()
+                if self.recorder and self.state == "game_over":
+                    self.finish_recording()
+                GAME_CLOCK.advance()
+                if self.recorder:
+                    self.recorder.end_frame()
             
             # Draw everything
-            if self.state == "menu":
-                self.draw_menu()
-            elif self.state == "game":
-                self.draw_game()
-            elif self.state == "game_over":
-                self.draw_game_over()
-            elif self.state == "level_up":
-                self.draw_level_up()
-            elif self.state == "enemy_upgrade_warning":
-                self.draw_enemy_upgrade_warning()
-            elif self.state == "high_scores":
-                self.draw_high_scores()
-            
-            pygame.display.flip()
-            self.clock.tick(60)
-        
+            self.draw()
+            self.profiler.lap('draw_screen')
+            
+            if self.profiler.show_overlay:
+                self.profiler.extra_lines = self.pacer.status_lines() + [self.quality.status_line()]
+                self.profiler.draw(self.screen, self.text_renderer.get_font(22))
+            self.profiler.lap('overlay')
+            
+            self.display.present()
+            self.profiler.lap('present')
+            self.pacer.wait()
+            self.profiler.lap('wait')
+            self.profiler.end_frame(self.get_entity_counts() if self.profiler.wants_counts else None)
+            if self.state == "game":
+                # Detail follows gameplay frames only; menus would always look cheap
+                waited = self.profiler.current.get('wait', 0.0)
+                if self.pacer.mode == 'vsync':
+                    waited += self.profiler.current.get('present', 0.0)  # flip blocks until the refresh
+                self.quality.record_frame(self.profiler.last_frame_ms() - waited)
+            self.metrics.record_frame(self.profiler.last_frame_ms(), self.state, self.wave, self.get_entity_counts)
+            
+            self.sampler.set_label(self.sampling_label())
+            self.memory_reporter.check_wave(self)
+        
+        self.shutdown()
+
+    def shutdown(self):
+        """Flush recordings, reports and open files, then exit; every way out of the game ends here"""
+        self.finish_recording()
+        self.pacer.report()
+        self.score_store.close()
+        self.metrics.close()
+        self.sampler.stop()
+        self.profiler.close()
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
+    if "--record" in sys.argv[1:]:
+        REPLAY_VARS['record_sessions'] = True
+    if "--pacing" in sys.argv[1:-1]:
+        # e.g. --pacing uncapped for profiling, --pacing vsync on cabinets with a 60 Hz display
+        PACING_VARS['mode'] = sys.argv[sys.argv.index("--pacing") + 1]
+    if "--fps" in sys.argv[1:-1]:
+        PACING_VARS['target_fps'] = int(sys.argv[sys.argv.index("--fps") + 1])
+    if "--windowed" in sys.argv[1:]:
+        DISPLAY_VARS['windowed'] = True
+    if "--render" in sys.argv[1:-1]:
+        # e.g. --render 1920x1080 to draw at 1080p and scale up to a 4K display
+        width, height = sys.argv[sys.argv.index("--render") + 1].lower().split("x")
+        DISPLAY_VARS['render_size'] = (int(width), int(height))
+    if "--render-scale" in sys.argv[1:-1]:
+        DISPLAY_VARS['render_scale'] = float(sys.argv[sys.argv.index("--render-scale") + 1])
+    if "--arena" in sys.argv[1:-1]:
+        # e.g. --arena 4000x3000 for a scrolling arena larger than the screen
+        width, height = sys.argv[sys.argv.index("--arena") + 1].lower().split("x")
+        ARENA_VARS['size'] = (int(width), int(height))
     game = Game()
     game.run()
\ No newline at end of file
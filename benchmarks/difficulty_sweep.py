@@ -0,0 +1,473 @@
+"""Difficulty curves from seeded headless games played by bots, over a sweep of tunables.
+
+Each --param names one entry of a *_VARS dict and the values to try, as a
+list, a numeric range or a JSON list of lists:
+
+    --param ENEMY_VARS.max_health=40,50,60
+    --param LEVELING_VARS.xp_per_kill=15:35:10
+    --param 'GAME_VARS.enemy_upgrade_weights=[[40,30,15,10,3,2],[20,30,25,15,6,4]]'
+
+Every combination of the values is one configuration, and every configuration
+is played once per seed on the fixed 60 Hz game clock, by bots that drive to a
+clear line of fire on the nearest enemy, shoot when lined up and take level
+ups in rotation. Games run in parallel worker processes until the players die
+or --max-waves is cleared. Any change to a tunable reshuffles every game that
+follows from a seed, so compare configurations over a good number of seeds.
+
+Each finished game is cached in --cache-dir under a hash of its parameters,
+seed, run settings and the game and bot code, so re-running a sweep with a
+value added only plays the new games, and any code change starts afresh:
+
+    python benchmarks/difficulty_sweep.py --param ENEMY_VARS.max_health=40:70:10 --seeds 16
+    python benchmarks/difficulty_sweep.py --param ENEMY_VARS.max_health=40:80:10 --seeds 16 --output sweep.json
+
+Reported per configuration: the share of games still alive after each wave
+and how long enemies survived once they entered play (time to kill).
+"""
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import copy
+import hashlib
+import io
+import itertools
+import json
+import math
+import multiprocessing.util
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import pygame  # noqa: E402
+import TanksForNothing as tfn  # noqa: E402
+from simulation import git_revision, summarize  # noqa: E402
+
+STEP_MS = 1000 / 60
+
+# Same order as Game.apply_level_up_choice, which takes an index into it
+LEVEL_UP_OPTIONS = ["movement_speed", "shot_speed", "shot_distance", "fire_rate", "powerup_duration", "health"]
+# Stats the bots upgrade first, one each in turn
+LEVEL_UP_PREFERENCE = ["fire_rate", "health", "shot_speed", "shot_distance", "movement_speed", "powerup_duration"]
+
+AIM_TOLERANCE = 0.12  # Radians either side of the target at which bots fire
+KEEP_AWAY = 180  # Bots back off from enemies closer than this
+
+
+def parse_values(text):
+    """Values for one --param: 'a,b,c', 'start:stop:step' (inclusive) or a JSON list"""
+    if text.startswith('['):
+        values = json.loads(text)
+        return values if isinstance(values, list) else [values]
+    if ':' in text:
+        start, stop, step = (float(part) for part in text.split(':'))
+        if step <= 0:
+            raise ValueError("range step must be positive")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        values = [start + i * step for i in range(count)]
+        if all(value.is_integer() for value in (start, stop, step)):
+            values = [int(value) for value in values]
+        return values
+    return [json.loads(part) for part in text.split(',')]
+
+
+def parse_param(spec):
+    """'DICT.key=values' -> ('DICT.key', [values]), checked against the game's tunables"""
+    name, separator, text = spec.partition('=')
+    dict_name, _, key = name.partition('.')
+    if not separator or not key:
+        raise ValueError(f"expected DICT.key=values, got {spec!r}")
+    tunables = getattr(tfn, dict_name, None)
+    if not dict_name.endswith('_VARS') or not isinstance(tunables, dict):
+        raise ValueError(f"{dict_name} is not one of the game's *_VARS dicts")
+    if key not in tunables:
+        raise ValueError(f"{dict_name} has no entry {key!r}")
+    return name, parse_values(text)
+
+
+def sweep_configs(params):
+    """Every combination of the parameter values, as {'DICT.key': value} dicts"""
+    names = [name for name, _ in params]
+    return [dict(zip(names, combination)) for combination in itertools.product(*(values for _, values in params))]
+
+
+def config_label(config):
+    return " ".join(f"{name}={json.dumps(value)}" for name, value in config.items()) or "defaults"
+
+
+def code_version():
+    """Hash of the game and of this file: the bot and the run loop shape the results too"""
+    digest = hashlib.sha256()
+    for path in (os.path.join(REPO_ROOT, "TanksForNothing.py"), os.path.abspath(__file__)):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def cache_key(config, seed, settings, version):
+    payload = json.dumps({'config': config, 'seed': seed, 'settings': settings, 'code': version}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@contextlib.contextmanager
+def overridden(config):
+    """Apply a configuration to the game's tunables for the duration of one game"""
+    saved = []
+    for name, value in config.items():
+        dict_name, key = name.split('.', 1)
+        tunables = getattr(tfn, dict_name)
+        saved.append((tunables, key, tunables[key]))
+        tunables[key] = copy.deepcopy(value)
+    try:
+        yield
+    finally:
+        for tunables, key, value in reversed(saved):
+            tunables[key] = value
+
+
+def line_of_fire_clear(obstacles, start, end):
+    return not any(obstacle.get_rect().clipline(start, end) for obstacle in obstacles)
+
+
+class Bot:
+    """Steers one player: fire at the nearest enemy when it is in range with a clear line of
+    fire, otherwise drive toward the closest spot that has one.
+
+    Routes are planned over a coarse grid of places the tank fits, and a bot that has been
+    asking to drive without moving backs away from the nearest obstacle for a moment.
+    """
+    CELL = 40
+    REPLAN_TICKS = 15
+    STUCK_TICKS = 30
+    ESCAPE_TICKS = 45
+
+    def __init__(self, player):
+        self.player = player
+        self.last_position = (player.x, player.y)
+        self.still_ticks = 0
+        self.escape_ticks = 0
+        self.grid_obstacles = None
+        self.open_cells = set()
+        self.route = []
+        self.replan_in = 0
+
+    def command(self, game):
+        player = self.player
+        if getattr(player, 'is_dead', False) or not game.enemies:
+            self.route = []
+            return (0, 0, 0, 0, 0)
+
+        if self.escape_ticks:
+            self.escape_ticks -= 1
+            if game.obstacles:
+                nearest = min((obstacle.get_rect() for obstacle in game.obstacles),
+                              key=lambda rect: (rect.centerx - player.x) ** 2 + (rect.centery - player.y) ** 2)
+                return self.steer(math.atan2(player.y - nearest.centery, player.x - nearest.centerx), True, False)
+        command = self.choose(game)
+
+        # Only ticks where the bot asked to drive and went nowhere count toward being stuck
+        position = (player.x, player.y)
+        if command[0] or command[1]:
+            self.still_ticks = 0 if position != self.last_position else self.still_ticks + 1
+        self.last_position = position
+        if self.still_ticks >= self.STUCK_TICKS:
+            self.still_ticks = 0
+            self.escape_ticks = self.ESCAPE_TICKS
+            self.route = []
+        return command
+
+    def choose(self, game):
+        player = self.player
+        target = min(game.enemies, key=lambda enemy: (enemy.x - player.x) ** 2 + (enemy.y - player.y) ** 2)
+        dx, dy = target.x - player.x, target.y - player.y
+        distance = math.hypot(dx, dy)
+        if distance < player.shot_distance * 0.9 and line_of_fire_clear(
+                game.obstacles, (player.x, player.y), (target.x, target.y)):
+            self.route = []
+            return self.steer(math.atan2(dy, dx), False, True, backward=distance < KEEP_AWAY)
+
+        self.replan_in -= 1
+        if self.replan_in <= 0:
+            self.route = self.plan(game, target)
+            self.replan_in = self.REPLAN_TICKS
+        while self.route and math.hypot(self.route[0][0] - player.x, self.route[0][1] - player.y) < self.CELL / 2:
+            self.route.pop(0)
+        waypoint = self.route[0] if self.route else (target.x, target.y)
+        return self.steer(math.atan2(waypoint[1] - player.y, waypoint[0] - player.x), True, False)
+
+    def plan(self, game, target):
+        """Cell centres from the bot to the nearest cell with a clear shot at the target"""
+        if self.grid_obstacles is not game.obstacles:
+            self.grid_obstacles = game.obstacles
+            rects = [obstacle.get_rect() for obstacle in game.obstacles]
+            footprint = pygame.Rect((0, 0), self.player.tank_size).inflate(8, 8)
+            self.open_cells = set()
+            for col in range(game.arena.width // self.CELL):
+                for row in range(game.arena.height // self.CELL):
+                    footprint.center = self.centre((col, row))
+                    if footprint.collidelist(rects) == -1:
+                        self.open_cells.add((col, row))
+
+        player = self.player
+        start = (int(player.x // self.CELL), int(player.y // self.CELL))
+        reach = player.shot_distance * 0.8
+        came_from = {start: None}
+        frontier = collections.deque([start])
+        while frontier:
+            cell = frontier.popleft()
+            x, y = self.centre(cell)
+            if (KEEP_AWAY <= math.hypot(target.x - x, target.y - y) <= reach
+                    and line_of_fire_clear(game.obstacles, (x, y), (target.x, target.y))):
+                route = []
+                while cell is not None:
+                    route.append(self.centre(cell))
+                    cell = came_from[cell]
+                return route[::-1][1:]
+            for step in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                neighbour = (cell[0] + step[0], cell[1] + step[1])
+                if neighbour in self.open_cells and neighbour not in came_from:
+                    came_from[neighbour] = cell
+                    frontier.append(neighbour)
+        return []
+
+    def centre(self, cell):
+        return (cell[0] * self.CELL + self.CELL // 2, cell[1] * self.CELL + self.CELL // 2)
+
+    def steer(self, heading, advance, fire, backward=False):
+        """Command tuple that turns toward heading, driving once roughly facing it"""
+        turn = (heading - self.player.angle + math.pi) % (2 * math.pi) - math.pi
+        return (int(advance and abs(turn) < 1.0), int(backward),
+                int(turn < -AIM_TOLERANCE / 2), int(turn > AIM_TOLERANCE / 2),
+                int(fire and abs(turn) < AIM_TOLERANCE))
+
+
+def bot_level_up_choice(player):
+    """Index into LEVEL_UP_OPTIONS of the preferred stat with the fewest upgrades, or None if all are maxed"""
+    upgradable = [stat for stat in LEVEL_UP_PREFERENCE if player.can_upgrade_stat(stat)]
+    if not upgradable:
+        return None
+    counts = {stat: player.get_stat_info(stat)['upgrades'] for stat in upgradable}
+    return LEVEL_UP_OPTIONS.index(min(upgradable, key=lambda stat: counts[stat]))
+
+
+def play_game(game, config, seed, settings):
+    """Play one seeded game with bots, returning how far it got and how long enemies lasted"""
+    tfn.GAME_CLOCK.use_fixed_step(STEP_MS)
+    with overridden(config), contextlib.redirect_stdout(io.StringIO()):
+        game.start_session(settings['coop'], seed=seed)
+
+        bots = [Bot(player) for player in game.players]
+        entered = {}  # id(enemy) -> (enemy, ms when it appeared)
+        kills = []  # (wave, ms the enemy survived)
+        wave_ms = []  # Game time taken to clear each wave
+        wave_start = 0
+        ended = 'max_ticks'
+        for _ in range(settings['max_ticks']):
+            if game.state == "level_up":
+                choice = bot_level_up_choice(game.pending_level_ups[0])
+                if choice is None:
+                    ended = 'levels_maxed'
+                    break
+                game.level_up_selection = choice
+                game.apply_level_up_choice()
+            elif game.state == "enemy_upgrade_warning":
+                game.continue_after_enemy_upgrade()
+
+            if game.state == "game":
+                for bot in bots:
+                    game.apply_player_command(bot.player, bot.command(game))
+
+            wave, state = game.wave, game.state
+            game.update()
+            now = tfn.GAME_CLOCK.ticks()
+            if game.state == "game_over":
+                ended = 'died'
+                break
+
+            present = {id(enemy) for enemy in game.enemies}
+            for key in [key for key in entered if key not in present]:
+                kills.append((wave, now - entered.pop(key)[1]))
+            for enemy in game.enemies:
+                if id(enemy) not in entered:
+                    entered[id(enemy)] = (enemy, now)
+
+            if state == "game" and (game.state != "game" or game.wave != wave):
+                # Wave cleared: the level up and upgrade screens take no game time
+                wave_ms.append(now - wave_start)
+                wave_start = now
+                if len(wave_ms) >= settings['max_waves']:
+                    ended = 'max_waves'
+                    break
+            tfn.GAME_CLOCK.advance()
+
+    return {
+        'waves_cleared': len(wave_ms),
+        'ended': ended,
+        'game_seconds': tfn.GAME_CLOCK.ticks() / 1000,
+        'wave_seconds': [ms / 1000 for ms in wave_ms],
+        'kills': [[wave, ms / 1000] for wave, ms in kills],
+        'final': tfn.session_summary(game),
+    }
+
+
+WORKER_GAME = None
+
+
+def init_worker(arena):
+    """Build the worker's game, with its score database in a private temporary directory"""
+    global WORKER_GAME
+    scratch = tempfile.TemporaryDirectory(prefix="sweep_worker_")
+    tfn.HIGH_SCORE_VARS['database'] = os.path.join(scratch.name, "high_scores.db")
+    tfn.HIGH_SCORE_VARS['legacy_files'] = ()
+    with contextlib.redirect_stdout(io.StringIO()):
+        WORKER_GAME = tfn.Game(screen_size=(640, 360), arena_size=arena)
+    # Pool workers leave through os._exit, which skips atexit but still runs these finalizers
+    multiprocessing.util.Finalize(None, close_worker, args=(scratch,), exitpriority=10)
+
+
+def close_worker(scratch):
+    WORKER_GAME.score_store.close()
+    scratch.cleanup()
+
+
+def run_point(point):
+    config, seed, settings = point
+    start = time.perf_counter()
+    result = play_game(WORKER_GAME, config, seed, settings)
+    result['wall_seconds'] = time.perf_counter() - start
+    return result
+
+
+def survival_curve(results, max_waves):
+    """Share of games still alive after each wave, waves 1..max_waves"""
+    return [sum(result['waves_cleared'] >= wave for result in results) / len(results)
+            for wave in range(1, max_waves + 1)]
+
+
+def summarize_config(config, results, max_waves):
+    ttk = [seconds for result in results for _, seconds in result['kills']]
+    by_wave = {}
+    for result in results:
+        for wave, seconds in result['kills']:
+            by_wave.setdefault(wave, []).append(seconds)
+    wave_seconds = {}
+    for result in results:
+        for wave, seconds in enumerate(result['wave_seconds'], 1):
+            wave_seconds.setdefault(wave, []).append(seconds)
+    return {
+        'config': config,
+        'games': len(results),
+        'ended': dict(collections.Counter(result['ended'] for result in results)),
+        'survival': survival_curve(results, max_waves),
+        'waves_cleared': summarize([result['waves_cleared'] for result in results]),
+        'time_to_kill_s': summarize(ttk) if ttk else None,
+        'time_to_kill_by_wave_s': {wave: summarize(values) for wave, values in sorted(by_wave.items())},
+        'wave_seconds_by_wave': {wave: summarize(values) for wave, values in sorted(wave_seconds.items())},
+    }
+
+
+def print_report(summaries, max_waves, every):
+    waves = list(range(every, max_waves + 1, every))
+    if not waves or waves[-1] != max_waves:
+        waves.append(max_waves)
+    header = " ".join(f"{wave:>5}" for wave in waves)
+    print(f"\nsurvival after wave   {header}")
+    for index, summary in enumerate(summaries):
+        curve = " ".join(f"{summary['survival'][wave - 1] * 100:4.0f}%" for wave in waves)
+        print(f"  [{index}]{'':<16} {curve}")
+
+    print("\ntime to kill (s)        p50    p99    max   waves cleared p50   ended")
+    for index, summary in enumerate(summaries):
+        ttk = summary['time_to_kill_s'] or {'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+        ended = ", ".join(f"{count} {reason}" for reason, count in sorted(summary['ended'].items()))
+        print(f"  [{index}]{'':<16} {ttk['p50']:6.2f} {ttk['p99']:6.2f} {ttk['max']:6.2f}"
+              f"   {summary['waves_cleared']['p50']:>17}   {ended}")
+
+    print()
+    for index, summary in enumerate(summaries):
+        print(f"  [{index}] {config_label(summary['config'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep tunables over seeded bot games and report difficulty curves")
+    parser.add_argument("--param", action="append", default=[], metavar="DICT.key=VALUES",
+                        help="Tunable to sweep (repeatable): a,b,c or start:stop:step or a JSON list")
+    parser.add_argument("--seeds", type=int, default=8, help="Games per configuration")
+    parser.add_argument("--seed", type=int, default=1234, help="First seed")
+    parser.add_argument("--coop", action="store_true", help="Two bot players instead of one")
+    parser.add_argument("--max-waves", type=int, default=20, help="Stop a game once this many waves are cleared")
+    parser.add_argument("--max-minutes", type=float, default=30.0, help="Stop a game after this much game time")
+    parser.add_argument("--arena", type=int, nargs=2, default=(1920, 1080), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--cache-dir", default=os.path.join(REPO_ROOT, "sweep_cache"))
+    parser.add_argument("--every", type=int, default=2, help="Waves between survival columns in the report")
+    parser.add_argument("--output", help="Also write the curves and statistics as JSON to this file")
+    args = parser.parse_args()
+
+    try:
+        params = [parse_param(spec) for spec in args.param]
+    except ValueError as error:
+        parser.error(str(error))
+    configs = sweep_configs(params)
+    seeds = [args.seed + i for i in range(args.seeds)]
+    settings = {
+        'coop': args.coop,
+        'max_waves': args.max_waves,
+        'max_ticks': round(args.max_minutes * 60 * 1000 / STEP_MS),
+        'arena': list(args.arena),
+    }
+    version = code_version()
+    os.makedirs(args.cache_dir, exist_ok=True)
+
+    results = {}
+    pending = {}
+    for index, config in enumerate(configs):
+        for seed in seeds:
+            path = os.path.join(args.cache_dir, cache_key(config, seed, settings, version) + ".json")
+            if os.path.exists(path):
+                with open(path) as f:
+                    results[index, seed] = json.load(f)
+            else:
+                pending[index, seed] = path
+    print(f"{len(configs)} configurations x {len(seeds)} seeds: "
+          f"{len(results)} cached, {len(pending)} to play on {args.workers} workers")
+
+    start = time.perf_counter()
+    if pending:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=args.workers, initializer=init_worker, initargs=(tuple(args.arena),)) as executor:
+            futures = {executor.submit(run_point, (configs[index], seed, settings)): (index, seed)
+                       for index, seed in pending}
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                index, seed = futures[future]
+                result = future.result()
+                results[index, seed] = result
+                with open(pending[index, seed], 'w') as f:
+                    json.dump(result, f)
+                print(f"  [{done}/{len(pending)}] config {index} seed {seed}: {result['ended']} after "
+                      f"{result['waves_cleared']} waves ({result['wall_seconds']:.1f} s)")
+        print(f"Played {len(pending)} games in {time.perf_counter() - start:.1f} s")
+
+    summaries = [summarize_config(config, [results[index, seed] for seed in seeds], args.max_waves)
+                 for index, config in enumerate(configs)]
+    print_report(summaries, args.max_waves, args.every)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {'revision': git_revision(), 'code': version, 'seeds': seeds, 'settings': settings},
+                'configs': summaries,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
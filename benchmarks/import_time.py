@@ -0,0 +1,66 @@
+"""Check that importing TanksForNothing stays cheap and free of side effects.
+
+Runs the import in fresh interpreters, reports the best and median time, and
+exits non-zero if the median exceeds the budget or if the import initialised
+pygame, the display or the mixer.
+
+    python benchmarks/import_time.py --budget-ms 500 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import time
+start = time.perf_counter()
+import TanksForNothing
+elapsed = (time.perf_counter() - start) * 1000
+import json, pygame
+print(json.dumps({
+    'ms': elapsed,
+    'pygame_init': pygame.get_init(),
+    'display_init': pygame.display.get_init(),
+    'mixer_init': bool(pygame.mixer.get_init()),
+}))
+"""
+
+
+def measure_once():
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=REPO_ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=500.0, help="Maximum median import time")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to sample")
+    args = parser.parse_args()
+
+    results = [measure_once() for _ in range(args.runs)]
+    times = [r['ms'] for r in results]
+    median = statistics.median(times)
+    print(f"import TanksForNothing: best {min(times):.1f} ms, median {median:.1f} ms "
+          f"(budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if median > args.budget_ms:
+        print("FAIL: import time is over budget")
+        failed = True
+    for flag in ('pygame_init', 'display_init', 'mixer_init'):
+        if any(r[flag] for r in results):
+            print(f"FAIL: import has a side effect ({flag})")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
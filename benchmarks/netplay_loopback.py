@@ -0,0 +1,72 @@
+"""Networked co-op over loopback: one server and two scripted clients.
+
+Starts netplay.py as a headless server and two headless bot clients, lets
+them play, then checks that every snapshot each client decoded hashes the
+same as the server's, and reports bandwidth and prediction error:
+
+    python benchmarks/netplay_loopback.py --duration 20 --wave 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NETPLAY = os.path.join(REPO_ROOT, "netplay.py")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run networked co-op over loopback and check it")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds the clients play")
+    parser.add_argument("--wave", type=int, default=1, help="Wave the server starts at")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--port", type=int, default=7797)
+    args = parser.parse_args()
+
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    with tempfile.TemporaryDirectory() as directory:
+        reports = [os.path.join(directory, name) for name in ("server.json", "client1.json", "client2.json")]
+        common = ["--port", str(args.port)]
+        server = subprocess.Popen(
+            [sys.executable, NETPLAY, "server", "--seed", str(args.seed), "--wave", str(args.wave),
+             "--duration", str(args.duration + 4), "--report", reports[0]] + common,
+            cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL)
+        time.sleep(1.5)
+        clients = [subprocess.Popen(
+            [sys.executable, NETPLAY, "client", "127.0.0.1", "--headless", "--bot",
+             "--duration", str(args.duration), "--report", report] + common,
+            cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL) for report in reports[1:]]
+        for process in clients + [server]:
+            process.wait()
+
+        with open(reports[0]) as f:
+            server_report = json.load(f)
+        client_reports = []
+        for report in reports[1:]:
+            with open(report) as f:
+                client_reports.append(json.load(f))
+
+    failed = False
+    print(f"server: {server_report['ticks']} ticks, {server_report['snapshots']} snapshots")
+    for client in client_reports:
+        mismatched = [sequence for sequence, digest in client['hashes'].items()
+                      if server_report['hashes'].get(sequence) != digest]
+        seconds = client['frames'] / 60
+        kbits = client['bytes_received'] * 8 / 1000 / max(seconds, 1e-6)
+        correction = client['prediction_correction_px']
+        print(f"player {client['player']}: {client['snapshots']} snapshots decoded, "
+              f"{len(mismatched)} mismatched, {kbits:.1f} kbit/s down, "
+              f"prediction correction p50 {correction['p50']:.2f} px p99 {correction['p99']:.2f} px")
+        if mismatched or not client['snapshots']:
+            failed = True
+    if len(client_reports) != 2 or {c['player'] for c in client_reports} != {1, 2}:
+        print("Both clients did not join")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""Replay recorded play sessions headlessly and check for performance regressions.
+
+Sessions are recorded by running the game with --record (or setting
+REPLAY_VARS['record_sessions']); each finished game is written to replays/
+as its seed, the per-frame player commands and the menu choices made during
+it. Replaying feeds the same inputs through Game.update on the same fixed
+game clock, so the simulation follows the recorded game exactly. With
+--render every frame is also drawn to the (offscreen) dummy display.
+
+Per-tick update and draw times are collected per session and compared with
+a stored baseline; the run fails when p50 or p99 grow past the thresholds:
+
+    python benchmarks/replay.py replays/ --render --write-baseline replay_baseline.json
+    python benchmarks/replay.py replays/ --render --baseline replay_baseline.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import TanksForNothing as tfn  # noqa: E402
+from simulation import git_revision, summarize  # noqa: E402
+
+
+def find_sessions(paths):
+    sessions = []
+    for path in paths:
+        if os.path.isdir(path):
+            sessions.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                            if name.endswith('.json'))
+        else:
+            sessions.append(path)
+    return sessions
+
+
+def replay_session(game, session, render):
+    """Replay one session, returning per-tick timings and the final summary"""
+    tfn.GAME_CLOCK.use_fixed_step(session['step_ms'])
+    game.start_session(session['coop'], seed=session['seed'])
+
+    inputs = iter(session['inputs'])
+    next_input = next(inputs, None)
+    events = iter(session['events'])
+    next_event = next(events, None)
+    commands = []
+
+    samples = {'update': []}
+    if render:
+        samples['draw'] = []
+
+    for frame in range(session['frames']):
+        # Same order as Game.run: queued events, held input, update, draw
+        while next_event and next_event[0] == frame:
+            _, name, value = next_event
+            if name == 'level_up_choice':
+                game.level_up_selection = value
+                game.apply_level_up_choice()
+            elif name == 'continue_after_enemy_upgrade':
+                game.continue_after_enemy_upgrade()
+            next_event = next(events, None)
+
+        if game.state == "game":
+            if next_input and next_input[0] == frame:
+                commands = next_input[1]
+                next_input = next(inputs, None)
+            for player, command in zip(game.players, commands):
+                game.apply_player_command(player, command)
+
+        start = time.perf_counter()
+        game.update()
+        samples['update'].append((time.perf_counter() - start) * 1000)
+        if game.state == "game_over":
+            break
+
+        if render:
+            start = time.perf_counter()
+            game.draw()
+            samples['draw'].append((time.perf_counter() - start) * 1000)
+
+        tfn.GAME_CLOCK.advance()
+
+    return samples, tfn.session_summary(game)
+
+
+def check_regressions(results, baseline, max_p50, max_p99):
+    """Print p50/p99 changes against the baseline to stderr and return the regressions"""
+    failures = []
+    for name, session in results['sessions'].items():
+        old = baseline.get('sessions', {}).get(name)
+        if not old:
+            print(f"{name}: not in baseline", file=sys.stderr)
+            continue
+        print(name, file=sys.stderr)
+        for metric, stats in session['timings_ms'].items():
+            old_stats = old['timings_ms'].get(metric)
+            if not old_stats:
+                continue
+            for key, limit in (('p50', max_p50), ('p99', max_p99)):
+                if old_stats[key] <= 0:
+                    continue
+                change = (stats[key] - old_stats[key]) / old_stats[key] * 100
+                flag = "  REGRESSION" if change > limit else ""
+                print(f"  {metric:<7} {key} {old_stats[key]:8.3f} -> {stats[key]:8.3f} ms ({change:+6.1f}%){flag}",
+                      file=sys.stderr)
+                if flag:
+                    failures.append(f"{name} {metric} {key} {change:+.1f}% (limit {limit}%)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions and check for regressions")
+    parser.add_argument("paths", nargs="+", help="Session files or directories of session files")
+    parser.add_argument("--render", action="store_true", help="Also draw every frame offscreen")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--write-baseline", help="Write the results as a new baseline to this file")
+    parser.add_argument("--max-p50-regression", type=float, default=15.0,
+                        help="Allowed p50 increase over the baseline, in percent")
+    parser.add_argument("--max-p99-regression", type=float, default=30.0,
+                        help="Allowed p99 increase over the baseline, in percent")
+    args = parser.parse_args()
+
+    sessions = find_sessions(args.paths)
+    if not sessions:
+        print("No recorded sessions found", file=sys.stderr)
+        return 1
+
+    results = {'meta': {'revision': git_revision(), 'render': args.render}, 'sessions': {}}
+    desynced = []
+    games = {}
+    for path in sessions:
+        with open(path) as f:
+            session = json.load(f)
+        arena = tuple(session['arena'])
+        view = tuple(session.get('view', arena))
+        # The game prints as it plays; stdout is kept for the JSON results
+        with contextlib.redirect_stdout(sys.stderr):
+            if (view, arena) not in games:
+                games[view, arena] = tfn.Game(screen_size=view, arena_size=arena)
+                games[view, arena].assets.wait()
+            samples, final = replay_session(games[view, arena], session, args.render)
+        name = os.path.basename(path)
+        results['sessions'][name] = {
+            'ticks': len(samples['update']),
+            'final': final,
+            'timings_ms': {metric: summarize(values) for metric, values in samples.items() if values},
+        }
+        if final != session['final']:
+            desynced.append(name)
+            print(f"{name}: replay desynced from the recording "
+                  f"(recorded {session['final']}, replayed {final})", file=sys.stderr)
+
+    if args.write_baseline:
+        with open(args.write_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote baseline for {len(results['sessions'])} sessions to {args.write_baseline}",
+              file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = check_regressions(results, json.load(f),
+                                         args.max_p50_regression, args.max_p99_regression)
+        if failures:
+            print("\nPerformance regressions:", file=sys.stderr)
+            for failure in failures:
+                print(f"  {failure}", file=sys.stderr)
+            return 1
+    elif not args.write_baseline:
+        print(json.dumps(results, indent=2))
+    return 1 if desynced else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
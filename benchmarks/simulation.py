@@ -0,0 +1,247 @@
+"""Headless simulation benchmarks over representative wave scenarios.
+
+Each scenario builds a Game state with a fixed seed, then steps Game.update
+on a fixed 60 Hz game clock while the players turn and fire. Time is recorded
+for the whole update and for each phase the frame profiler marks (enemy AI,
+the collision passes, spawning, ...). A separate measurement times
+spawn_wave plus flushing its spawn queue.
+
+Results are written as JSON so runs before and after an engine change can
+be compared:
+
+    python benchmarks/simulation.py --output before.json
+    python benchmarks/simulation.py --output after.json --compare before.json
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import pygame  # noqa: E402
+import TanksForNothing as tfn  # noqa: E402
+
+UPDATE_PHASES = (
+    'timers', 'powerups', 'missiles', 'effects', 'ai',
+    'collide_obstacles', 'collide_powerups', 'collide_enemies', 'collide_players', 'wave_logic',
+)
+
+
+def max_enemy_multipliers(wave):
+    """Multipliers if every upgrade so far had rolled the largest percentage.
+
+    Upgrades happen at most every enemy_upgrade_min_waves and are spread over
+    the five upgrade types.
+    """
+    upgrades_per_type = wave // (tfn.GAME_VARS['enemy_upgrade_min_waves'] * 5)
+    factor = 1 + max(tfn.GAME_VARS['enemy_upgrade_percentages']) / 100
+    return {name: factor ** upgrades_per_type
+            for name in ('movement_speed', 'shot_speed', 'shot_distance', 'health', 'damage')}
+
+
+SCENARIOS = {
+    'wave1_single': {'coop': False, 'wave': 1},
+    'wave20_coop_rapid_fire': {'coop': True, 'wave': 20, 'powerup': 'rapid_fire'},
+    'wave60_max_upgrades': {'coop': False, 'wave': 60, 'multipliers': max_enemy_multipliers(60)},
+    'homing_storm': {'coop': True, 'wave': 30, 'powerup': 'homing', 'homing_missiles': 200},
+}
+
+
+def spawn_all_enemies(game):
+    """Spawn a fresh wave and release its whole spawn queue at once"""
+    game.spawn_wave()
+    for enemy_data in game.enemies_to_spawn:
+        enemy_data['spawn_time'] = 0
+    game.update_enemy_spawning()
+
+
+def place_enemies_in_arena(game):
+    """Move spawned enemies to free spots inside the arena, away from the players"""
+    arena = game.arena
+    for enemy in game.enemies:
+        for _ in range(100):
+            x = random.randint(50, arena.width - 50)
+            y = random.randint(50, arena.height - 50)
+            if enemy.check_obstacle_collision(game.obstacles, x, y):
+                continue
+            if any(math.hypot(x - p.x, y - p.y) < 200 for p in game.players):
+                continue
+            enemy.x, enemy.y = x, y
+            enemy.trail.last_position = (x, y)
+            break
+
+
+def build_scenario(game, config, seed):
+    """Put the game into the scenario's state deterministically"""
+    random.seed(seed)
+    tfn.GAME_CLOCK.use_fixed_step(1000 / 60)
+
+    game.coop_mode = config['coop']
+    game.state = "game"
+    game.reset_game()
+    game.wave = config['wave']
+    if 'multipliers' in config:
+        game.enemy_profile = tfn.EnemyProfile(config['multipliers'])
+    game.generate_obstacles()
+    spawn_all_enemies(game)
+    place_enemies_in_arena(game)
+
+    for player in game.players:
+        # Players never die so the scenario stays in the game state
+        player.shield_active = True
+        player.active_powerups['shield'] = float('inf')
+        if config.get('powerup'):
+            player.activate_powerup(config['powerup'])
+
+    for i in range(config.get('homing_missiles', 0)):
+        player = game.players[i % len(game.players)]
+        angle = random.uniform(0, 2 * math.pi)
+        game.spawn_shot(player, player.x, player.y, angle, homing=True,
+                        max_distance=player.shot_distance * 4)
+
+
+def drive_players(game, tick):
+    """Scripted input: turn slowly and hold fire, like a player sweeping the arena"""
+    for player in game.players:
+        if tick % 120 < 60:
+            player.turn_right()
+        else:
+            player.turn_left()
+        game.add_shots(player, player.shoot())
+        if player.powerup_shots_remaining.get('homing', 1) <= 0:
+            player.activate_powerup('homing')
+
+
+def summarize(values):
+    ordered = sorted(values)
+    return {
+        'mean': statistics.fmean(ordered),
+        'p50': ordered[len(ordered) // 2],
+        'p99': ordered[int(0.99 * (len(ordered) - 1))],
+        'min': ordered[0],
+        'max': ordered[-1],
+    }
+
+
+def run_scenario(game, config, seed, ticks, spawn_repeats):
+    build_scenario(game, config, seed)
+    samples = {'update': []}
+    samples.update({phase: [] for phase in UPDATE_PHASES})
+    ticks_run = 0
+    for tick in range(ticks):
+        tfn.GAME_CLOCK.advance()
+        drive_players(game, tick)
+
+        game.profiler.begin_frame()
+        start = time.perf_counter()
+        game.update()
+        samples['update'].append((time.perf_counter() - start) * 1000)
+        for phase in UPDATE_PHASES:
+            samples[phase].append(game.profiler.current.get(phase, 0.0))
+        ticks_run += 1
+        if game.state != "game":
+            break
+    counts = game.get_entity_counts()
+
+    # Spawning a whole wave is measured on its own, from the same starting point
+    spawn_samples = []
+    for repeat in range(spawn_repeats):
+        build_scenario(game, config, seed + repeat)
+        game.enemies = []
+        start = time.perf_counter()
+        spawn_all_enemies(game)
+        spawn_samples.append((time.perf_counter() - start) * 1000)
+    samples['spawn_wave'] = spawn_samples
+
+    return {
+        'ticks': ticks_run,
+        'final_state': game.state,
+        'final_counts': counts,
+        'timings_ms': {metric: summarize(values) for metric, values in samples.items() if values},
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Print p50/p99 changes against a previous results file, to stderr"""
+    for name, scenario in results['scenarios'].items():
+        old = baseline.get('scenarios', {}).get(name)
+        if not old:
+            continue
+        print(f"\n{name}", file=sys.stderr)
+        for metric, stats in scenario['timings_ms'].items():
+            old_stats = old['timings_ms'].get(metric)
+            if not old_stats or old_stats['p50'] <= 0:
+                continue
+            change = (stats['p50'] - old_stats['p50']) / old_stats['p50'] * 100
+            print(f"  {metric:<18} p50 {old_stats['p50']:8.3f} -> {stats['p50']:8.3f} ms ({change:+6.1f}%)"
+                  f"   p99 {old_stats['p99']:8.3f} -> {stats['p99']:8.3f} ms", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless simulation benchmarks")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--ticks", type=int, default=600, help="Simulation ticks per scenario")
+    parser.add_argument("--spawn-repeats", type=int, default=10, help="Repeats of the spawn_wave measurement")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--size", type=int, nargs=2, default=(1920, 1080), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+    args = parser.parse_args()
+
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'ticks': args.ticks,
+            'arena': list(args.size),
+        },
+        'scenarios': {},
+    }
+    # The game prints as it plays; stdout is kept for the JSON results
+    with contextlib.redirect_stdout(sys.stderr):
+        game = tfn.Game(screen_size=tuple(args.size))
+        game.assets.wait()
+        for name in args.scenario or SCENARIOS:
+            results['scenarios'][name] = run_scenario(
+                game, SCENARIOS[name], args.seed, args.ticks, args.spawn_repeats)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
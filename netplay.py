@@ -0,0 +1,752 @@
+"""Networked co-op: a headless authoritative server and clients over UDP.
+
+The server runs the normal Game simulation on fixed 60 Hz game time, with
+one player tank per connected client. Clients send their commands (the
+same tuples Game.apply_player_command takes) and get snapshots back.
+Each snapshot is delta-compressed against the last snapshot the client
+acknowledged. Clients predict their own tank by replaying unacknowledged
+commands on top of the server position. Everything else is drawn
+interpolated between snapshots.
+
+    python netplay.py server
+    python netplay.py client 192.168.1.20
+    python netplay.py client --headless --bot --duration 20   # scripted test client
+
+benchmarks/netplay_loopback.py runs a server and two bot clients over
+loopback and checks that both clients reconstruct the server's snapshots.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+import zlib
+from collections import OrderedDict, deque
+
+import TanksForNothing as tfn
+
+NETPLAY_VARS = {
+    'port': 7777,
+    'arena': (1920, 1080),  # Arena size simulated by the server; larger arenas scroll
+    'window': (1920, 1080),  # Client window size
+    'step_ms': 1000 / 60,  # Server simulation tick
+    'snapshot_every': 2,  # Send a snapshot every N ticks (30 Hz)
+    'snapshot_history': 64,  # Snapshots kept to delta against; older acks get a full snapshot
+    'interpolation_ticks': 6,  # Remote entities are drawn this far behind the newest snapshot
+    'input_redundancy': 8,  # Unacknowledged commands resent with every input packet
+    'max_input_buffer': 6,  # Server drops the oldest queued commands beyond this
+    'client_timeout': 5.0,  # Seconds of silence before a client's slot is freed
+    'hello_interval': 0.25,
+}
+
+UPGRADE_ATTRIBUTES = ('movement_upgrades', 'shot_speed_upgrades', 'shot_distance_upgrades',
+                      'fire_rate_upgrades', 'powerup_upgrades', 'health_upgrades')
+
+MISSILE_PLAYER, MISSILE_ENEMY, MISSILE_HOMING = 0, 1, 2
+
+
+def encode(message):
+    return zlib.compress(json.dumps(message, separators=(',', ':')).encode(), 1)
+
+
+def decode(data):
+    return json.loads(zlib.decompress(data))
+
+
+def state_hash(state):
+    return hashlib.md5(json.dumps(state, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def net_id(obj, counter):
+    """Stable id for a game object, assigned the first time it is captured"""
+    if not hasattr(obj, 'net_id'):
+        obj.net_id = str(next(counter))
+    return obj.net_id
+
+
+def capture_state(game, counter):
+    """Snapshot of everything clients draw, as JSON-friendly nested dicts and lists.
+
+    Coordinates are rounded and always stored as floats, so a value hashes
+    the same on the server and on clients.
+    """
+    players = {}
+    for player in game.players:
+        players[net_id(player, counter)] = [
+            round(float(player.x), 1), round(float(player.y), 1), round(float(player.angle), 3),
+            player.health, player.max_health, round(float(player.movement_speed), 2),
+            player.player_num, int(getattr(player, 'is_dead', False)),
+            int(player.shield_active), int(player.speed_boost_active),
+            player.level, player.xp, player.xp_to_next_level, getattr(player, 'pending_level_ups', 0),
+            [getattr(player, name) for name in UPGRADE_ATTRIBUTES],
+            dict(player.powerup_shots_remaining),
+        ]
+    enemies = {net_id(enemy, counter): [
+        round(float(enemy.x), 1), round(float(enemy.y), 1), round(float(enemy.angle), 3),
+        enemy.health, enemy.max_health, round(float(enemy.movement_speed), 2), round(float(enemy.damage), 1),
+    ] for enemy in game.enemies}
+
+    # Shots already carry stable entity ids from the game's world
+    missiles = {}
+    for shots, kind in ((game.player_shots, MISSILE_PLAYER), (game.enemy_shots, MISSILE_ENEMY)):
+        columns = shots.columns
+        for entity_id, x, y, homing in zip(columns['id'], columns['x'], columns['y'], columns['homing']):
+            missiles[str(entity_id)] = [round(float(x), 1), round(float(y), 1), MISSILE_HOMING if homing else kind]
+
+    return {
+        'game': {
+            'state': game.state,
+            'wave': game.wave,
+            'queued': len(game.enemies_to_spawn),
+            'spawning': int(game.is_spawning_wave),
+            'multipliers': {name: round(value, 3) for name, value in game.enemy_profile.multipliers.items()},
+            'upgrade_info': game.enemy_upgrade_info,
+            'level_up': [player.net_id for player in game.pending_level_ups if hasattr(player, 'net_id')],
+        },
+        'players': players,
+        'enemies': enemies,
+        'missiles': missiles,
+        'powerups': {net_id(p, counter): [round(float(p.x), 1), round(float(p.y), 1), p.powerup_type] for p in game.powerups},
+        'obstacles': {net_id(o, counter): [o.x, o.y, o.width, o.height, o.type] for o in game.obstacles},
+    }
+
+
+def encode_delta(state, base):
+    """Changes from base to state: new entities in full, changed fields by index, removed ids"""
+    delta = {}
+    base_game = base.get('game', {})
+    changed_game = {key: value for key, value in state['game'].items()
+                    if key not in base_game or base_game[key] != value}
+    if changed_game:
+        delta['game'] = changed_game
+    for category, entities in state.items():
+        if category == 'game':
+            continue
+        old_entities = base.get(category, {})
+        full = {}
+        fields = {}
+        for entity_id, values in entities.items():
+            old_values = old_entities.get(entity_id)
+            if old_values is None:
+                full[entity_id] = values
+            elif old_values != values:
+                fields[entity_id] = {str(i): value for i, (value, old) in enumerate(zip(values, old_values))
+                                     if value != old}
+        gone = [entity_id for entity_id in old_entities if entity_id not in entities]
+        changes = {}
+        if full:
+            changes['full'] = full
+        if fields:
+            changes['fields'] = fields
+        if gone:
+            changes['gone'] = gone
+        if changes:
+            delta[category] = changes
+    return delta
+
+
+def apply_delta(base, delta):
+    """Rebuild a state from the base it was encoded against"""
+    state = {'game': dict(base.get('game', {}))}
+    state['game'].update(delta.get('game', {}))
+    for category in ('players', 'enemies', 'missiles', 'powerups', 'obstacles'):
+        entities = dict(base.get(category, {}))
+        changes = delta.get(category, {})
+        for entity_id in changes.get('gone', ()):
+            entities.pop(entity_id, None)
+        for entity_id, fields in changes.get('fields', {}).items():
+            values = list(entities[entity_id])
+            for index, value in fields.items():
+                values[int(index)] = value
+            entities[entity_id] = values
+        entities.update(changes.get('full', {}))
+        state[category] = entities
+    return state
+
+
+class DatagramEndpoint(asyncio.DatagramProtocol):
+    """Hands decoded datagrams to a callback, ignoring anything malformed"""
+    def __init__(self, handler):
+        self.handler = handler
+        self.transport = None
+        self.bytes_received = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.bytes_received += len(data)
+        try:
+            message = decode(data)
+        except (zlib.error, ValueError):
+            return
+        self.handler(message, addr)
+
+    def error_received(self, exc):
+        pass  # ICMP errors from a client that went away; the timeout frees its slot
+
+
+class ClientSlot:
+    """Server-side state for one connected client"""
+    def __init__(self, addr, player_num):
+        self.addr = addr
+        self.player_num = player_num
+        self.commands = deque()  # (sequence, command) waiting to be simulated
+        self.last_queued = 0
+        self.command = (0, 0, 0, 0, 0)
+        self.input_ack = 0  # Last command sequence simulated
+        self.action_ack = 0  # Last menu action performed
+        self.snapshot_ack = 0  # Last snapshot the client decoded
+        self.last_heard = time.monotonic()
+        self.bytes_sent = 0
+
+
+class NetplayServer:
+    """Authoritative simulation for two networked players"""
+    def __init__(self, port, seed=None, start_wave=1):
+        self.port = port
+        self.seed = seed
+        self.start_wave = start_wave
+        self.game = tfn.Game(screen_size=NETPLAY_VARS['window'], arena_size=NETPLAY_VARS['arena'])
+        self.game.state = "waiting"
+        tfn.GAME_CLOCK.use_fixed_step(NETPLAY_VARS['step_ms'])
+        self.endpoint = None
+        self.slots = {}  # addr -> ClientSlot
+        self.id_counter = iter(range(1, 1 << 62))
+        self.snapshots = OrderedDict()  # sequence -> state
+        self.events = deque()  # (snapshot sequence, [event id, effect type, x, y])
+        self.last_effect = 0  # Highest effect entity id sent as an event so far
+        self.sequence = 0
+        self.tick = 0
+        self.hashes = {}
+
+    async def serve(self, duration=None):
+        loop = asyncio.get_running_loop()
+        transport, self.endpoint = await loop.create_datagram_endpoint(
+            lambda: DatagramEndpoint(self.handle), local_addr=('0.0.0.0', self.port))
+        print(f"Netplay server listening on UDP port {self.port}")
+        step = NETPLAY_VARS['step_ms'] / 1000
+        start = next_tick = loop.time()
+        try:
+            while duration is None or loop.time() - start < duration:
+                self.step()
+                next_tick += step
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+        finally:
+            transport.close()
+
+    def send(self, slot, message):
+        data = encode(message)
+        slot.bytes_sent += len(data)
+        self.endpoint.transport.sendto(data, slot.addr)
+
+    def handle(self, message, addr):
+        slot = self.slots.get(addr)
+        if message.get('t') == 'hello':
+            if slot is None:
+                taken = {s.player_num for s in self.slots.values()}
+                free = [num for num in (1, 2) if num not in taken]
+                if not free:
+                    self.endpoint.transport.sendto(encode({'t': 'full'}), addr)
+                    return
+                slot = self.slots[addr] = ClientSlot(addr, free[0])
+                print(f"Player {slot.player_num} joined from {addr[0]}:{addr[1]}")
+                if len(self.slots) == 2 and self.game.state == "waiting":
+                    self.start_game()
+            self.send(slot, {'t': 'welcome', 'player': slot.player_num, 'arena': list(NETPLAY_VARS['arena']),
+                             'step_ms': NETPLAY_VARS['step_ms']})
+            return
+        if slot is None:
+            return
+        slot.last_heard = time.monotonic()
+        if message.get('t') != 'input':
+            return
+
+        slot.snapshot_ack = max(slot.snapshot_ack, message.get('ack', 0))
+        for sequence, command in message.get('cmds', ()):
+            if sequence > slot.last_queued:
+                slot.commands.append((sequence, tuple(command)))
+                slot.last_queued = sequence
+        while len(slot.commands) > NETPLAY_VARS['max_input_buffer']:
+            slot.input_ack = slot.commands.popleft()[0]
+        for action_id, name, value in message.get('actions', ()):
+            if action_id > slot.action_ack:
+                self.perform_action(slot, name, value)
+                slot.action_ack = action_id
+
+    def start_game(self):
+        game = self.game
+        game.start_session(True, seed=self.seed)
+        if self.start_wave > 1:
+            game.wave = self.start_wave
+            game.enemies = []
+            game.enemies_to_spawn = []
+            game.generate_obstacles()
+            game.spawn_wave()
+        print(f"Networked co-op game started at wave {game.wave}")
+
+    def perform_action(self, slot, name, value):
+        game = self.game
+        if name == 'level_up_choice' and game.state == "level_up" and game.pending_level_ups:
+            if game.pending_level_ups[0].player_num == slot.player_num:
+                game.level_up_selection = value
+                game.apply_level_up_choice()
+        elif name == 'continue' and game.state == "enemy_upgrade_warning":
+            game.continue_after_enemy_upgrade()
+        elif name == 'restart' and game.state == "game_over":
+            self.start_game()
+
+    def step(self):
+        game = self.game
+        now = time.monotonic()
+        for addr, slot in list(self.slots.items()):
+            if now - slot.last_heard > NETPLAY_VARS['client_timeout']:
+                print(f"Player {slot.player_num} timed out")
+                del self.slots[addr]
+
+        if game.state == "game":
+            for slot in self.slots.values():
+                if slot.commands:
+                    slot.input_ack, slot.command = slot.commands.popleft()
+                if slot.player_num <= len(game.players):
+                    game.apply_player_command(game.players[slot.player_num - 1], slot.command)
+        game.update()
+        # Networked games don't stop for high score name entry
+        game.awaiting_name_input = False
+        tfn.GAME_CLOCK.advance()
+        self.tick += 1
+
+        if self.tick % NETPLAY_VARS['snapshot_every'] == 0 and self.slots:
+            self.broadcast()
+
+    def broadcast(self):
+        state = capture_state(self.game, self.id_counter)
+        self.sequence += 1
+        self.snapshots[self.sequence] = state
+        self.hashes[self.sequence] = state_hash(state)
+        while len(self.snapshots) > NETPLAY_VARS['snapshot_history']:
+            self.snapshots.popitem(last=False)
+
+        # Effects are sent once as spawn events; clients animate them locally
+        columns = self.game.effects.columns
+        for effect, kind, x, y in zip(columns['id'], columns['kind'], columns['x'], columns['y']):
+            if effect > self.last_effect:
+                self.events.append((self.sequence, [f"e{effect}", kind, round(x, 1), round(y, 1)]))
+                self.last_effect = effect
+        oldest = next(iter(self.snapshots))
+        while self.events and self.events[0][0] < oldest:
+            self.events.popleft()
+
+        for slot in self.slots.values():
+            base_sequence = slot.snapshot_ack if slot.snapshot_ack in self.snapshots else 0
+            base = self.snapshots[base_sequence] if base_sequence else {}
+            self.send(slot, {
+                't': 'snap',
+                'seq': self.sequence,
+                'base': base_sequence,
+                'tick': self.tick,
+                'input_ack': slot.input_ack,
+                'action_ack': slot.action_ack,
+                'delta': encode_delta(state, base),
+                'events': [event for sequence, event in self.events if sequence > base_sequence],
+            })
+
+    def report(self):
+        return {
+            'ticks': self.tick,
+            'snapshots': self.sequence,
+            'hashes': self.hashes,
+            'bytes_sent': {slot.player_num: slot.bytes_sent for slot in self.slots.values()},
+        }
+
+
+class NetplayClient:
+    """Connects to a server, predicts the local tank and draws interpolated snapshots"""
+    def __init__(self, host, port, headless=False, bot=False):
+        self.server_addr = (host, port)
+        self.headless = headless
+        self.bot = bot
+        self.endpoint = None
+        self.player_num = None
+        self.arena_size = None  # From the server's welcome
+        self.view = None
+
+        self.states = OrderedDict()  # sequence -> decoded state
+        self.latest_sequence = 0
+        self.latest_tick = 0
+        self.latest_received = 0.0
+        self.timeline = deque(maxlen=32)  # (server tick, state) for interpolation
+        self.hashes = {}
+
+        self.command_sequence = 0
+        self.pending_commands = deque()  # Sent but not yet simulated by the server
+        self.predicted = None  # Local copy of our tank that input is applied to immediately
+        self.actions = []  # (id, name, value) resent until acknowledged
+        self.next_action_id = 1
+        self.action_ack = 0
+        self.seen_events = deque(maxlen=512)
+
+        self.tanks = {}  # net id -> Tank drawn for that id
+        self.powerups = {}
+        self.obstacle_key = None
+        self.selection = 0
+        self.frames = 0
+        self.corrections = []  # Distance the prediction was off by at each reconciliation
+
+    async def run(self, duration=None):
+        loop = asyncio.get_running_loop()
+        transport, self.endpoint = await loop.create_datagram_endpoint(
+            lambda: DatagramEndpoint(self.handle), remote_addr=self.server_addr)
+        try:
+            while self.player_num is None:
+                transport.sendto(encode({'t': 'hello'}))
+                await asyncio.sleep(NETPLAY_VARS['hello_interval'])
+            # Snapshots are ignored until the view exists, so none queue up behind this
+            self.view = self.build_view()
+            print(f"Joined as player {self.player_num}")
+
+            frame_time = NETPLAY_VARS['step_ms'] / 1000
+            start = next_frame = loop.time()
+            while duration is None or loop.time() - start < duration:
+                if not self.frame():
+                    break
+                next_frame += frame_time
+                await asyncio.sleep(max(0.0, next_frame - loop.time()))
+        finally:
+            transport.close()
+
+    def build_view(self):
+        """The Game that draws received state; built by run() once joined, not in the datagram handler"""
+        view = tfn.Game(screen_size=NETPLAY_VARS['window'], arena_size=self.arena_size)
+        view.coop_mode = False  # Local input always drives player 1's bindings
+        view.state = "waiting"
+        view.timers.clear()  # Only effect lifetimes go on the view's timers, run every frame
+        return view
+
+    def handle(self, message, addr):
+        kind = message.get('t')
+        if kind == 'welcome' and self.player_num is None:
+            self.player_num = message['player']
+            self.arena_size = tuple(message['arena'])
+        elif kind == 'full':
+            print("Server is full")
+        elif kind == 'snap' and self.view is not None:
+            self.receive_snapshot(message)
+
+    def receive_snapshot(self, message):
+        sequence = message['seq']
+        if sequence <= self.latest_sequence:
+            return  # Late or duplicated packet
+        base = self.states.get(message['base'], {}) if message['base'] else {}
+        if message['base'] and message['base'] not in self.states:
+            return  # Base already discarded; the next snapshot will be encoded against our ack
+        state = apply_delta(base, message['delta'])
+        self.states[sequence] = state
+        while len(self.states) > NETPLAY_VARS['snapshot_history']:
+            self.states.popitem(last=False)
+        self.hashes[sequence] = state_hash(state)
+        self.latest_sequence = sequence
+        self.latest_tick = message['tick']
+        self.latest_received = time.monotonic()
+        self.timeline.append((message['tick'], state))
+
+        self.action_ack = message['action_ack']
+        self.actions = [action for action in self.actions if action[0] > self.action_ack]
+        for event_id, effect_type, x, y in message['events']:
+            if event_id not in self.seen_events:
+                self.seen_events.append(event_id)
+                if not self.headless:
+                    self.view.add_effect(x, y, effect_type)
+        self.reconcile(state, message['input_ack'])
+
+    def own_player_state(self, state):
+        for entity_id, values in state['players'].items():
+            if values[6] == self.player_num:
+                return entity_id, values
+        return None, None
+
+    def reconcile(self, state, input_ack):
+        """Snap the predicted tank to the server and replay commands it hasn't simulated yet"""
+        while self.pending_commands and self.pending_commands[0][0] <= input_ack:
+            self.pending_commands.popleft()
+        _, values = self.own_player_state(state)
+        if values is None:
+            return
+        if self.predicted is None:
+            self.predicted = tfn.Tank(values[0], values[1], True, self.player_num, self.view.arena)
+            self.predicted.trail = None
+        predicted = self.predicted
+        before = (predicted.x, predicted.y)
+        predicted.x, predicted.y, predicted.angle = values[0], values[1], values[2]
+        predicted.movement_speed = values[5]
+        predicted.speed_boost_active = bool(values[9])
+        self.sync_obstacles(state)
+        for _, command in self.pending_commands:
+            self.predict(command)
+        self.corrections.append(math.hypot(predicted.x - before[0], predicted.y - before[1]))
+
+    def predict(self, command):
+        forward, backward, turn_left, turn_right, _ = command
+        # Movement only; shots are the server's to create
+        self.view.apply_player_command(self.predicted, (forward, backward, turn_left, turn_right, 0))
+
+    def sync_obstacles(self, state):
+        key = tuple(sorted(state['obstacles']))
+        if key != self.obstacle_key:
+            self.obstacle_key = key
+            self.view.obstacles = [tfn.Obstacle(x, y, w, h, kind) for x, y, w, h, kind in state['obstacles'].values()]
+
+    def read_command(self):
+        if self.bot:
+            phase = self.frames % 240
+            return (int(phase < 150), int(phase >= 200), int(phase % 60 < 10), 0, 1)
+        if not self.view.players:
+            return (0, 0, 0, 0, 0)
+        return self.view.read_player_commands()[0]
+
+    def queue_action(self, name, value=None):
+        self.actions.append((self.next_action_id, name, value))
+        self.next_action_id += 1
+
+    def frame(self):
+        """Handle input, send it, and draw. Returns False when the player quits"""
+        self.frames += 1
+        state = self.states.get(self.latest_sequence)
+        game_state = state['game']['state'] if state else "waiting"
+
+        if not self.headless:
+            for event in tfn.pygame.event.get():
+                if event.type == tfn.pygame.QUIT:
+                    return False
+                if event.type == tfn.pygame.KEYDOWN:
+                    if event.key == tfn.pygame.K_ESCAPE:
+                        return False
+                    self.handle_key(event.key, game_state, state)
+        if self.bot and state:
+            self.bot_actions(game_state, state)
+
+        commands = []
+        if game_state == "game" and self.predicted is not None:
+            command = self.read_command()
+            self.command_sequence += 1
+            self.pending_commands.append((self.command_sequence, command))
+            self.predict(command)
+            commands = list(self.pending_commands)[-NETPLAY_VARS['input_redundancy']:]
+        self.endpoint.transport.sendto(encode({
+            't': 'input', 'ack': self.latest_sequence,
+            'cmds': [[sequence, list(command)] for sequence, command in commands],
+            'actions': self.actions,
+        }))
+
+        if not self.headless and state:
+            self.draw(state)
+        return True
+
+    def handle_key(self, key, game_state, state):
+        pygame = tfn.pygame
+        if game_state == "level_up" and self.our_level_up(state):
+            if key in (pygame.K_UP, pygame.K_w):
+                self.selection = (self.selection - 1) % 6
+            elif key in (pygame.K_DOWN, pygame.K_s):
+                self.selection = (self.selection + 1) % 6
+            elif key in (pygame.K_RETURN, pygame.K_SPACE):
+                self.queue_action('level_up_choice', self.selection)
+        elif game_state == "enemy_upgrade_warning" and key in (pygame.K_RETURN, pygame.K_SPACE):
+            self.queue_action('continue')
+        elif game_state == "game_over" and key == pygame.K_r:
+            self.queue_action('restart')
+
+    def bot_actions(self, game_state, state):
+        if self.actions:
+            return
+        if game_state == "level_up" and self.our_level_up(state):
+            self.queue_action('level_up_choice', self.frames % 6)
+        elif game_state == "enemy_upgrade_warning":
+            self.queue_action('continue')
+        elif game_state == "game_over":
+            self.queue_action('restart')
+
+    def our_level_up(self, state):
+        own_id, _ = self.own_player_state(state)
+        pending = state['game']['level_up']
+        return bool(pending) and pending[0] == own_id
+
+    def render_states(self):
+        """The two snapshots around the interpolated render time, and the blend between them"""
+        elapsed_ticks = (time.monotonic() - self.latest_received) * 1000 / NETPLAY_VARS['step_ms']
+        render_tick = (self.latest_tick + min(elapsed_ticks, NETPLAY_VARS['snapshot_every'] * 2)
+                       - NETPLAY_VARS['interpolation_ticks'])
+        older = newer = self.timeline[-1]
+        for earlier, later in zip(list(self.timeline)[:-1], list(self.timeline)[1:]):
+            if earlier[0] <= render_tick <= later[0]:
+                older, newer = earlier, later
+                break
+        else:
+            if self.timeline[0][0] > render_tick:
+                older = newer = self.timeline[0]
+        span = newer[0] - older[0]
+        blend = (render_tick - older[0]) / span if span else 1.0
+        return older[1], newer[1], max(0.0, min(1.0, blend))
+
+    def draw(self, state):
+        view = self.view
+        game = state['game']
+        older, newer, blend = self.render_states()
+
+        def position(category, entity_id, values):
+            previous = older[category].get(entity_id)
+            if previous is None:
+                return values[0], values[1], values[2] if len(values) > 2 else 0
+            angle_from, angle_to = previous[2], values[2]
+            turn = (angle_to - angle_from + math.pi) % (2 * math.pi) - math.pi
+            return (previous[0] + (values[0] - previous[0]) * blend,
+                    previous[1] + (values[1] - previous[1]) * blend,
+                    angle_from + turn * blend)
+
+        players = []
+        for entity_id, values in state['players'].items():
+            tank = self.tank_for(entity_id, True, values[6])
+            (tank.health, tank.max_health, tank.movement_speed, _, dead, shield, boost, tank.level, tank.xp,
+             tank.xp_to_next_level, tank.pending_level_ups, upgrades, shots) = values[3:]
+            tank.is_dead = bool(dead)
+            tank.shield_active = bool(shield)
+            tank.speed_boost_active = bool(boost)
+            tank.powerup_shots_remaining = shots
+            for name, count in zip(UPGRADE_ATTRIBUTES, upgrades):
+                setattr(tank, name, count)
+            if values[6] == self.player_num and self.predicted is not None:
+                tank.x, tank.y, tank.angle = self.predicted.x, self.predicted.y, self.predicted.angle
+            elif entity_id in newer['players']:
+                tank.x, tank.y, tank.angle = position('players', entity_id, newer['players'][entity_id])
+            tank.trail.update()
+            players.append(tank)
+        players.sort(key=lambda tank: tank.player_num)
+
+        # Enemies share the view's profile; only health is per enemy
+        view.enemy_profile.set_multipliers(game['multipliers'])
+        enemies = []
+        for entity_id, values in newer['enemies'].items():
+            tank = self.tank_for(entity_id, False)
+            tank.x, tank.y, tank.angle = position('enemies', entity_id, values)
+            tank.health = values[3]
+            tank.trail.update()
+            enemies.append(tank)
+
+        # Shots are only drawn here, so the view's shot archetypes are refilled every frame
+        view.player_shots.clear()
+        view.enemy_shots.clear()
+        for entity_id, (x, y, kind) in newer['missiles'].items():
+            previous = older['missiles'].get(entity_id, (x, y, kind))
+            x = previous[0] + (x - previous[0]) * blend
+            y = previous[1] + (y - previous[1]) * blend
+            view.world.spawn('enemy_shots' if kind == MISSILE_ENEMY else 'player_shots',
+                             x=x, y=y, prev_x=x, prev_y=y, angle=0, speed=0, max_distance=0, traveled=0,
+                             owner=None, homing=kind == MISSILE_HOMING, target=None, blocked_at=None)
+
+        view.powerups = []
+        for entity_id, (x, y, powerup_type) in state['powerups'].items():
+            powerup = self.powerups.setdefault(entity_id, tfn.Powerup(x, y, powerup_type))
+            powerup.update()
+            view.powerups.append(powerup)
+
+        self.prune(state, newer)
+        self.sync_obstacles(state)
+        view.players = players
+        view.enemies = enemies
+        view.timers.run_due(tfn.GAME_CLOCK.ticks())
+        tfn.update_effects(view.effects, view.particles)
+        view.wave = game['wave']
+        view.enemies_to_spawn = [None] * game['queued']
+        view.is_spawning_wave = bool(game['spawning'])
+        view.enemy_upgrade_info = game['upgrade_info']
+        view.pending_level_ups = [self.tanks[entity_id] for entity_id in game['level_up'] if entity_id in self.tanks]
+        view.level_up_selection = self.selection
+
+        if game['state'] == "level_up":
+            if view.state != "level_up":
+                view.draw_game()
+                view.background_surface = view.screen.copy()
+        view.state = game['state']
+        if view.state == "waiting":
+            view.screen.fill(tfn.SAND_COLOR)
+            view.draw_pixel_text("Waiting for the other player...", 40, 40, 48, tfn.WHITE)
+        else:
+            view.draw()
+        kbits = self.endpoint.bytes_received * 8 / 1000 / max(1, self.frames / 60)
+        view.draw_pixel_text(f"P{self.player_num}  {kbits:.0f} kbit/s",
+                             view.screen_width - 260, view.screen_height - 40, 28, tfn.WHITE)
+        view.display.present()
+
+    def tank_for(self, entity_id, is_player, player_num=1):
+        tank = self.tanks.get(entity_id)
+        if tank is None:
+            if is_player:
+                tank = tfn.Tank(0, 0, True, player_num, self.view.arena)
+            else:
+                tank = tfn.EnemyTank(0, 0, self.view.enemy_profile, self.view.arena)
+            self.tanks[entity_id] = tank
+        return tank
+
+    def prune(self, state, newer):
+        """Forget drawing objects for entities that no longer exist"""
+        live_tanks = set(state['players']) | set(newer['enemies'])
+        for cache, live in ((self.tanks, live_tanks), (self.powerups, state['powerups'])):
+            for entity_id in [entity_id for entity_id in cache if entity_id not in live]:
+                del cache[entity_id]
+
+    def report(self):
+        corrections = sorted(self.corrections) or [0.0]
+        return {
+            'player': self.player_num,
+            'frames': self.frames,
+            'snapshots': len(self.hashes),
+            'hashes': self.hashes,
+            'bytes_received': self.endpoint.bytes_received if self.endpoint else 0,
+            'prediction_correction_px': {
+                'p50': corrections[len(corrections) // 2],
+                'p99': corrections[int(0.99 * (len(corrections) - 1))],
+            },
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Networked co-op for Tanks For Nothing")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+    server_parser = subparsers.add_parser("server", help="Run the authoritative simulation")
+    server_parser.add_argument("--seed", type=int)
+    server_parser.add_argument("--wave", type=int, default=1, help="Wave to start at")
+    client_parser = subparsers.add_parser("client", help="Join a server")
+    client_parser.add_argument("host", nargs="?", default="127.0.0.1")
+    client_parser.add_argument("--headless", action="store_true", help="Don't open a window")
+    client_parser.add_argument("--bot", action="store_true", help="Play with scripted input")
+    for sub in (server_parser, client_parser):
+        sub.add_argument("--port", type=int, default=NETPLAY_VARS['port'])
+        sub.add_argument("--duration", type=float, help="Stop after this many seconds")
+        sub.add_argument("--report", help="Write a JSON report to this file when stopping")
+    args = parser.parse_args()
+
+    if args.mode == "server" or args.headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    if args.mode == "server":
+        node = NetplayServer(args.port, seed=args.seed, start_wave=args.wave)
+        run = node.serve(args.duration)
+    else:
+        node = NetplayClient(args.host, args.port, headless=args.headless, bot=args.bot)
+        run = node.run(args.duration)
+
+    try:
+        asyncio.run(run)
+    except KeyboardInterrupt:
+        pass
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(node.report(), f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
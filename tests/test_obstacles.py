@@ -0,0 +1,65 @@
+"""Obstacle layout: poisson_disk_sample returns count points unless the box is full.
+
+    python -m pytest tests
+"""
+import math
+import os
+import random
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import TanksForNothing as tfn  # noqa: E402
+
+
+def assert_valid(points, box, radius, keep_out=()):
+    left, top, right, bottom = box
+    for i, (x, y) in enumerate(points):
+        assert left <= x <= right and top <= y <= bottom
+        for keep_x, keep_y, distance in keep_out:
+            assert math.hypot(x - keep_x, y - keep_y) >= distance
+        for other_x, other_y in points[:i]:
+            assert math.hypot(x - other_x, y - other_y) >= radius
+
+
+def test_returns_count_in_a_crowded_box():
+    # A 1000x1000 box holds about 65 points 100 apart; 60 is well past where darts alone give up
+    box = (0, 0, 1000, 1000)
+    keep_out = [(500, 500, 150)]
+    for seed in range(20):
+        points = tfn.poisson_disk_sample(*box, 100, random.Random(seed), 60, keep_out)
+        assert len(points) == 60
+        assert_valid(points, box, 100, keep_out)
+
+
+def test_full_box_returns_what_fits():
+    box = (0, 0, 1000, 1000)
+    points = tfn.poisson_disk_sample(*box, 100, random.Random(1), 500)
+    assert 50 < len(points) < 500
+    assert_valid(points, box, 100)
+    # Full means next to no spot in the box is clear of every point (each point
+    # retires after attempts misses in its annulus, so tiny gaps can remain)
+    rng = random.Random(2)
+    probes = [(rng.uniform(0, 1000), rng.uniform(0, 1000)) for _ in range(5000)]
+    clear = [probe for probe in probes
+             if all(math.hypot(probe[0] - x, probe[1] - y) >= 100 for x, y in points)]
+    assert len(clear) < len(probes) * 0.01
+
+
+def test_work_follows_count_not_area():
+    calls = []
+
+    class CountingRandom(random.Random):
+        def uniform(self, a, b):
+            calls.append(None)
+            return super().uniform(a, b)
+
+    points = tfn.poisson_disk_sample(0, 0, 100000, 100000, 150, CountingRandom(3), 40)
+    assert len(points) == 40
+    assert len(calls) < 200
+
+
+def test_degenerate_boxes():
+    assert tfn.poisson_disk_sample(10, 10, 0, 0, 100, random.Random(0), 5) == []
+    assert tfn.poisson_disk_sample(0, 0, 100, 100, 100, random.Random(0), 0) == []
@@ -0,0 +1,59 @@
+"""Shots: a shot's last move is checked for hits before spent shots are removed.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import TanksForNothing as tfn  # noqa: E402
+
+
+@pytest.fixture
+def game(tmp_path, monkeypatch):
+    """A single player game with one enemy, no obstacles and nothing scheduled"""
+    monkeypatch.setitem(tfn.HIGH_SCORE_VARS, 'database', str(tmp_path / "high_scores.db"))
+    monkeypatch.setitem(tfn.HIGH_SCORE_VARS, 'legacy_files', ())
+    tfn.GAME_CLOCK.use_fixed_step(1000 / 30)
+    game = tfn.Game(screen_size=(1280, 720))
+    game.start_session(False, seed=1)
+    game.timers.clear()
+    game.obstacles = []
+    game.powerups = []
+    game.enemies = [game.create_upgraded_enemy(900, 200)]
+    yield game
+    game.score_store.close()
+
+
+def fire_at_enemy(game, moves_short):
+    """Fire a shot with a range of one move, starting moves_short moves before it would touch the enemy"""
+    player, enemy = game.players[0], game.enemies[0]
+    speed = player.shot_speed
+    edge = enemy.get_rect().left - tfn.SHOT_RADIUS
+    game.spawn_shot(player, edge - speed * moves_short, enemy.y, 0, max_distance=speed)
+    return player, enemy
+
+
+def test_shot_hits_on_the_move_that_ends_its_range(game):
+    # The range ends half a move past the enemy's edge, so only the last move reaches it
+    player, enemy = fire_at_enemy(game, 0.5)
+    xp = player.xp
+    game.update()
+    assert enemy.health < enemy.max_health
+    assert player.xp > xp
+    assert len(game.player_shots) == 0
+
+
+def test_shot_whose_range_ends_short_misses(game):
+    player, enemy = fire_at_enemy(game, 1.5)
+    game.update()
+    assert enemy.health == enemy.max_health
+    assert len(game.player_shots) == 0